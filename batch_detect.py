@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Detection over Recorded Frames
+Runs ImageDetector over a directory (or glob) of saved screenshots on a
+process pool and streams one JSON line per frame to stdout
+
+Usage:
+    python batch_detect.py <frames_dir_or_glob> [--workers N] [--mode MODE] [--engine ENGINE]
+                           [--threshold T] [--scale S] [--output FILE]
+
+Each output line holds the frame path, its size, the display scale the
+detections were matched at, the detections per template as
+[center_x, center_y, score] and the time spent reading and detecting.
+Frames that cannot be read produce a line with an "error" field. A
+summary goes to stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, TextIO
+
+import cv2
+
+from src.capture import FileFrameSource
+from src.detector import ImageDetector
+from src.engines import ENGINES
+from src.log import LEVEL_ENV, setup_logging
+
+TEMPLATE_PATHS = {
+    'not_downloaded': 'images/not_download.jpg',
+    'downloading': 'images/downloading.jpg',
+    'downloaded': 'images/downloaded.jpg'
+}
+
+# One detector per worker process, created by the pool initializer
+_detector = None
+_options = None
+
+
+def _init_worker(options: dict):
+    global _detector, _options
+    # Processes are the unit of parallelism; keep OpenCV from spawning threads in each
+    cv2.setNumThreads(1)
+    # stdout carries the results; only warnings (or the configured level) go to stderr,
+    # which also keeps workers from writing debug images
+    setup_logging(os.environ.get(LEVEL_ENV, 'WARNING'), stream=sys.stderr)
+    _options = options
+    _detector = ImageDetector(incremental=False, engine=options['engine'], mode=options['mode'], workers=1)
+    _detector.load_templates(options['templates'])
+    if options['scale'] is not None:
+        _detector.bank.lock(options['scale'])
+    else:
+        # Frames are unrelated: sweep every scale on every frame, without locking or
+        # keeping a probe history that would grow with the batch
+        _detector.bank.probe_frames = None
+
+
+def detect_file(path: str) -> dict:
+    """Detections for one frame file, as a JSON-serializable record."""
+    start = time.perf_counter()
+    frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    read_ms = (time.perf_counter() - start) * 1000
+    if frame is None:
+        return {'frame': path, 'error': 'could not read frame'}
+
+    height, width = frame.shape[:2]
+    region = {'left': 0, 'top': 0, 'width': width, 'height': height}
+    start = time.perf_counter()
+    try:
+        _detector.last_frame = frame
+        gray = _detector.workspace.to_gray(frame)
+        _detector.detect_gray(gray, region, _options['threshold'])
+    except Exception as e:
+        return {'frame': path, 'error': str(e)}
+    detect_ms = (time.perf_counter() - start) * 1000
+
+    detections = {
+        name: [[int(x), int(y), round(float(score), 4)] for x, y, score in matches]
+        for name, matches in _detector.last_detections.items()
+    }
+    return {
+        'frame': path,
+        'width': width,
+        'height': height,
+        'scale': _detector.last_scale,
+        'detections': detections,
+        'counts': {name: len(matches) for name, matches in detections.items()},
+        'read_ms': round(read_ms, 2),
+        'detect_ms': round(detect_ms, 2),
+        'pid': os.getpid(),
+    }
+
+
+def run_batch(paths: Iterable[str], out: TextIO, workers: Optional[int] = None, mode: str = 'full',
+              engine: str = 'opencv', threshold: float = 0.5, scale: Optional[float] = None,
+              templates: Optional[dict] = None) -> dict:
+    """Stream one JSON line per frame to ``out``; returns a summary."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    options = {
+        'mode': mode,
+        'engine': engine,
+        'threshold': threshold,
+        'scale': scale,
+        'templates': {name: os.path.abspath(path) for name, path in (templates or TEMPLATE_PATHS).items()},
+    }
+    # Small chunks keep every worker busy while results stream in frame order
+    chunksize = max(1, min(16, len(paths) // (workers * 4)))
+    frames = errors = 0
+    detect_ms = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        for record in pool.map(detect_file, paths, chunksize=chunksize):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            frames += 1
+            if 'error' in record:
+                errors += 1
+            else:
+                detect_ms += record['detect_ms']
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'errors': errors,
+        'workers': workers,
+        'seconds': elapsed,
+        'frames_per_second': frames / elapsed if elapsed > 0 else 0.0,
+        'mean_detect_ms': detect_ms / max(1, frames - errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect download buttons in recorded frames")
+    parser.add_argument('frames', help="Directory or glob pattern of captured frames")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--mode', default='full', choices=ImageDetector.MODES, help="Detection mode")
+    parser.add_argument('--engine', default='opencv', choices=sorted(ENGINES), help="Full-frame matcher")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Match threshold")
+    parser.add_argument('--scale', type=float, default=None,
+                        help="Display scale of the frames (default: try every scale on every frame)")
+    parser.add_argument('--output', default=None, help="Write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        paths = FileFrameSource(args.frames, loop=False, cache=False).paths
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        summary = run_batch(paths, out, workers=args.workers, mode=args.mode, engine=args.engine,
+                            threshold=args.threshold, scale=args.scale)
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"{summary['frames']} frames ({summary['errors']} errors) in {summary['seconds']:.1f}s "
+          f"on {summary['workers']} workers: {summary['frames_per_second']:.1f} frames/s, "
+          f"{summary['mean_detect_ms']:.1f} ms detection per frame", file=sys.stderr)
+    sys.exit(1 if summary['errors'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Detection Benchmark
+Runs batch_detect over a directory of synthetic frames with a growing
+number of worker processes and reports throughput
+
+Run from the repository root:
+    python -m benchmarks.batch
+"""
+
+import io
+import json
+import os
+import tempfile
+
+import cv2
+
+from batch_detect import run_batch
+from src.synthetic import make_frame
+
+FRAME_SIZE = (1280, 900)
+FRAMES = 48
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    print("=" * 64)
+    print("Batch Detection Benchmark")
+    print("=" * 64)
+    print(f"{FRAMES} frames of {FRAME_SIZE[0]}x{FRAME_SIZE[1]}, CPU cores: {os.cpu_count()}\n")
+    print(f"{'workers':>8} {'frames/s':>10} {'speedup':>8} {'detect ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(FRAMES):
+            frame, _ = make_frame(*FRAME_SIZE, icons=12, seed=index)
+            path = os.path.join(directory, f'frame_{index:04d}.png')
+            cv2.imwrite(path, frame)
+            paths.append(path)
+
+        baseline = None
+        reference = None
+        for workers in WORKER_COUNTS:
+            out = io.StringIO()
+            summary = run_batch(paths, out, workers=workers, scale=1.0)
+            detections = [json.loads(line)['detections'] for line in out.getvalue().splitlines()]
+            if reference is None:
+                reference = detections
+            baseline = baseline or summary['frames_per_second']
+            same = "" if detections == reference else "  (results differ!)"
+            print(f"{workers:>8} {summary['frames_per_second']:>10.1f} "
+                  f"{summary['frames_per_second'] / baseline:>7.2f}x {summary['mean_detect_ms']:>10.1f}{same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Capture Backend Benchmark
+Compares a fresh mss instance per frame against the persistent MssFrameSource
+
+Run from the repository root:
+    python -m benchmarks.capture
+"""
+
+import sys
+import time
+
+import mss
+import numpy as np
+
+from src.capture import MssFrameSource
+
+REGION_SIZES = [(200, 200), (800, 600), (1280, 720), (1920, 1080)]
+FRAMES = 50
+
+
+def time_per_frame_instance(region: dict, frames: int) -> np.ndarray:
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        with mss.mss() as sct:
+            np.array(sct.grab(region))
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def time_persistent(source: MssFrameSource, region: dict, frames: int) -> np.ndarray:
+    source.grab(region)  # Warm up: the first grab pays the one-time setup
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        source.grab(region)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def main():
+    try:
+        with mss.mss() as sct:
+            monitor = sct.monitors[1]
+    except Exception as e:
+        print(f"Screen capture is not available here: {e}")
+        sys.exit(1)
+
+    print("=" * 72)
+    print("Capture Backend Benchmark")
+    print("=" * 72)
+    print(f"Monitor: {monitor['width']}x{monitor['height']}, {FRAMES} frames per size\n")
+    print(f"{'region':>12} {'per-frame ms':>14} {'persistent ms':>14} {'setup ms':>10} {'ms/Mpx':>8}")
+
+    with MssFrameSource() as source:
+        for width, height in REGION_SIZES:
+            width = min(width, monitor['width'])
+            height = min(height, monitor['height'])
+            region = {'left': monitor['left'], 'top': monitor['top'],
+                      'width': width, 'height': height}
+
+            fresh = time_per_frame_instance(region, FRAMES) * 1000
+            persistent = time_persistent(source, region, FRAMES) * 1000
+            setup = np.median(fresh) - np.median(persistent)
+            per_mpx = np.median(persistent) / (width * height / 1e6)
+            print(f"{width:>6}x{height:<5} {np.median(fresh):>14.2f} "
+                  f"{np.median(persistent):>14.2f} {setup:>10.2f} {per_mpx:>8.2f}")
+
+    print("\nsetup ms = per-frame instance cost that the persistent source no longer pays")
+    print("ms/Mpx should stay roughly constant: steady-state latency scales with region size only")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Locate-and-Classify Benchmark
+Compares one full-frame pass per template ('full') with a single locate pass
+plus per-button state classification ('classify'): speed per region size,
+accuracy against the known icon placements, and the cost of extra states
+
+Run from the repository root:
+    python -m benchmarks.classify
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+REGION_SIZES = [(800, 600), (1920, 1080), (2560, 1400)]
+REPEATS = 3
+TOLERANCE = 2
+
+
+def run(frame, mode: str, template_paths: dict):
+    detector = ImageDetector(ArrayFrameSource([frame]), incremental=False, mode=mode, workers=1)
+    detector.load_templates(template_paths)
+    detector.bank.lock(1.0)
+    # Calibrated-like thresholds, so 'full' does not report every icon under every state
+    detector.thresholds = {name: 0.95 for name in template_paths}
+    region = {'left': 0, 'top': 0, 'width': frame.shape[1], 'height': frame.shape[0]}
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+    detector.close()
+    return min(timings) * 1000, results
+
+
+def accuracy(results: dict, placements) -> float:
+    """Share of placed icons found at their position with the right state."""
+    found = 0
+    for name, x, y in placements:
+        cx, cy = x + 25, y + 25
+        if any(abs(px - cx) <= TOLERANCE and abs(py - cy) <= TOLERANCE for px, py in results.get(name, [])):
+            found += 1
+    return found / max(1, len(placements))
+
+
+def extra_states(directory: str) -> dict:
+    """Three more made-up states (mirrored icons) next to the real ones."""
+    paths = dict(TEMPLATE_PATHS)
+    for name, path in TEMPLATE_PATHS.items():
+        mirrored = os.path.join(directory, f'{name}_mirrored.png')
+        cv2.imwrite(mirrored, cv2.flip(cv2.imread(path), 1))
+        paths[f'{name}_mirrored'] = mirrored
+    return paths
+
+
+def main():
+    print("=" * 64)
+    print("Locate-and-Classify Benchmark")
+    print("=" * 64)
+    print(f"{'region':>12} {'full ms':>10} {'classify ms':>12} {'speedup':>8} {'full acc':>9} {'cls acc':>8}")
+
+    ok = True
+    for width, height in REGION_SIZES:
+        frame, placements = make_frame(width, height, icons=max(6, width * height // 100000))
+        full_ms, full = run(frame, 'full', TEMPLATE_PATHS)
+        classify_ms, classified = run(frame, 'classify', TEMPLATE_PATHS)
+        full_acc, classify_acc = accuracy(full, placements), accuracy(classified, placements)
+        ok &= classify_acc >= full_acc
+        print(f"{width:>6}x{height:<5} {full_ms:>10.1f} {classify_ms:>12.1f} {full_ms / classify_ms:>7.1f}x "
+              f"{full_acc:>9.1%} {classify_acc:>8.1%}")
+
+    width, height = REGION_SIZES[1]
+    frame, _ = make_frame(width, height, icons=20)
+    with tempfile.TemporaryDirectory() as directory:
+        six = extra_states(directory)
+        print(f"\nCost of states at {width}x{height}:")
+        print(f"{'states':>8} {'full ms':>10} {'classify ms':>12}")
+        for paths in (TEMPLATE_PATHS, six):
+            full_ms, _ = run(frame, 'full', paths)
+            classify_ms, _ = run(frame, 'classify', paths)
+            print(f"{len(paths):>8} {full_ms:>10.1f} {classify_ms:>12.1f}")
+
+    print("\nClassification is at least as accurate as full matching" if ok
+          else "\nFAIL: classification is less accurate than full matching")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download Pacing Benchmark
+Simulates a channel sweep on a virtual clock: a window of files is visible,
+the loop clicks not-downloaded files and scrolls once enough of the window
+has finished. Telegram's bandwidth is shared by all running downloads and
+shrinks as more of them compete, and too many clicks in a short time
+stall every download for a while (flood wait). Compares clicking every
+visible file at once with DownloadScheduler at a few cap/rate settings by
+files completed per minute
+
+Run from the repository root:
+    python -m benchmarks.downloads
+"""
+
+import random
+import sys
+
+from src.downloads import DownloadScheduler
+
+FILES = 400
+VIEW = 8
+SCROLL_ITEMS = 4
+SCROLL_THRESHOLD = 20
+CYCLE = 0.1
+CLICK_DELAY = 0.2
+DURATION = 600.0
+# MB/s with up to SWEET_SPOT downloads; each one beyond costs CONTENTION of it
+BANDWIDTH = 12.0
+SWEET_SPOT = 4
+CONTENTION = 0.15
+# More than FLOOD_CLICKS clicks within FLOOD_WINDOW seconds stalls all downloads
+FLOOD_CLICKS = 15
+FLOOD_WINDOW = 10.0
+FLOOD_WAIT = 20.0
+# (max in flight, clicks per second); None clicks everything visible at once
+SETTINGS = [None, (3, 1.0), (5, 2.0), (8, 4.0)]
+
+
+class Channel:
+    def __init__(self):
+        rng = random.Random(7)
+        self.sizes = [rng.uniform(2.0, 40.0) for _ in range(FILES)]
+        self.left = list(self.sizes)
+        self.state = ['not_downloaded'] * FILES
+        self.top = 0
+        self.clicks = []
+        self.stalled_until = 0.0
+        self.completed = 0
+
+    def visible(self) -> range:
+        return range(self.top, min(FILES, self.top + VIEW))
+
+    def detect(self) -> dict:
+        results = {'not_downloaded': [], 'downloading': [], 'downloaded': []}
+        for index in self.visible():
+            results[self.state[index]].append((100, 100 + (index - self.top) * 80))
+        return results
+
+    def click(self, position, now: float):
+        index = self.top + (position[1] - 100) // 80
+        self.clicks.append(now)
+        recent = [t for t in self.clicks if t > now - FLOOD_WINDOW]
+        self.clicks = recent
+        if len(recent) > FLOOD_CLICKS:
+            self.stalled_until = max(self.stalled_until, now + FLOOD_WAIT)
+        if self.state[index] == 'not_downloaded':
+            self.state[index] = 'downloading'
+
+    def advance(self, start: float, end: float):
+        active = [i for i, state in enumerate(self.state) if state == 'downloading']
+        if not active or end <= self.stalled_until:
+            return
+        seconds = end - max(start, self.stalled_until)
+        rate = BANDWIDTH / (1 + CONTENTION * max(0, len(active) - SWEET_SPOT))
+        share = rate * seconds / len(active)
+        for index in active:
+            self.left[index] -= share
+            if self.left[index] <= 0:
+                self.state[index] = 'downloaded'
+                self.completed += 1
+
+
+def run(setting) -> dict:
+    channel = Channel()
+    downloads = DownloadScheduler(*setting) if setting else None
+    now = 0.0
+    peak = 0
+    while now < DURATION:
+        results = channel.detect()
+        started = now
+        targets = results['not_downloaded']
+        if downloads is not None and targets:
+            targets = downloads.admit(targets, len(results['downloading']), now)
+        for position in targets:
+            channel.click(position, now)
+            channel.advance(now, now + CLICK_DELAY)
+            now += CLICK_DELAY
+        if not results['not_downloaded']:
+            done = len(results['downloaded']) * 100 / max(1, len(channel.visible()))
+            if done >= SCROLL_THRESHOLD and channel.top + VIEW < FILES:
+                channel.top += SCROLL_ITEMS
+        peak = max(peak, channel.state.count('downloading'))
+        end = max(now, started + CYCLE)
+        channel.advance(now, end)
+        now = end
+    return {'per_minute': channel.completed * 60 / DURATION, 'peak': peak,
+            'stalled': channel.stalled_until > 0}
+
+
+def main():
+    print("=" * 72)
+    print("Download Pacing Benchmark")
+    print("=" * 72)
+    print(f"{FILES} files, {VIEW} visible, {BANDWIDTH:.0f} MB/s shared, flood wait after "
+          f"{FLOOD_CLICKS} clicks in {FLOOD_WINDOW:.0f}s, {DURATION:.0f}s simulated\n")
+    print(f"{'cap':>5} {'clicks/s':>9} {'done/min':>9} {'peak in flight':>15} {'flood wait':>11}")
+
+    results = {}
+    for setting in SETTINGS:
+        result = results[setting] = run(setting)
+        cap, rate = setting if setting else ('-', '-')
+        print(f"{cap:>5} {rate:>9} {result['per_minute']:>9.1f} {result['peak']:>15} "
+              f"{'yes' if result['stalled'] else 'no':>11}")
+
+    default = DownloadScheduler()
+    capped = results[(default.max_in_flight, default.bucket.rate)]
+    ok = capped['per_minute'] > results[None]['per_minute']
+    print("\nThe default cap and rate complete more files per minute than clicking everything" if ok
+          else "\nFAIL: capping did not improve completed files per minute")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Match Engine Benchmark
+Compares the OpenCV and FFT engines by template count and checks that
+their TM_CCOEFF_NORMED scores agree
+
+Run from the repository root:
+    python -m benchmarks.engines
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.engines import ENGINES
+from src.synthetic import load_gray_templates, make_frame
+
+REGION_SIZE = (2560, 1400)
+TEMPLATE_COUNTS = [1, 3, 6, 12]
+REPEATS = 3
+TOLERANCE = 1e-2
+
+
+def template_set(count: int) -> dict:
+    """The real templates plus flipped/rotated variants to grow the set."""
+    base = load_gray_templates()
+    variants = dict(base)
+    transforms = [
+        lambda t: cv2.flip(t, 1),
+        lambda t: cv2.flip(t, 0),
+        lambda t: cv2.rotate(t, cv2.ROTATE_90_CLOCKWISE),
+    ]
+    for index, transform in enumerate(transforms):
+        for name, template in base.items():
+            variants[f"{name}_v{index}"] = transform(template)
+    return dict(list(variants.items())[:count])
+
+
+def run_engine(engine_name: str, gray: np.ndarray, templates: dict):
+    engine = ENGINES[engine_name]()
+    buffers = {
+        name: np.empty((gray.shape[0] - t.shape[0] + 1, gray.shape[1] - t.shape[1] + 1), dtype=np.float32)
+        for name, t in templates.items()
+    }
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        engine.begin_frame(gray)
+        for name, template in templates.items():
+            engine.match(name, template, gray, buffers[name])
+        timings.append(time.perf_counter() - start)
+    # The first frame also builds the template spectra; report steady state
+    return min(timings[1:] or timings) * 1000, buffers
+
+
+def main():
+    width, height = REGION_SIZE
+    frame, _ = make_frame(width, height, icons=40)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    print("=" * 64)
+    print("Match Engine Benchmark")
+    print("=" * 64)
+    print(f"Frame: {width}x{height}, tolerance {TOLERANCE}\n")
+    print(f"{'templates':>10} {'opencv ms':>10} {'fft ms':>10} {'max |diff|':>12}")
+
+    ok = True
+    for count in TEMPLATE_COUNTS:
+        templates = template_set(count)
+        opencv_ms, reference = run_engine('opencv', gray, templates)
+        fft_ms, scores = run_engine('fft', gray, templates)
+        diff = max(float(np.abs(reference[name] - scores[name]).max()) for name in templates)
+        ok &= diff <= TOLERANCE
+        print(f"{len(templates):>10} {opencv_ms:>10.1f} {fft_ms:>10.1f} {diff:>12.5f}")
+
+    print("\nScores agree within tolerance" if ok else "\nFAIL: scores differ beyond tolerance")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content Ledger Benchmark
+1. Scrolls a long synthetic chat through the region with the tracker and
+   feeds every frame to a ContentLedger: unique buttons counted by the
+   ledger against the buttons that were actually on screen, and against
+   summing per-frame counts.
+2. Detection noise (each button missed on some frames): how much the
+   completion percentage that drives scrolling jumps between frames, per
+   frame vs from the ledger.
+3. A multi-hour sweep of synthetic detections: ledger memory and the cost
+   of one frame stay flat while every button is still counted once.
+4. Default (uncalibrated) thresholds, where every button matches all three
+   state templates: per-state counts against the icons actually drawn,
+   and a single button matching two templates.
+
+Run from the repository root:
+    python -m benchmarks.ledger
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.scroll import CHAT_HEIGHT, REGION_SIZE, SCROLL_STEPS, scroll_sequence
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.ledger import STATES, ContentLedger
+from src.synthetic import TEMPLATE_PATHS, make_frame
+from src.tracker import DetectionTracker
+
+REGION = {'left': 0, 'top': 0, 'width': REGION_SIZE[0], 'height': REGION_SIZE[1]}
+NOISE_BUTTONS = 10
+NOISE_MISS = 0.2
+NOISE_FRAMES = 300
+SWEEP_HOURS = 4
+SWEEP_BUTTONS_PER_MINUTE = 120
+SWEEP_FPS = 2
+OVERLAP_ICONS = 24
+
+
+def dedup() -> dict:
+    frames = scroll_sequence()
+    detector = ImageDetector(ArrayFrameSource(frames, loop=False), workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    tracker = DetectionTracker(detector)
+    ledger = ContentLedger()
+    summed = 0
+    for index in range(len(frames)):
+        results = tracker.detect(REGION)
+        ledger.observe(detector.last_detections, tracker.offset, REGION, now=float(index))
+        summed += sum(len(matches) for matches in results.values())
+    detector.close()
+
+    _, placements = make_frame(REGION_SIZE[0], CHAT_HEIGHT, icons=120, seed=11)
+    offsets = np.cumsum(SCROLL_STEPS)
+    visible = sum(1 for _, _, y in placements
+                  if any(offset <= y and y + 50 <= offset + REGION_SIZE[1] for offset in offsets))
+    return {'visible': visible, 'ledger': ledger.stats(tracker.offset, REGION)['seen'], 'summed': summed,
+            'offset': tracker.offset, 'scrolled': int(offsets[-1])}
+
+
+def noise() -> dict:
+    rng = np.random.default_rng(3)
+    ledger = ContentLedger()
+    raw, kept = [], []
+    for frame in range(NOISE_FRAMES):
+        results = {state: [] for state in STATES}
+        for button in range(NOISE_BUTTONS):
+            # Buttons finish one after another over the run
+            state = 'downloaded' if button < frame * NOISE_BUTTONS // NOISE_FRAMES else 'downloading'
+            if rng.random() >= NOISE_MISS:
+                results[state].append((100 + (button % 2) * 400, 60 + button * 80))
+        total = sum(len(matches) for matches in results.values())
+        raw.append(len(results['downloaded']) / total * 100 if total else 0)
+        ledger.observe(results, 0, REGION, now=frame * 0.1)
+        kept.append(ledger.stats(0, REGION)['downloaded_percentage'])
+    return {'raw': float(np.abs(np.diff(raw)).mean()), 'ledger': float(np.abs(np.diff(kept)).mean())}
+
+
+def sweep() -> dict:
+    ledger = ContentLedger()
+    frames = SWEEP_HOURS * 3600 * SWEEP_FPS
+    spacing = 80
+    # Content scrolls by the rows of the buttons that arrive each frame
+    speed = SWEEP_BUTTONS_PER_MINUTE * spacing / 60 / SWEEP_FPS
+    nbytes = [array.nbytes for array in (ledger.x, ledger.y, ledger.state, ledger.entered,
+                                         ledger.last_seen, ledger.clicked_at)]
+    timings = []
+    for frame in range(frames):
+        offset = int(frame * speed)
+        first = -(-offset // spacing)
+        rows = range(first, (offset + REGION_SIZE[1] - 50) // spacing + 1)
+        results = {'not_downloaded': [], 'downloading': [], 'downloaded': [(600, row * spacing - offset + 25)
+                                                                           for row in rows]}
+        start = time.perf_counter()
+        ledger.observe(results, offset, REGION, now=frame / SWEEP_FPS)
+        timings.append(time.perf_counter() - start)
+        if frame == frames // 10:
+            early = np.mean(timings[-1000:])
+    buttons = (int((frames - 1) * speed) + REGION_SIZE[1] - 50) // spacing + 1
+    return {'frames': frames, 'buttons': buttons, 'seen': ledger.stats(int((frames - 1) * speed), REGION)['seen'],
+            'entries': len(ledger), 'capacity': ledger.capacity, 'kb': sum(nbytes) / 1024,
+            'early_us': early * 1e6, 'late_us': float(np.mean(timings[-1000:])) * 1e6}
+
+
+def overlap() -> dict:
+    frame, placements = make_frame(REGION['width'], REGION['height'], icons=OVERLAP_ICONS, seed=4)
+    detector = ImageDetector(ArrayFrameSource([frame]), workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    results = detector.detect_images(REGION)
+    detections = detector.last_detections
+    detector.close()
+    ledger = ContentLedger()
+    ledger.observe(detections, 0, REGION, now=0.0)
+    stats = ledger.stats(0, REGION)
+
+    # One button: the downloaded template still matches a not downloaded icon, scoring lower
+    single = ContentLedger()
+    single.observe({'not_downloaded': [(100, 100, 0.99)], 'downloaded': [(101, 99, 0.86)]}, 0, REGION, now=0.0)
+    return {'truth': {state: sum(1 for name, _, _ in placements if name == state) for state in STATES},
+            'matched': {state: len(results.get(state, [])) for state in STATES},
+            'ledger': {state: stats[state] for state in STATES},
+            'single': single.stats(0, REGION)}
+
+
+def main():
+    print("=" * 72)
+    print("Content Ledger Benchmark")
+    print("=" * 72)
+    ok = True
+
+    result = dedup()
+    print(f"\n1. Scroll sweep ({len(SCROLL_STEPS)} frames, scrolled {result['scrolled']}px, "
+          f"tracker offset {result['offset']}px)")
+    print(f"   buttons on screen {result['visible']}, unique in ledger {result['ledger']}, "
+          f"summed per-frame counts {result['summed']}")
+    ok &= result['ledger'] == result['visible'] and result['offset'] == result['scrolled']
+
+    result = noise()
+    print(f"\n2. Completion % change per frame with {NOISE_MISS:.0%} of detections missed")
+    print(f"   per frame {result['raw']:.2f} points, ledger {result['ledger']:.2f} points")
+    ok &= result['ledger'] < result['raw'] / 2
+
+    result = sweep()
+    print(f"\n3. {SWEEP_HOURS}h sweep at {SWEEP_FPS} fps ({result['frames']} frames, {result['buttons']} buttons)")
+    print(f"   seen {result['seen']}, entries held {result['entries']}/{result['capacity']} "
+          f"({result['kb']:.0f} KB), observe {result['early_us']:.0f} us early, {result['late_us']:.0f} us late")
+    ok &= result['seen'] == result['buttons'] and result['entries'] <= result['capacity']
+    ok &= result['late_us'] < result['early_us'] * 2
+
+    result = overlap()
+    print(f"\n4. Default thresholds, {OVERLAP_ICONS} icons")
+    for state in STATES:
+        print(f"   {state:>15}: drawn {result['truth'][state]}, matched {result['matched'][state]}, "
+              f"ledger {result['ledger'][state]}")
+    single = result['single']
+    print(f"   one button matching two templates: total {single['total']}, "
+          f"not downloaded {single['not_downloaded']}, downloaded {single['downloaded']}")
+    ok &= result['ledger'] == result['truth']
+    ok &= single['total'] == 1 and single['not_downloaded'] == 1
+
+    print("\nThe ledger counts every button once in its best state, steadies completion and stays bounded" if ok
+          else "\nFAIL: the ledger miscounted, did not steady completion or grew")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
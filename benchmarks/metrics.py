@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics Overhead Benchmark
+Cost of one stage timer and counter with metrics disabled and enabled, and
+of full detection with the instrumentation on versus off; ends with the
+stage table metrics collected over the run
+
+Run from the repository root:
+    python -m benchmarks.metrics
+"""
+
+import sys
+import time
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.metrics import Metrics, format_snapshot, metrics
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+CALLS = 200000
+REGION_SIZE = (1920, 1080)
+FRAMES = 30
+# Disabled instrumentation may cost at most this share of a detection
+MAX_DISABLED_OVERHEAD = 0.01
+
+
+def per_call_ns(instance: Metrics) -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        with instance.stage('stage'):
+            pass
+        instance.count('counter')
+    return (time.perf_counter() - start) * 1e9 / CALLS
+
+
+def empty_loop_ns() -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        pass
+    return (time.perf_counter() - start) * 1e9 / CALLS
+
+
+def detect_ms(enabled: bool) -> float:
+    metrics.enable(enabled)
+    frame, _ = make_frame(*REGION_SIZE, icons=20)
+    detector = ImageDetector(ArrayFrameSource([frame]), incremental=False, workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    region = {'left': 0, 'top': 0, 'width': REGION_SIZE[0], 'height': REGION_SIZE[1]}
+    detector.detect_images(region)
+    timings = []
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+    detector.close()
+    return min(timings) * 1000
+
+
+def main():
+    print("=" * 64)
+    print("Metrics Overhead Benchmark")
+    print("=" * 64)
+
+    baseline = empty_loop_ns()
+    disabled_ns = per_call_ns(Metrics(enabled=False)) - baseline
+    enabled_ns = per_call_ns(Metrics(enabled=True)) - baseline
+    print(f"Stage timer + counter: {disabled_ns:.0f} ns disabled, {enabled_ns:.0f} ns enabled")
+
+    off_ms = detect_ms(False)
+    metrics.reset()
+    on_ms = detect_ms(True)
+    stages_per_frame = sum(stage['count'] for stage in metrics.snapshot()['stages'].values()) / (FRAMES + 1)
+    disabled_share = stages_per_frame * disabled_ns / 1e6 / off_ms
+    print(f"Detection at {REGION_SIZE[0]}x{REGION_SIZE[1]}: {off_ms:.2f} ms off, {on_ms:.2f} ms on, "
+          f"{stages_per_frame:.0f} timed stages per frame")
+    print(f"Disabled instrumentation: {disabled_share:.4%} of a detection\n")
+    print(format_snapshot(metrics.snapshot()))
+
+    ok = disabled_share <= MAX_DISABLED_OVERHEAD
+    print("\nDisabled instrumentation is negligible" if ok
+          else "\nFAIL: disabled instrumentation costs too much")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
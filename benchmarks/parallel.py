@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel Matching Benchmark
+Wall-clock detect_images latency per frame against match worker count
+
+Run from the repository root:
+    python -m benchmarks.parallel
+"""
+
+import os
+import time
+
+import numpy as np
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+REGION_SIZE = (2560, 1400)
+WORKER_COUNTS = [1, 2, 4, 8]
+FRAMES = 5
+
+
+def time_detection(workers: int, frame: np.ndarray, lock_scale: bool) -> float:
+    detector = ImageDetector(ArrayFrameSource([frame]), incremental=False, workers=workers)
+    region = {'left': 0, 'top': 0, 'width': frame.shape[1], 'height': frame.shape[0]}
+    timings = []
+    detector.load_templates(TEMPLATE_PATHS)
+    if lock_scale:
+        detector.bank.lock(1.0)
+    else:
+        # Keep sweeping all scales instead of locking after a few frames
+        detector.bank.probe_frames = float('inf')
+    detector.detect_images(region)
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+    detector.close()
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    width, height = REGION_SIZE
+    frame, _ = make_frame(width, height, icons=30)
+
+    print("=" * 64)
+    print("Parallel Matching Benchmark")
+    print("=" * 64)
+    print(f"Frame: {width}x{height}, CPU cores: {os.cpu_count()}\n")
+    print(f"{'workers':>8} {'locked (3 jobs) ms':>20} {'probing (12 jobs) ms':>22}")
+    for workers in WORKER_COUNTS:
+        locked = time_detection(workers, frame, lock_scale=True)
+        probing = time_detection(workers, frame, lock_scale=False)
+        print(f"{workers:>8} {locked:>20.1f} {probing:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
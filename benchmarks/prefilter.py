@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Color Prefilter Benchmark
+Times full-frame matching against color-candidate matching per region size
+and measures the prefilter's recall against the full-frame detections
+
+Run from the repository root:
+    python -m benchmarks.prefilter [frames_dir]
+
+With a directory of recorded frames, recall is also measured on every
+frame in it.
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.capture import ArrayFrameSource, FileFrameSource
+from src.detector import ImageDetector
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+REGION_SIZES = [(800, 600), (1280, 1400), (2560, 1400), (3840, 2160)]
+REPEATS = 3
+# Positions closer than this (pixels) count as the same detection
+TOLERANCE = 2
+MAX_PEAKS = 500
+
+
+def add_distractors(frame: np.ndarray, placements, seed: int = 0):
+    """Button-blue shapes of the wrong size next to the icons, like avatars and link dots."""
+    rng = np.random.default_rng(seed)
+    height, width = frame.shape[:2]
+    added = 0
+    while added < max(2, width * height // 400000):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        radius = int(rng.choice([8, 70]))
+        # Touching an icon is fine, covering it is not
+        if any(ix - radius - 1 < x < ix + 50 + radius + 1 and iy - radius - 1 < y < iy + 50 + radius + 1
+               for _, ix, iy in placements):
+            continue
+        cv2.circle(frame, (x, y), radius, (233, 180, 110), -1)
+        added += 1
+    return frame
+
+
+def detect(frames, mode: str):
+    detector = ImageDetector(ArrayFrameSource(frames, loop=False), incremental=False, mode=mode, workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    # High enough that ties at the cut-off never decide recall
+    detector.max_peaks = MAX_PEAKS
+    region = {'left': 0, 'top': 0, 'width': frames[0].shape[1], 'height': frames[0].shape[0]}
+    outputs = []
+    timings = []
+    for _ in frames:
+        start = time.perf_counter()
+        outputs.append(detector.detect_images(region))
+        timings.append(time.perf_counter() - start)
+    detector.close()
+    return float(np.min(timings)) * 1000, outputs
+
+
+def recall(reference: dict, found: dict):
+    """(matched, expected, extra) over all templates."""
+    matched = expected = extra = 0
+    for name, points in reference.items():
+        remaining = list(found.get(name, []))
+        for x, y in points:
+            expected += 1
+            for i, (fx, fy) in enumerate(remaining):
+                if abs(fx - x) <= TOLERANCE and abs(fy - y) <= TOLERANCE:
+                    matched += 1
+                    remaining.pop(i)
+                    break
+        extra += len(remaining)
+    return matched, expected, extra
+
+
+def main():
+    print("=" * 64)
+    print("Color Prefilter Benchmark")
+    print("=" * 64)
+    print(f"{'region':>12} {'full ms':>10} {'prefilter ms':>13} {'speedup':>8} {'recall':>8} {'extra':>6}")
+
+    ok = True
+    for width, height in REGION_SIZES:
+        frame, placements = make_frame(width, height, icons=max(6, width * height // 100000))
+        frames = [add_distractors(frame, placements)] * REPEATS
+        full_ms, full = detect(frames, 'full')
+        prefilter_ms, prefiltered = detect(frames, 'prefilter')
+        matched, expected, extra = recall(full[0], prefiltered[0])
+        ok &= matched == expected and extra == 0
+        print(f"{width:>6}x{height:<5} {full_ms:>10.1f} {prefilter_ms:>13.1f} {full_ms / prefilter_ms:>7.1f}x "
+              f"{matched / max(1, expected):>8.1%} {extra:>6}")
+
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        source = FileFrameSource(sys.argv[1], loop=False, cache=False)
+        frames = [cv2.imread(path) for path in source.paths]
+        totals = np.zeros(3, dtype=int)
+        for frame in frames:
+            _, full = detect([frame], 'full')
+            _, prefiltered = detect([frame], 'prefilter')
+            totals += recall(full[0], prefiltered[0])
+        matched, expected, extra = totals
+        print(f"\nRecorded frames: {len(frames)}, recall {matched}/{expected} "
+              f"({matched / max(1, expected):.1%}), {extra} extra")
+        ok &= matched == expected and extra == 0
+
+    print("\nPrefilter found every full-frame detection" if ok else "\nFAIL: prefilter missed detections")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
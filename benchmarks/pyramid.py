@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pyramid Matching Benchmark
+Times full-resolution against coarse-to-fine matching per region size and
+checks that both find the same icons
+
+Run from the repository root:
+    python -m benchmarks.pyramid [frames_dir]
+
+With a directory of recorded frames, agreement is also checked on every
+frame in it.
+"""
+
+import os
+import sys
+import time
+
+import cv2
+
+from src.capture import FileFrameSource
+from src.peaks import find_peaks
+from src.pyramid import PyramidMatcher, pyramid_depth
+from src.synthetic import load_gray_templates, make_frame
+
+REGION_SIZES = [(800, 600), (1280, 1400), (2560, 1400), (3840, 2160)]
+THRESHOLD = 0.5
+# High enough that ties at the cut-off never decide agreement
+MAX_PEAKS = 500
+REPEATS = 3
+
+
+def match_full(gray, templates):
+    return {
+        name: find_peaks(cv2.matchTemplate(gray, t, cv2.TM_CCOEFF_NORMED), THRESHOLD, t.shape,
+                         max_peaks=MAX_PEAKS)
+        for name, t in templates.items()
+    }
+
+
+def match_pyramid(matcher, gray, templates):
+    matcher.begin_frame(gray)
+    return {name: matcher.match(name, t, gray, THRESHOLD, MAX_PEAKS) for name, t in templates.items()}
+
+
+def same_detections(full, pyramid, tolerance=1):
+    for name, peaks in full.items():
+        expected = sorted((x, y) for x, y, _ in peaks)
+        found = sorted((x, y) for x, y, _ in pyramid[name])
+        if len(expected) != len(found):
+            return False
+        for (ex, ey), (fx, fy) in zip(expected, found):
+            if abs(ex - fx) > tolerance or abs(ey - fy) > tolerance:
+                return False
+    return True
+
+
+def best_time(func):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main():
+    templates = load_gray_templates()
+    matcher = PyramidMatcher()
+    depth = max(pyramid_depth(t.shape) for t in templates.values())
+
+    print("=" * 64)
+    print("Pyramid Matching Benchmark")
+    print("=" * 64)
+    print(f"Pyramid depth for {next(iter(templates.values())).shape} templates: {depth}\n")
+    print(f"{'region':>12} {'full ms':>10} {'pyramid ms':>11} {'speedup':>8} {'same':>6}")
+
+    ok = True
+    for width, height in REGION_SIZES:
+        frame, _ = make_frame(width, height, icons=max(6, width * height // 100000))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        full_ms, full = best_time(lambda: match_full(gray, templates))
+        pyramid_ms, pyramid = best_time(lambda: match_pyramid(matcher, gray, templates))
+        same = same_detections(full, pyramid)
+        ok &= same
+        print(f"{width:>6}x{height:<5} {full_ms:>10.1f} {pyramid_ms:>11.1f} "
+              f"{full_ms / pyramid_ms:>7.1f}x {'yes' if same else 'NO':>6}")
+
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        source = FileFrameSource(sys.argv[1], loop=False, cache=False)
+        mismatches = 0
+        for path in source.paths:
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if not same_detections(match_full(gray, templates), match_pyramid(matcher, gray, templates)):
+                mismatches += 1
+                print(f"  Mismatch: {path}")
+        print(f"\nRecorded frames: {len(source.paths) - mismatches}/{len(source.paths)} identical")
+        ok &= mismatches == 0
+
+    print("\nPyramid results match full resolution" if ok else "\nFAIL: pyramid results differ")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
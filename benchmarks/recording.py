@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recording Benchmark
+Records synthetic sessions (an idle chat where buttons change state, and a
+scrolling chat) to a session file and replays them: size against raw gray
+frames, time per recorded and replayed frame, seek time, and the memory a
+replay holds. Replayed frames must equal the recorded ones exactly
+
+Run from the repository root:
+    python -m benchmarks.recording
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.scroll import scroll_sequence
+from src.recording import SessionReader, SessionRecorder
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+REGION_SIZE = (1200, 900)
+IDLE_FRAMES = 240
+
+
+def idle_sequence():
+    """A still chat where one button at a time changes state."""
+    width, height = REGION_SIZE
+    frame, placements = make_frame(width, height, icons=12, seed=3)
+    icons = [cv2.imread(path) for path in TEMPLATE_PATHS.values()]
+    frames = []
+    for index in range(IDLE_FRAMES):
+        _, x, y = placements[index % len(placements)]
+        icon = icons[index % len(icons)]
+        frame[y:y + icon.shape[0], x:x + icon.shape[1]] = icon
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    return frames
+
+
+def run(label: str, grays, directory: str) -> bool:
+    path = os.path.join(directory, f'{label}.tgrec')
+    region = {'left': 0, 'top': 0, 'width': REGION_SIZE[0], 'height': REGION_SIZE[1]}
+    recorder = SessionRecorder(path, region)
+    start = time.perf_counter()
+    for index, gray in enumerate(grays):
+        recorder.record_frame(gray, timestamp=index * 0.5)
+    record_ms = (time.perf_counter() - start) * 1000 / len(grays)
+    recorder.close()
+
+    raw = sum(gray.nbytes for gray in grays)
+    size = os.path.getsize(path)
+
+    tracemalloc.start()
+    reader = SessionReader(path)
+    start = time.perf_counter()
+    exact = all(np.array_equal(reader.frame(index), gray) for index, gray in enumerate(grays))
+    replay_ms = (time.perf_counter() - start) * 1000 / len(grays)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    targets = np.random.default_rng(0).integers(0, len(grays), 20)
+    start = time.perf_counter()
+    exact &= all(np.array_equal(reader.frame(int(index)), grays[index]) for index in targets)
+    seek_ms = (time.perf_counter() - start) * 1000 / len(targets)
+    reader.close()
+
+    print(f"{label:>8} {len(grays):>7} {raw / 1e6:>8.1f} {size / 1e6:>8.2f} {raw / size:>7.1f}x "
+          f"{record_ms:>10.2f} {replay_ms:>10.2f} {seek_ms:>8.2f} {peak / 1e6:>8.1f}"
+          f"{'' if exact else '  (replay differs!)'}")
+    return exact
+
+
+def main():
+    print("=" * 88)
+    print("Recording Benchmark")
+    print("=" * 88)
+    print(f"Region: {REGION_SIZE[0]}x{REGION_SIZE[1]} gray\n")
+    print(f"{'session':>8} {'frames':>7} {'raw MB':>8} {'file MB':>8} {'ratio':>8} "
+          f"{'record ms':>10} {'replay ms':>10} {'seek ms':>8} {'peak MB':>8}")
+
+    scrolling = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in scroll_sequence()]
+    with tempfile.TemporaryDirectory() as directory:
+        ok = run('idle', idle_sequence(), directory)
+        ok &= run('scroll', scrolling, directory)
+
+    print("\nReplayed frames match the recording" if ok else "\nFAIL: replayed frames differ from the recording")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
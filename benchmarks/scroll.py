@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scroll Benchmark
+Scrolls a long synthetic chat through the region and compares full
+detection on every frame with the tracker, which shifts its tracks by the
+estimated scroll offset and only scans the newly revealed strip
+
+Run from the repository root:
+    python -m benchmarks.scroll
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.scroll import estimate_scroll
+from src.synthetic import TEMPLATE_PATHS, make_frame
+from src.tracker import DetectionTracker
+
+REGION_SIZE = (1200, 900)
+CHAT_HEIGHT = 6000
+# Pixels scrolled per step, roughly what a few wheel clicks move in Telegram
+SCROLL_STEPS = [0, 120, 120, 0, 240, 60, 120, 0, 300, 120, 120, 180, 0, 120, 240, 120]
+
+
+def scroll_sequence():
+    width, height = REGION_SIZE
+    chat, _ = make_frame(width, CHAT_HEIGHT, icons=120, seed=11)
+    offsets = np.cumsum(SCROLL_STEPS)
+    return [chat[offset:offset + height].copy() for offset in offsets]
+
+
+def run(frames, tracked: bool):
+    detector = ImageDetector(ArrayFrameSource(frames, loop=False), workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    tracker = DetectionTracker(detector, full_scan_interval=len(frames))
+    region = {'left': 0, 'top': 0, 'width': REGION_SIZE[0], 'height': REGION_SIZE[1]}
+    timings = []
+    outputs = []
+    for _ in frames:
+        start = time.perf_counter()
+        results = tracker.detect(region) if tracked else detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+        outputs.append(results)
+    detector.close()
+    return np.array(timings) * 1000, outputs, tracker
+
+
+def main():
+    frames = scroll_sequence()
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+
+    print("=" * 64)
+    print("Scroll Benchmark")
+    print("=" * 64)
+    print(f"Region: {REGION_SIZE[0]}x{REGION_SIZE[1]}, {len(frames)} frames\n")
+
+    estimates = [estimate_scroll(a, b) for a, b in zip(grays, grays[1:])]
+    wrong = [(expected, got) for expected, got in zip(SCROLL_STEPS[1:], estimates) if expected != got]
+    start = time.perf_counter()
+    estimate_scroll(grays[0], grays[1])
+    print(f"Scroll estimation: {(time.perf_counter() - start) * 1000:.1f} ms per frame pair, "
+          f"{len(estimates) - len(wrong)}/{len(estimates)} offsets exact")
+
+    full_ms, reference, _ = run(frames, tracked=False)
+    tracked_ms, outputs, tracker = run(frames, tracked=True)
+    scrolled = np.array(SCROLL_STEPS) > 0
+
+    print(f"\n{'':>10} {'scroll frames ms':>18} {'all frames ms':>15}")
+    for label, timings in (('full', full_ms), ('tracked', tracked_ms)):
+        print(f"{label:>10} {timings[scrolled].mean():>18.2f} {timings.mean():>15.2f}")
+    print(f"\nFull scans: {tracker.full_scans}, followed scrolls: {tracker.scroll_frames}, "
+          f"accumulated offset {tracker.offset}px (scrolled {sum(SCROLL_STEPS)}px)")
+    print(f"Speedup on scroll frames: {full_ms[scrolled].mean() / tracked_ms[scrolled].mean():.2f}x")
+
+    mismatches = sum(1 for a, b in zip(reference, outputs) if a != b)
+    if wrong or mismatches or tracker.offset != sum(SCROLL_STEPS):
+        print(f"\nFAIL: {len(wrong)} wrong offset(s), {mismatches} frame(s) differ from full detection, "
+              f"tracker offset {tracker.offset}")
+        sys.exit(1)
+    print("\nTracked output is identical to full detection on every frame")
+
+
+if __name__ == "__main__":
+    main()
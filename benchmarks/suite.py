@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hot Path Benchmark Suite
+Times the detector and automation hot paths on synthetic frames at several
+region sizes and icon densities and writes the results as JSON, so runs of
+different versions can be compared
+
+Run from the repository root (works headless; input is mocked):
+    python -m benchmarks.suite [--output results.json] [--repeats N] [--quick]
+    python -m benchmarks.suite --compare baseline.json [--tolerance 1.25]
+
+With --compare, cases whose median got slower than the baseline by more
+than the tolerance factor are listed and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import types
+
+import cv2
+import numpy as np
+
+from create_test_images import REGION_SIZES, synthetic_frames
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.synthetic import REPO_ROOT, TEMPLATE_PATHS
+
+
+def install_input_stubs():
+    """Stand-ins for the GUI/input packages so the loop runs headless and never clicks."""
+    pyautogui = types.ModuleType('pyautogui')
+    pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = 0.0
+    pyautogui.clicks = 0
+    pyautogui.scrolls = 0
+
+    def click(x=None, y=None, **kwargs):
+        pyautogui.clicks += 1
+
+    def scroll(amount, **kwargs):
+        pyautogui.scrolls += 1
+
+    pyautogui.click = click
+    pyautogui.scroll = scroll
+
+    keyboard = types.ModuleType('pynput.keyboard')
+    keyboard.Key = types.SimpleNamespace(esc='esc')
+
+    class Listener:
+        def __init__(self, on_press=None, **kwargs):
+            self.on_press = on_press
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+    keyboard.Listener = Listener
+    pynput = types.ModuleType('pynput')
+    pynput.keyboard = keyboard
+
+    sys.modules['pyautogui'] = pyautogui
+    sys.modules['pynput'] = pynput
+    sys.modules['pynput.keyboard'] = keyboard
+    # Only imported by the UI modules, never used while the loop runs
+    sys.modules.setdefault('customtkinter', types.ModuleType('customtkinter'))
+    return pyautogui
+
+
+def timings(func, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        'repeats': repeats,
+        'min_ms': round(float(samples.min()), 4),
+        'median_ms': round(float(np.median(samples)), 4),
+        'mean_ms': round(float(samples.mean()), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+        'max_ms': round(float(samples.max()), 4),
+    }
+
+
+def make_detector(frame: np.ndarray, incremental: bool = False) -> ImageDetector:
+    detector = ImageDetector(ArrayFrameSource([frame]), incremental=incremental)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    return detector
+
+
+def bench_frame(frame: np.ndarray, repeats: int) -> dict:
+    """All hot-path cases for one synthetic frame."""
+    # mss hands out BGRA frames
+    bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+    height, width = frame.shape[:2]
+    region = {'left': 0, 'top': 0, 'width': width, 'height': height}
+    cases = {}
+
+    detector = make_detector(bgra)
+    cases['capture_region'] = timings(lambda: detector.capture_region(region), repeats)
+    cases['detect_images'] = timings(lambda: detector.detect_images(region), repeats)
+    results = detector.detect_images(region)
+    points = [point for matches in results.values() for point in matches]
+    cases['remove_duplicates'] = timings(lambda: detector._remove_duplicates(points), repeats * 20)
+    cases['get_detection_stats'] = timings(lambda: detector.get_detection_stats(results), repeats * 20)
+    detector.close()
+
+    detector = make_detector(bgra, incremental=True)
+    detector.detect_images(region)
+    cases['detect_images_unchanged'] = timings(lambda: detector.detect_images(region), repeats)
+    detector.close()
+
+    cases.update(bench_loop(bgra, region, repeats))
+    for name, stats in cases.items():
+        stats['detections'] = sum(len(matches) for matches in results.values())
+    return cases
+
+
+def bench_loop(frame: np.ndarray, region: dict, repeats: int) -> dict:
+    """One automation cycle (detect, stats, act) with mocked mouse and keyboard."""
+    import main
+    app = main.TelegramAutoDownloader()
+    app.detector.frame_source = ArrayFrameSource([frame])
+    app.detector.bank.lock(1.0)
+    app.selected_region = region
+    app.settings['click_delay'] = 0
+
+    def cold():
+        # Forget the tracks and the detector's unchanged-frame cache
+        app.tracker.reset()
+        app.detector.tiles.reset()
+        app.detector._cached_results = None
+        app._automation_cycle()
+
+    cases = {'loop_iteration_cold': timings(cold, repeats)}
+    app._automation_cycle()
+    cases['loop_iteration'] = timings(app._automation_cycle, repeats)
+    app.detector.close()
+    return cases
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    def key(entry):
+        return entry['case'], entry['width'], entry['height'], entry['density']
+
+    old = {key(entry): entry for entry in baseline['results']}
+    ok = True
+    print(f"\nComparison with {baseline['meta'].get('commit') or 'baseline'} (tolerance {tolerance:.2f}x):",
+          file=sys.stderr)
+    for entry in current['results']:
+        before = old.get(key(entry))
+        if before is None or before['median_ms'] <= 0:
+            continue
+        ratio = entry['median_ms'] / before['median_ms']
+        flag = 'REGRESSION' if ratio > tolerance else ''
+        ok &= ratio <= tolerance
+        print(f"  {entry['case']:<24} {entry['width']}x{entry['height']} {entry['density']:<7} "
+              f"{before['median_ms']:>9.3f} -> {entry['median_ms']:>9.3f} ms  {ratio:>5.2f}x {flag}",
+              file=sys.stderr)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detector and automation hot paths")
+    parser.add_argument('--output', help="Write JSON results here instead of stdout")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per case")
+    parser.add_argument('--quick', action='store_true', help="Smallest region size only")
+    parser.add_argument('--compare', metavar='BASELINE', help="Earlier JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Allowed slowdown factor with --compare")
+    args = parser.parse_args()
+
+    install_input_stubs()
+    # Keep the loop's INFO logging and debug images out of the measurements
+    os.environ.setdefault('TELEGRAM_DOWNLOADER_LOG', 'WARNING')
+
+    sizes = REGION_SIZES[:1] if args.quick else REGION_SIZES
+    report = {'meta': metadata(), 'results': []}
+    print(f"{'case':<24} {'region':>10} {'density':>8} {'median ms':>10} {'p95 ms':>9}", file=sys.stderr)
+    for width, height, density, frame, placements in synthetic_frames(sizes):
+        for case, stats in bench_frame(frame, args.repeats).items():
+            report['results'].append({'case': case, 'width': width, 'height': height, 'density': density,
+                                      'icons': len(placements), **stats})
+            print(f"{case:<24} {width:>5}x{height:<4} {density:>8} {stats['median_ms']:>10.3f} "
+                  f"{stats['p95_ms']:>9.3f}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(report, baseline, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
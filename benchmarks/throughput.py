@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Rate Benchmark
+Runs the simulated channel sweep from benchmarks.downloads with the
+default DownloadScheduler, feeding a ContentLedger and SessionRates the way
+the loop does, and checks the control panel's numbers against the
+simulation's ground truth: clicks and completions per minute over the
+rolling window, average time spent downloading, and how the ETA for the
+visible backlog compares with when that backlog actually finished.
+Downloads that finish after their button scrolled out of view cannot be
+seen by the loop; they are left out of the truth and counted separately
+
+Run from the repository root:
+    python -m benchmarks.throughput
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.downloads import CLICK_DELAY, CYCLE, DURATION, FILES, SCROLL_ITEMS, SCROLL_THRESHOLD, VIEW, Channel
+from src.downloads import DownloadScheduler
+from src.ledger import ContentLedger
+from src.throughput import SessionRates
+
+REGION = {'left': 0, 'top': 0, 'width': 800, 'height': 900}
+ROW = 80
+CHECK_EVERY = 60.0
+
+
+class TimedChannel(Channel):
+    """Remembers when each file was clicked, when it finished and whether it was in view then."""
+
+    def __init__(self):
+        super().__init__()
+        self.clicked_at = [None] * FILES
+        self.done_at = [None] * FILES
+        self.done_in_view = [False] * FILES
+
+    def click(self, position, now: float):
+        index = self.top + (position[1] - 100) // ROW
+        if self.clicked_at[index] is None:
+            self.clicked_at[index] = now
+        super().click(position, now)
+
+    def advance(self, start: float, end: float):
+        super().advance(start, end)
+        for index, state in enumerate(self.state):
+            if state == 'downloaded' and self.done_at[index] is None:
+                self.done_at[index] = end
+                self.done_in_view[index] = index in self.visible()
+
+
+def run() -> dict:
+    channel = TimedChannel()
+    downloads = DownloadScheduler()
+    ledger = ContentLedger()
+    rates = SessionRates()
+    checks = []
+    costs = []
+    now = 0.0
+    next_check = rates.window
+    while now < DURATION:
+        results = channel.detect()
+        started = now
+        offset = channel.top * ROW
+        finished = ledger.observe(results, offset, REGION, now)
+        rates.completed(finished, now)
+        stats = ledger.stats(offset, REGION)
+        targets = ledger.clickable(results['not_downloaded'], offset, REGION, now)
+        if targets:
+            targets = downloads.admit(targets, stats['downloading'], now)
+        for position in targets:
+            channel.click(position, now)
+            channel.advance(now, now + CLICK_DELAY)
+            now += CLICK_DELAY
+        ledger.mark_clicked(targets, offset, REGION, started)
+        rates.clicked(len(targets), started)
+        if not results['not_downloaded'] and stats['downloaded_percentage'] >= SCROLL_THRESHOLD \
+                and channel.top + VIEW < FILES:
+            channel.top += SCROLL_ITEMS
+        if started >= next_check:
+            next_check += CHECK_EVERY
+            start = time.perf_counter()
+            snapshot = rates.snapshot(stats['not_downloaded'] + stats['downloading'], started)
+            costs.append(time.perf_counter() - start)
+            backlog = [i for i in channel.visible() if channel.state[i] != 'downloaded']
+            checks.append((started, snapshot, backlog))
+        end = max(now, started + CYCLE)
+        channel.advance(now, end)
+        now = end
+
+    window = rates.window
+    rows = []
+    for at, snapshot, backlog in checks:
+        clicks = sum(1 for t in channel.clicked_at if t is not None and at - window <= t <= at)
+        done = [i for i, t in enumerate(channel.done_at) if t is not None and at - window <= t <= at]
+        unseen = sum(1 for i in done if not channel.done_in_view[i])
+        done = [i for i in done if channel.done_in_view[i]]
+        times = [channel.done_at[i] - channel.clicked_at[i] for i in done if channel.clicked_at[i] is not None]
+        finish = [channel.done_at[i] for i in backlog]
+        actual_eta = max(finish) - at if backlog and None not in finish else None
+        rows.append({
+            'at': at,
+            'clicks': (snapshot['clicks_per_minute'], clicks / (window / 60)),
+            'completed': (snapshot['completed_per_minute'], len(done) / (window / 60)),
+            'download': (snapshot['avg_download_seconds'], float(np.mean(times)) if times else None),
+            'eta': (snapshot['eta_seconds'], actual_eta),
+            'unseen': unseen,
+        })
+    return {'rows': rows, 'cost_us': float(np.mean(costs)) * 1e6}
+
+
+def main():
+    print("=" * 72)
+    print("Session Rate Benchmark")
+    print("=" * 72)
+    result = run()
+    print(f"Default cap/rate, {DURATION:.0f}s simulated, "
+          f"{SessionRates().window:.0f}s window; panel value / ground truth\n")
+    print(f"{'at s':>6} {'clicked/min':>14} {'completed/min':>15} {'avg download s':>16} {'ETA s':>14} "
+          f"{'out of view':>12}")
+
+    errors = {'clicks': [], 'completed': [], 'download': [], 'eta': []}
+    for row in result['rows']:
+        cells = []
+        for key in ('clicks', 'completed', 'download', 'eta'):
+            shown, truth = row[key]
+            if shown is None or truth is None:
+                cells.append('-')
+                continue
+            cells.append(f"{shown:.1f}/{truth:.1f}")
+            if truth:
+                errors[key].append(abs(shown - truth) / truth)
+        print(f"{row['at']:>6.0f} {cells[0]:>14} {cells[1]:>15} {cells[2]:>16} {cells[3]:>14} "
+              f"{row['unseen']:>12}")
+
+    mean = {key: float(np.mean(values)) if values else float('nan') for key, values in errors.items()}
+    print(f"\nMean relative error: clicked {mean['clicks']:.1%}, completed {mean['completed']:.1%}, "
+          f"avg download {mean['download']:.1%}, ETA {mean['eta']:.1%}")
+    print(f"Snapshot cost: {result['cost_us']:.1f} us")
+
+    # Rates are exact up to frame timing; downloads are timed from the first frame
+    # showing the spinner; the ETA assumes the current rate and is only a guide
+    ok = mean['clicks'] < 0.02 and mean['completed'] < 0.05 and mean['download'] < 0.1 and mean['eta'] < 0.5
+    print("\nSession rates match the simulation" if ok else "\nFAIL: session rates are off")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
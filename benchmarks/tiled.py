@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiled Matching Benchmark
+Compares single-pass and strip-parallel matching on an ultrawide region and
+checks that both give identical detections
+
+Run from the repository root:
+    python -m benchmarks.tiled
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.synthetic import TEMPLATE_PATHS, make_frame
+
+REGION_SIZE = (5120, 1440)
+WORKER_COUNTS = [1, 2, 4, 8]
+FRAMES = 3
+
+
+def run(mode: str, workers: int, frame: np.ndarray):
+    detector = ImageDetector(ArrayFrameSource([frame]), incremental=False, mode=mode, workers=workers)
+    region = {'left': 0, 'top': 0, 'width': frame.shape[1], 'height': frame.shape[0]}
+    timings = []
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        results = detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+    detector.close()
+    return float(np.median(timings)) * 1000, results
+
+
+def main():
+    width, height = REGION_SIZE
+    frame, _ = make_frame(width, height, icons=45)
+
+    print("=" * 64)
+    print("Tiled Matching Benchmark")
+    print("=" * 64)
+    print(f"Frame: {width}x{height}, CPU cores: {os.cpu_count()}\n")
+
+    single_ms, reference = run('full', 1, frame)
+    print(f"single pass: {single_ms:.1f} ms\n")
+    print(f"{'workers':>8} {'tiled ms':>10} {'speedup':>8} {'identical':>10}")
+
+    ok = True
+    for workers in WORKER_COUNTS:
+        tiled_ms, results = run('tiled', workers, frame)
+        identical = results == reference
+        ok &= identical
+        print(f"{workers:>8} {tiled_ms:>10.1f} {single_ms / tiled_ms:>7.2f}x {'yes' if identical else 'NO':>10}")
+
+    print("\nTiled output is identical to the single pass" if ok else "\nFAIL: tiled output differs")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
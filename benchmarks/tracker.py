@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracker Benchmark
+Replays a sequence where buttons change state one by one (clicked, then
+finished) and compares per-frame full detection with the temporal tracker
+
+Run from the repository root:
+    python -m benchmarks.tracker
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.capture import ArrayFrameSource
+from src.detector import ImageDetector
+from src.synthetic import TEMPLATE_PATHS, make_frame
+from src.tracker import DetectionTracker
+
+REGION_SIZE = (1920, 1080)
+ICONS = 24
+FRAMES = 60
+
+
+def state_sequence(width: int, height: int, frames: int):
+    """Frames where one not-downloaded button advances a state every few frames."""
+    frame, placements = make_frame(width, height, icons=ICONS, seed=4)
+    icons = {name: cv2.imread(path) for name, path in TEMPLATE_PATHS.items()}
+    pending = [(x, y) for name, x, y in placements if name == 'not_downloaded']
+    sequence = []
+    for index in range(frames):
+        if index % 4 == 3 and pending:
+            x, y = pending[0]
+            h, w = icons['downloading'].shape[:2]
+            if index % 8 == 3:
+                frame[y:y + h, x:x + w] = icons['downloading']
+            else:
+                frame[y:y + h, x:x + w] = icons['downloaded']
+                pending.pop(0)
+        sequence.append(frame.copy())
+    return sequence
+
+
+def run(frames, tracked: bool):
+    detector = ImageDetector(ArrayFrameSource(frames, loop=False), workers=1)
+    detector.load_templates(TEMPLATE_PATHS)
+    detector.bank.lock(1.0)
+    tracker = DetectionTracker(detector)
+    region = {'left': 0, 'top': 0, 'width': frames[0].shape[1], 'height': frames[0].shape[0]}
+    timings = []
+    outputs = []
+    for _ in frames:
+        start = time.perf_counter()
+        results = tracker.detect(region) if tracked else detector.detect_images(region)
+        timings.append(time.perf_counter() - start)
+        outputs.append(results)
+    detector.close()
+    return np.array(timings) * 1000, outputs, tracker
+
+
+def main():
+    width, height = REGION_SIZE
+    frames = state_sequence(width, height, FRAMES)
+
+    print("=" * 64)
+    print("Tracker Benchmark")
+    print("=" * 64)
+    print(f"Frames: {FRAMES} at {width}x{height}, {ICONS} buttons\n")
+
+    full_ms, reference, _ = run(frames, tracked=False)
+    tracked_ms, outputs, tracker = run(frames, tracked=True)
+    mismatches = sum(1 for a, b in zip(reference, outputs) if a != b)
+
+    print(f"{'':>10} {'mean ms':>10} {'p50 ms':>10} {'max ms':>10}")
+    for label, timings in (('full', full_ms), ('tracked', tracked_ms)):
+        print(f"{label:>10} {timings.mean():>10.2f} {np.median(timings):>10.2f} {timings.max():>10.2f}")
+    print(f"\nFull scans: {tracker.full_scans}, tracked frames: {tracker.tracked_frames}")
+    print(f"Speedup (mean): {full_ms.mean() / tracked_ms.mean():.2f}x")
+
+    if mismatches:
+        print(f"\nFAIL: {mismatches} frame(s) differ from full detection")
+        sys.exit(1)
+    print("\nTracked output is identical to full detection on every frame")
+
+
+if __name__ == "__main__":
+    main()
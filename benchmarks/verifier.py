@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Verification Benchmark
+1. Clicks every button on a simulated chat whose buttons start downloading
+   a while after a click, then confirms the clicks the old way (wait one
+   second and run a full detection) and with ClickVerifier (poll a small
+   box around each click), with calibrated and with default thresholds. A
+   second chat ignores the first click on some buttons, to check that only
+   those are reported. Reports how long until the clicks are known to have
+   taken and the median time to confirm one.
+2. Runs the loop on the first screen of those chats, including one that
+   reacts only after the verification timeout: every button has to end up
+   downloading, and no button may be clicked again once its download has
+   started (Telegram would cancel it).
+
+Run from the repository root (works headless; input is simulated):
+    python -m benchmarks.verifier
+"""
+
+import os
+import sys
+import threading
+import time
+
+from benchmarks.pipeline import REGION_SIZE, SimulatedChat
+from benchmarks.suite import install_input_stubs
+from src.metrics import metrics
+from src.verifier import ClickVerifier
+
+RESPONSE_TIMES = [0.02, 0.1, 0.3]
+OLD_WAIT = 1.0
+# Longer than the verifier's timeout
+LATE_RESPONSE = 0.8
+LOOP_SECONDS = 6.0
+REGION = {'left': 0, 'top': 0, 'width': REGION_SIZE[0], 'height': REGION_SIZE[1]}
+
+
+class LossyChat(SimulatedChat):
+    """Drops the first click on every other button."""
+
+    def __init__(self):
+        super().__init__()
+        self.ignored = set()
+
+    def click(self, x: int, y: int):
+        for index, button in enumerate(self.buttons):
+            bx, by = button['x'], button['y'] - self.offset
+            if bx <= x < bx + 50 and by <= y < by + 50 and index % 2 and index not in self.ignored:
+                self.ignored.add(index)
+                self.clicks += 1
+                return
+        super().click(x, y)
+
+
+def first_screen(chat: SimulatedChat) -> list:
+    """The buttons in view, all waiting for a click."""
+    visible = [button for button in chat.buttons if 0 <= button['y'] and button['y'] + 50 <= REGION_SIZE[1]]
+    for button in visible:
+        button['state'] = 'not_downloaded'
+    return visible
+
+
+def run(chat: SimulatedChat, response: float, calibrated: bool) -> dict:
+    import benchmarks.pipeline as simulation
+    import main
+    simulation.RESPONSE_SECONDS = response
+    visible = first_screen(chat)
+    app = main.TelegramAutoDownloader(frame_source=chat)
+    app.detector.bank.lock(1.0)
+    if calibrated:
+        app.detector.thresholds.update({name: 0.95 for name in app.detector.templates})
+    positions = app.detector.detect_images(REGION)['not_downloaded']
+    verifier = ClickVerifier(chat.grab)
+
+    for x, y in positions:
+        chat.click(x, y)
+    clicked = time.perf_counter()
+    metrics.reset()
+    unconfirmed = verifier.verify(positions, REGION, app.detector.templates,
+                                  app.detector.thresholds.get('downloading', 0.5))
+    verified = time.perf_counter()
+    polls = metrics.snapshot()['stages'].get('click_confirm', {'p50_ms': 0.0})
+
+    # The old way: a fixed wait, then a full detection of the region
+    detect_start = time.perf_counter()
+    app.detector.detect_images(REGION)
+    detect_ms = (time.perf_counter() - detect_start) * 1000
+    app.detector.close()
+    missing = [button for button in visible if button['clicked'] is None]
+    return {
+        'clicks': len(positions),
+        'verify_ms': (verified - clicked) * 1000,
+        'confirm_p50_ms': polls['p50_ms'],
+        'old_ms': OLD_WAIT * 1000 + detect_ms,
+        'unconfirmed': len(unconfirmed),
+        'missing': len(missing),
+    }
+
+
+def loop(chat: SimulatedChat, response: float) -> dict:
+    import benchmarks.pipeline as simulation
+    import main
+    simulation.RESPONSE_SECONDS = response
+    visible = first_screen(chat)
+    pyautogui = sys.modules['pyautogui']
+    pyautogui.click = lambda x=None, y=None, **kwargs: chat.click(x, y)
+    # Stay on the first screen
+    pyautogui.scroll = lambda amount, **kwargs: None
+
+    app = main.TelegramAutoDownloader(frame_source=chat)
+    app.detector.bank.lock(1.0)
+    app.settings['click_delay'] = 0.05
+    app.downloads.configure(max_in_flight=len(visible), clicks_per_second=100.0)
+    app.selected_region = REGION
+    app._load_or_calibrate = lambda region: app.detector.thresholds.update(
+        {name: 0.95 for name in app.detector.templates})
+    metrics.reset()
+    worker = threading.Thread(target=app._automation_loop)
+    worker.start()
+    time.sleep(LOOP_SECONDS)
+    app.stop_event.set()
+    worker.join()
+    app.detector.close()
+    counters = metrics.snapshot()['counters']
+    return {'buttons': len(visible), 'started': sum(button['clicked'] is not None for button in visible),
+            'clicks': chat.clicks, 'requeued': counters.get('clicks_requeued', 0),
+            # Clicks on a button whose download had already started
+            'repeated': chat.missed}
+
+
+def main():
+    install_input_stubs()
+    os.environ.setdefault('TELEGRAM_DOWNLOADER_LOG', 'WARNING')
+    metrics.enable()
+
+    print("=" * 72)
+    print("Click Verification Benchmark")
+    print("=" * 72)
+    print(f"Region {REGION_SIZE[0]}x{REGION_SIZE[1]}; old confirmation waits {OLD_WAIT:.0f}s "
+          f"and runs a full detection\n")
+    print(f"{'chat':>6} {'thresholds':>11} {'response s':>10} {'clicks':>7} {'old ms':>8} {'verify ms':>10} "
+          f"{'p50 ms':>7} {'unconfirmed':>12} {'ignored':>8}")
+
+    ok = True
+    for label, factory in (('clean', SimulatedChat), ('lossy', LossyChat)):
+        for calibrated in (True, False):
+            for response in RESPONSE_TIMES:
+                chat = factory()
+                result = run(chat, response, calibrated)
+                print(f"{label:>6} {'calibrated' if calibrated else 'default':>11} {response:>10.2f} "
+                      f"{result['clicks']:>7} {result['old_ms']:>8.0f} {result['verify_ms']:>10.0f} "
+                      f"{result['confirm_p50_ms']:>7.0f} {result['unconfirmed']:>12} {result['missing']:>8}")
+                # Exactly the clicks that did not take are reported, well before the old wait ends
+                ok &= result['unconfirmed'] == result['missing']
+                if not result['missing']:
+                    ok &= result['verify_ms'] < result['old_ms'] / 2
+
+    print(f"\nLoop on the first screen for {LOOP_SECONDS:.0f}s\n")
+    print(f"{'chat':>6} {'response s':>10} {'buttons':>8} {'started':>8} {'clicks':>7} {'requeued':>9} "
+          f"{'repeated':>9}")
+    for label, factory, response in (('clean', SimulatedChat, 0.1), ('lossy', LossyChat, 0.1),
+                                     ('late', SimulatedChat, LATE_RESPONSE)):
+        result = loop(factory(), response)
+        print(f"{label:>6} {response:>10.2f} {result['buttons']:>8} {result['started']:>8} {result['clicks']:>7} "
+              f"{result['requeued']:>9} {result['repeated']:>9}")
+        # Lost clicks are clicked again; clicks Telegram took late are not
+        ok &= result['started'] == result['buttons'] and result['repeated'] == 0
+
+    print("\nVerification reports exactly the lost clicks, in a fraction of the old wait, and only those "
+          "are clicked again" if ok
+          else "\nFAIL: verification missed lost clicks, was not faster or a download was clicked twice")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
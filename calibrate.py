@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibration from Recorded Frames
+Measures display scale and per-template thresholds on saved screenshots and
+stores them as a calibration profile
+
+Usage:
+    python calibrate.py <frames_dir_or_glob> [--profile PATH] [--dpi DPI]
+
+Frames are treated as full-screen captures of the primary display.
+"""
+
+import argparse
+import sys
+
+import cv2
+
+from src.calibration import PROFILE_PATH, ProfileStore, calibrate, display_dpi, profile_key
+from src.capture import FileFrameSource
+from src.detector import ImageDetector
+
+TEMPLATE_PATHS = {
+    'not_downloaded': 'images/not_download.jpg',
+    'downloading': 'images/downloading.jpg',
+    'downloaded': 'images/downloaded.jpg'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate detection on recorded frames")
+    parser.add_argument('frames', help="Directory or glob pattern of captured frames")
+    parser.add_argument('--profile', default=PROFILE_PATH, help="Calibration profile file")
+    parser.add_argument('--dpi', type=int, default=None, help="DPI of the display the frames came from")
+    args = parser.parse_args()
+
+    source = FileFrameSource(args.frames, loop=False, cache=False)
+    frames = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in source.paths]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        print(f"No readable frames in {args.frames}")
+        sys.exit(1)
+
+    detector = ImageDetector(frame_source=source)
+    detector.load_templates(TEMPLATE_PATHS)
+
+    height, width = frames[0].shape
+    region = {'left': 0, 'top': 0, 'width': width, 'height': height}
+    dpi = args.dpi if args.dpi is not None else display_dpi()
+    key = profile_key(region, frames[0], dpi=dpi)
+
+    print(f"Calibrating {key} on {len(frames)} frames...")
+    profile = calibrate(detector.bank, frames, key)
+    print(f"Scale: {profile.scale:g}x")
+    for name, threshold in profile.thresholds.items():
+        margin = profile.margins.get(name)
+        margin_text = f"{margin:+.3f}" if margin is not None else "n/a (not seen)"
+        print(f"  {name}: threshold {threshold:.3f}, margin {margin_text}")
+
+    if not profile.is_usable():
+        print("No download buttons found in these frames; profile not saved")
+        sys.exit(1)
+    ProfileStore(args.profile).save(profile)
+    print(f"Saved profile to {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
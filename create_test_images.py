@@ -1,8 +1,28 @@
 #!/usr/bin/env python3
+"""
+Test Image Generator
+Creates simple stand-in templates, or synthetic chat frames at several
+region sizes and icon densities for benchmarks
+
+Usage:
+    python create_test_images.py                 # stand-in templates in images/
+    python create_test_images.py --frames DIR    # synthetic frames + manifest.json in DIR
+"""
+
+import argparse
+import json
+import os
 
 import cv2
 import numpy as np
 
+from src.synthetic import make_frame
+
+# Region sizes (width, height) and icon densities (icons per megapixel) for synthetic frames
+REGION_SIZES = [(800, 600), (1920, 1080), (2560, 1440)]
+ICON_DENSITIES = {'sparse': 4, 'dense': 16}
+
+
 def create_test_image(filename, color, text):
     # Create a 48x48 image
     img = np.ones((48, 48, 3), dtype=np.uint8) * 255
@@ -19,9 +39,51 @@ def create_test_image(filename, color, text):
     cv2.imwrite(filename, img)
     print(f"Created {filename}")
 
-# Create test images
-create_test_image("images/not_download.jpg", (0, 0, 255), "Not")  # Red
-create_test_image("images/downloading.jpg", (0, 255, 255), "Downloading")  # Yellow
-create_test_image("images/downloaded.jpg", (0, 255, 0), "Downloaded")  # Green
 
-print("Test images created successfully!")
\ No newline at end of file
+def synthetic_frames(sizes=REGION_SIZES, densities=ICON_DENSITIES, seed=0):
+    """Yield ``(width, height, density_name, frame, placements)`` for every size and density."""
+    for width, height in sizes:
+        for density, per_megapixel in densities.items():
+            icons = max(3, round(width * height / 1e6 * per_megapixel))
+            frame, placements = make_frame(width, height, icons=icons, seed=seed)
+            yield width, height, density, frame, placements
+
+
+def create_test_frames(directory):
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for width, height, density, frame, placements in synthetic_frames():
+        filename = f"frame_{width}x{height}_{density}.png"
+        cv2.imwrite(os.path.join(directory, filename), frame)
+        manifest.append({
+            'file': filename,
+            'width': width,
+            'height': height,
+            'density': density,
+            'icons': [{'state': name, 'x': x, 'y': y} for name, x, y in placements],
+        })
+        print(f"Created {filename} ({len(placements)} icons)")
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Synthetic frames written to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create stand-in templates or synthetic test frames")
+    parser.add_argument('--frames', metavar='DIR', help="Write synthetic frames to DIR instead of templates")
+    args = parser.parse_args()
+
+    if args.frames:
+        create_test_frames(args.frames)
+        return
+
+    # Create test images
+    create_test_image("images/not_download.jpg", (0, 0, 255), "Not")  # Red
+    create_test_image("images/downloading.jpg", (0, 255, 255), "Downloading")  # Yellow
+    create_test_image("images/downloaded.jpg", (0, 255, 0), "Downloaded")  # Green
+
+    print("Test images created successfully!")
+
+
+if __name__ == "__main__":
+    main()
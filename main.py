@@ -4,36 +4,91 @@ import os
 import sys
 import io
 import platform
-import cv2
+import logging
 
 # Set UTF-8 encoding for stdout and stderr (for Windows compatibility)
 if platform.system() == 'Windows':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+import argparse
 import time
+from collections import deque
 from threading import Thread, Event
 from pynput import keyboard
 from src.detector import ImageDetector
+from src.tracker import DetectionTracker
+from src.scheduler import AdaptiveScheduler
+from src.pipeline import Frame, Pipeline
+from src.downloads import DownloadScheduler
+from src.ledger import ContentLedger
+from src.throughput import SessionRates
+from src.verifier import ClickVerifier
 from src.region_selector import RegionSelector
 from src.automation import AutomationController
 from src.ui import ControlPanel
+from src.calibration import CalibrationProfile, ProfileStore, calibrate, profile_key
+from src.recording import ActionLog, RecordingFrameSource, ReplayFrameSource, SessionRecorder
+from src.log import setup_logging, get_logger
+from src.metrics import metrics, format_snapshot
+from src.workspace import GrayRing
+
+setup_logging()
+log = get_logger('main')
 
 class TelegramAutoDownloader:
-    def __init__(self):
-        self.detector = ImageDetector()
+    def __init__(self, frame_source=None, record_dir=None, dry_run=False):
+        self.detector = ImageDetector(frame_source)
+        # Re-verifies known buttons in small windows between full scans
+        self.tracker = DetectionTracker(self.detector)
         self.selector = RegionSelector()
-        self.automation = AutomationController()
         self.ui = None
         self.stop_event = Event()
+        # Lets a stop cut a full scan short instead of waiting for every template
+        self.detector.stop_event = self.stop_event
+        self.automation = AutomationController(dry_run=dry_run, stop_event=self.stop_event)
+        # Polls fast after actions and backs off while nothing changes
+        self.scheduler = AdaptiveScheduler()
+        # Every button seen this session, deduplicated across scrolls
+        self.ledger = ContentLedger()
+        # Clicks and completions per minute, download time and ETA for the control panel
+        self.rates = SessionRates()
+        # Caps downloads in flight and paces clicks
+        self.downloads = DownloadScheduler()
+        # Confirms clicks in small boxes around them instead of a full re-detection
+        self.verifier = ClickVerifier(self._grab_box)
         self.worker_thread = None
+        # How long stopping waits for the worker before returning to the UI
+        self.stop_timeout = 1.0
         self.selected_region = None
         self.keyboard_listener = None
+        # Each start records a session file here when set
+        self.record_dir = record_dir
+        self.recorder = None
+        # Replay sources pace themselves, so the loop does not wait between cycles
+        self.replaying = isinstance(frame_source, ReplayFrameSource)
+        # Live sessions capture, detect and act concurrently; replays run one
+        # frame at a time so they take the same decisions every time
+        self.pipelined = not self.replaying
+        self._interval = self.scheduler.min_interval
+        # Gray frames in flight in the pipeline: one being captured, the queued ones and one being detected
+        self._gray_frames = GrayRing(Pipeline.QUEUE_DEPTH + 2)
+        # End times of the recorded actions, when replaying a pipelined session
+        self._replayed_action_ends = None
+        # Recorded click verification outcomes, when replaying
+        self._replayed_verifications = None
+        # Buttons in view whose best state is downloading, as of the last frame acted on
+        self.in_flight = 0
+        # Stage latencies are logged this often while metrics are enabled
+        self.metrics_interval = 60.0
+        self._metrics_logged = time.monotonic()
         
         # Settings
         self.settings = {
             'scroll_amount': 3,
             'click_delay': 0.2,
-            'scroll_threshold': 20
+            'scroll_threshold': 20,
+            'max_downloads': self.downloads.max_in_flight,
+            'clicks_per_second': self.downloads.bucket.rate
         }
         
         # Load image templates
@@ -43,54 +98,90 @@ class TelegramAutoDownloader:
             'downloaded': 'images/downloaded.jpg'
         }
         
-        # Check if image files exist and get sizes
-        print(f"Current working directory: {os.getcwd()}")
-        print(f"Looking for images in: {template_paths}")
-        
-        template_sizes = {}
+        # Resolve template paths; the detector loads each image exactly once
+        log.debug(f"Current working directory: {os.getcwd()}")
         for name, path in template_paths.items():
-            # Use absolute path for better compatibility
-            abs_path = os.path.abspath(path)
-            print(f"Checking {name}: {abs_path}")
-            
-            if not os.path.exists(abs_path):
-                print(f"WARNING: {abs_path} file not found!")
-                # Try alternative paths
-                alt_paths = [
-                    path,
-                    os.path.join(os.path.dirname(__file__), path),
-                    os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
-                ]
-                for alt_path in alt_paths:
-                    if os.path.exists(alt_path):
-                        print(f"  Found at alternative path: {alt_path}")
-                        template_paths[name] = alt_path
-                        abs_path = alt_path
-                        break
-            
-            if os.path.exists(abs_path):
-                img = cv2.imread(abs_path)
-                if img is not None:
-                    h, w = img.shape[:2]
-                    template_sizes[name] = (w, h)
-                    print(f"  SUCCESS: Loaded '{name}': {w}x{h} pixels")
-                else:
-                    print(f"  ERROR: Could not read image file {abs_path}")
+            template_paths[name] = self._resolve_template_path(path)
+        self.detector.load_templates(template_paths)
         
-        if template_sizes:
-            max_width = max(size[0] for size in template_sizes.values())
-            max_height = max(size[1] for size in template_sizes.values())
-            print(f"\nIMPORTANT: Select a region at least {max_width}x{max_height} pixels for detection to work properly.\n")
+        if self.detector.templates:
+            max_width = max(t.shape[1] for t in self.detector.templates.values())
+            max_height = max(t.shape[0] for t in self.detector.templates.values())
+            log.info(f"IMPORTANT: Select a region at least {max_width}x{max_height} pixels for detection to work properly.")
         
-        self.detector.load_templates(template_paths)
+        # Calibration profiles keyed by display geometry, DPI and theme
+        self.profiles = ProfileStore()
+    
+    def _resolve_template_path(self, path):
+        # Use absolute path for better compatibility
+        abs_path = os.path.abspath(path)
+        if os.path.exists(abs_path):
+            return abs_path
         
+        log.warning(f"{abs_path} file not found!")
+        # Try alternative paths
+        alt_paths = [
+            os.path.join(os.path.dirname(__file__), path),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        ]
+        for alt_path in alt_paths:
+            if os.path.exists(alt_path):
+                log.info(f"Found at alternative path: {alt_path}")
+                return alt_path
+        return path
+    
+    def _load_or_calibrate(self, region, frames=3):
+        """Apply the stored profile for this display, or measure and store one; returns the profile applied."""
+        gray = self.detector.capture_gray(region).copy()
+        key = profile_key(region, gray)
+        profile = self.profiles.load(key)
+        if profile is None:
+            log.info(f"No calibration profile for {key}, calibrating on {frames} frames...")
+            if self.ui:
+                self.ui.update_status("Calibrating...")
+            captured = [gray]
+            while len(captured) < frames and not self.stop_event.wait(0.2):
+                captured.append(self.detector.capture_gray(region).copy())
+            profile = calibrate(self.detector.bank, captured, key, stop_event=self.stop_event)
+            if profile is None:
+                log.info("Calibration cancelled")
+                return None
+            if not profile.is_usable():
+                log.warning("Calibration found no download buttons; using default thresholds")
+                return None
+            self.profiles.save(profile)
+            log.info(f"Saved calibration profile to {self.profiles.path}")
+        self.detector.apply_profile(profile)
+        self.tracker.reset()
+        return profile
+    
     def select_region(self):
         return self.selector.select_region()
     
     def start_automation(self, region):
-        print(f"Starting automation with region: {region}")
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            if not self.stop_event.is_set():
+                log.warning("Automation is already running")
+                return False
+            # A stopped worker may still be finishing a step; a second one would share its
+            # frame source and recorder
+            self.worker_thread.join(timeout=self.stop_timeout)
+            if self.worker_thread.is_alive():
+                log.warning("The previous run is still stopping; not starting a new one yet")
+                if self.ui:
+                    self.ui.update_status("Still stopping the previous run, try again")
+                return False
+        log.info(f"Starting automation with region: {region}")
         self.selected_region = region
         self.stop_event.clear()
+        self.tracker.reset()
+        self.scheduler.reset()
+        self.downloads.reset()
+        self.in_flight = 0
+        self.ledger.reset()
+        self.rates.reset()
+        if self.record_dir:
+            self._start_recording(region)
         
         # Start keyboard listener for ESC key
         self._start_keyboard_listener()
@@ -98,68 +189,298 @@ class TelegramAutoDownloader:
         self.worker_thread = Thread(target=self._automation_loop)
         self.worker_thread.daemon = True
         self.worker_thread.start()
-        print("Worker thread started")
-        print("Press ESC key to stop automation at any time")
+        log.debug("Worker thread started")
+        log.info("Press ESC key to stop automation at any time")
+        return True
     
     def stop_automation(self):
         self.stop_event.set()
         if self.worker_thread:
-            self.worker_thread.join(timeout=1)
+            # The worker closes the capture handle and the recording itself when it exits
+            self.worker_thread.join(timeout=self.stop_timeout)
+            if self.worker_thread.is_alive():
+                log.info("Automation is finishing its current step and will stop shortly")
         self._stop_keyboard_listener()
+        rates = self.rates.snapshot()
+        log.info(f"Session: {rates['clicks_per_minute']:.1f} clicks/min, "
+                 f"{rates['completed_per_minute']:.1f} downloads completed/min")
+        if metrics.enabled:
+            log.info("Stage latencies\n" + format_snapshot(metrics.snapshot()))
+    
+    def metrics_snapshot(self):
+        """Per-stage latency percentiles and counters (frames, clicks, scrolls, errors)."""
+        return metrics.snapshot()
+    
+    def _start_recording(self, region):
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, time.strftime('session_%Y%m%d_%H%M%S.tgrec'))
+        self.recorder = SessionRecorder(path, region)
+        self.detector.frame_source = RecordingFrameSource(self.detector.frame_source, self.recorder)
+        self.automation.recorder = self.recorder
+        log.info(f"Recording session to {path}")
+    
+    def _stop_recording(self):
+        if self.recorder is None:
+            return
+        if isinstance(self.detector.frame_source, RecordingFrameSource):
+            self.detector.frame_source = self.detector.frame_source.source
+        self.automation.recorder = None
+        self.recorder.close()
+        self.recorder = None
     
     def _automation_loop(self):
-        print("Automation loop started")
-        while not self.stop_event.is_set():
-            try:
-                # Detect images
-                print(f"Detecting in region: {self.selected_region}")
-                results = self.detector.detect_images(self.selected_region)
-                stats = self.detector.get_detection_stats(results)
-                print(f"Detection results: {results}")
-                
-                # UI 업데이트
-                if self.ui:
-                    self.ui.update_stats(stats)
-                    
-                    if results['not_downloaded']:
-                        self.ui.update_status(f"Clicking {len(results['not_downloaded'])} not downloaded items...")
-                    elif stats['downloaded_percentage'] >= 20:
-                        self.ui.update_status(f"Completion {stats['downloaded_percentage']:.1f}% - Scrolling...")
-                    else:
-                        self.ui.update_status("Detecting...")
-                
-                # Perform automation with settings
-                action_performed = self.automation.perform_automation(
-                    results, stats, 
-                    scroll_amount=self.settings['scroll_amount'],
-                    click_delay=self.settings['click_delay'],
-                    scroll_threshold=self.settings['scroll_threshold']
-                )
-                
-                # Wait briefly after action
-                if action_performed:
-                    # Shorter wait for continuous scrolling
-                    if stats.get('downloaded_percentage', 0) >= 20 and not results.get('not_downloaded'):
-                        time.sleep(0.5)  # Quick check during scrolling
-                    else:
-                        time.sleep(1)  # Normal wait after clicking
-                else:
-                    time.sleep(0.5)  # Faster detection cycle
-                    
-            except Exception as e:
-                import traceback
-                print(f"Error occurred: {e}")
-                print(f"Traceback: {traceback.format_exc()}")
-                if self.ui:
-                    self.ui.update_status(f"Error: {str(e)}")
-                time.sleep(1)
+        log.debug("Automation loop started")
+        try:
+            # A replay applies the recorded profile up front instead
+            if not self.replaying:
+                profile = None
+                try:
+                    profile = self._load_or_calibrate(self.selected_region)
+                except Exception as e:
+                    log.error(f"Calibration failed, using default thresholds: {e}", exc_info=True)
+                if self.recorder:
+                    self.recorder.record_action('profile', profile=profile.to_dict() if profile else None)
+            if self.pipelined:
+                self._run_pipeline()
+                return
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    with metrics.stage('cycle'):
+                        interval = self._automation_cycle()
+                    metrics.count('frames')
+                    self._log_metrics()
+                    # Wakes up at once on stop
+                    if not self.replaying:
+                        with metrics.stage('cycle_wait'):
+                            if self.scheduler.wait(self.stop_event, started + interval):
+                                break
+                except EOFError:
+                    log.info("Replay finished")
+                    break
+                except Exception as e:
+                    self._report_error(e)
+                    self.stop_event.wait(1)
+        finally:
+            if self.recorder and self.stop_event.is_set():
+                # Possibly in the middle of an action; replays stop after the same actions
+                self.recorder.record_action('stop')
+            # The worker cleans up after itself, however long stopping takes: release the
+            # persistent capture handle and close the recording (unwrapping the frame source)
+            self.detector.close()
+            self._stop_recording()
+    
+    def _run_pipeline(self):
+        """Capture, detection and actions on separate threads (see src/pipeline.py)."""
+        self._interval = self.scheduler.min_interval
+        pipeline = Pipeline(self._capture_frame, self._detect_frame, self._act_on_frame, self.stop_event,
+                            interval=lambda: self._interval, on_drop=self._frame_dropped,
+                            on_error=self._report_error)
+        pipeline.run()
+        log.info(f"Pipeline stopped: {pipeline.captured} frames captured, {pipeline.detected} detected, "
+                 f"{pipeline.acted} acted on, {pipeline.dropped} dropped")
+    
+    def _capture_frame(self, seq, epoch):
+        source = self.detector.frame_source
+        image = self.detector.grab(self.selected_region)
+        frame_time = source.frame_time if source.frame_time is not None else time.monotonic()
+        with metrics.stage('to_gray'):
+            gray = self._gray_frames.to_gray(image)
+        # Only the color prefilter needs the color frame
+        color = image.copy() if self.detector.mode == 'prefilter' and image.ndim == 3 else None
+        return Frame(seq, epoch, frame_time, gray, color, getattr(source, 'recorded', None))
+    
+    def _detect_frame(self, frame):
+        self.detector.last_frame = frame.color if frame.color is not None else frame.gray
+        self.detector.frame_time = frame.time
+        with metrics.stage('detect'):
+            # Detected in its capture buffer; the workspace only holds the match buffers
+            self.detector.workspace.ensure(*frame.gray.shape)
+            results = self.tracker.update(frame.gray, self.selected_region)
+        frame.offset = self.tracker.offset
+        frame.detections = self.detector.last_detections
+        return results
+    
+    def _act_on_frame(self, frame, results):
+        with metrics.stage('cycle'):
+            action = self._react(results, frame.time, source_frame=frame.seq, offset=frame.offset,
+                                 detections=frame.detections)
+            self._interval = self._next_interval(frame.time)
+        metrics.count('frames')
+        self._log_metrics()
+        return action
+    
+    def _frame_dropped(self, frame, stage):
+        metrics.count('dropped_frames')
+        if self.recorder and frame.recorded is not None:
+            # Replays skip it too, or only detect it when it was dropped after detection
+            self.recorder.record_action('drop', index=frame.recorded, stage=stage)
+    
+    def _automation_cycle(self):
+        """One detect -> update UI -> act pass; returns the interval until the next one starts."""
+        # Detect images
+        with metrics.stage('detect'):
+            results = self.tracker.detect(self.selected_region)
+        # A scan cut short by a stop found nothing to act on
+        if self.stop_event.is_set():
+            return 0.0
+        # The recorded session detected this frame (the tracker has seen it) but never acted on it
+        if self.replaying and self.detector.frame_source.recorded in self.detector.frame_source.unacted:
+            return 0.0
+        self._react(results, self.detector.frame_time)
+        return self._next_interval(self.detector.frame_time)
+    
+    def _next_interval(self, frame_time):
+        # Back off further while downloads are only in progress
+        interval = self.scheduler.next_interval(busy=self.in_flight > 0)
+        # but look again as soon as the next queued item may be clicked
+        ready_in = self.downloads.ready_in(self.in_flight, now=frame_time)
+        if ready_in is not None:
+            interval = min(interval, max(ready_in, self.scheduler.min_interval))
+        return interval
+    
+    def _react(self, results, frame_time, source_frame=None, offset=None, detections=None):
+        """Update the UI and act on one frame's detections; returns 'click', 'scroll' or None.
+
+        ``offset`` is the tracker's scroll offset for the frame and ``detections``
+        its matches with scores (the current ones if None).
+        """
+        log.sampled('detection', 10, "Detection results",
+                    **{name: len(matches) for name, matches in results.items()})
+        # No new action until the screen has settled after the last one
+        settled = self.scheduler.observe(results, now=frame_time)
+        # Stats and clicks go by the ledger: sticky states, no second click after a scroll
+        offset = self.tracker.offset if offset is None else offset
+        detections = self.detector.last_detections if detections is None else detections
+        region = self.selected_region
+        with metrics.stage('ledger'):
+            # Each button counts in the state that scored best
+            finished = self.ledger.observe(detections, offset, region, frame_time)
+            stats = self.ledger.stats(offset, region)
+            self.in_flight = stats['downloading']
+            results = dict(results, not_downloaded=self.ledger.clickable(
+                results.get('not_downloaded', []), offset, region, frame_time))
+        self.rates.completed(finished, now=frame_time)
+        
+        # UI 업데이트
+        if self.ui:
+            with metrics.stage('ui'):
+                self.ui.update_stats(stats)
+                self.ui.update_session(self.rates.snapshot(
+                    backlog=stats['not_downloaded'] + stats['downloading'], now=frame_time))
+            
+            if results['not_downloaded']:
+                self.ui.update_status(f"Clicking {len(results['not_downloaded'])} not downloaded items...")
+            elif stats['downloaded_percentage'] >= 20:
+                self.ui.update_status(f"Completion {stats['downloaded_percentage']:.1f}% - Scrolling...")
+            else:
+                self.ui.update_status("Detecting...")
+        
+        if not settled:
+            return None
+        # Perform automation with settings
+        with metrics.stage('act'):
+            action_performed = self.automation.perform_automation(
+                results, stats, 
+                scroll_amount=self.settings['scroll_amount'],
+                click_delay=self.settings['click_delay'],
+                scroll_threshold=self.settings['scroll_threshold'],
+                source_frame=source_frame,
+                downloads=self.downloads,
+                now=frame_time
+            )
+        if not action_performed:
+            return None
+        confirmed = False
+        if self.automation.last_action == 'click':
+            self.ledger.mark_clicked(self.automation.last_clicked, offset, region, frame_time)
+            self.rates.clicked(len(self.automation.last_clicked), now=frame_time)
+            confirmed = self._verify_clicks(self.automation.last_clicked, offset)
+        if not self.replaying:
+            # How old the detections an action went by were when it finished
+            metrics.observe('action_age', (time.monotonic() - frame_time) * 1000)
+        # Confirmed clicks need no settling: the buttons are already downloading
+        self.scheduler.acted(at=self._action_end(), confirmed=confirmed)
+        return self.automation.last_action
+    
+    def _verify_clicks(self, positions, offset):
+        """Confirm clicks took; True once all are confirmed.
+
+        Unconfirmed clicks are not repeated here: their buttons go back to
+        the ledger and are clicked again (through the download scheduler)
+        only if a later frame still shows them not downloaded.
+        """
+        unconfirmed = self._unconfirmed_clicks(positions)
+        if unconfirmed is None:
+            return False
+        if not unconfirmed:
+            return True
+        log.throttled('unconfirmed_clicks', 10.0, f"{len(unconfirmed)} of {len(positions)} clicks not confirmed, "
+                      f"re-queued until they are detected again")
+        metrics.count('clicks_requeued', len(unconfirmed))
+        self.ledger.requeue(unconfirmed, offset, self.selected_region)
+        return False
+    
+    def _unconfirmed_clicks(self, positions):
+        """Clicked positions that are not downloading yet, or None when clicks cannot be verified."""
+        if self._replayed_verifications is not None:
+            if not self._replayed_verifications:
+                return None
+            return [tuple(position) for position in self._replayed_verifications.popleft()]
+        # Dry runs never clicked; stored frames cannot show the reaction
+        if self.verifier is None or self.automation.dry_run or not self.detector.frame_source.live:
+            return None
+        templates = self.detector.bank.templates_for(self.detector.last_scale) or self.detector.templates
+        if 'downloading' not in templates:
+            return None
+        # Calibrated threshold, or the detector's default
+        unconfirmed = self.verifier.verify(positions, self.selected_region, templates,
+                                           self.detector.thresholds.get('downloading', 0.5), self.stop_event)
+        if self.stop_event.is_set():
+            # Cut short: nothing is known about the clicks still pending
+            return None
+        if self.recorder:
+            self.recorder.record_action('verified', unconfirmed=[[int(x), int(y)] for x, y in unconfirmed])
+        return unconfirmed
+    
+    def _grab_box(self, box):
+        # Verification captures stay out of a session recording
+        source = self.detector.frame_source
+        if isinstance(source, RecordingFrameSource):
+            source = source.source
+        return source.grab(box)
+    
+    def _action_end(self):
+        """When the last action finished, on the frame clock; None settles from the next frame."""
+        if self._replayed_action_ends is not None:
+            return self._replayed_action_ends.popleft() if self._replayed_action_ends else None
+        if not self.pipelined:
+            return None
+        # Frames captured while clicking are still in the pipeline; settle on later ones only
+        at = time.monotonic()
+        if self.recorder:
+            self.recorder.record_action('acted', at=at - self.recorder.start)
+        return at
+    
+    def _log_metrics(self):
+        if metrics.enabled and time.monotonic() - self._metrics_logged >= self.metrics_interval:
+            self._metrics_logged = time.monotonic()
+            log.info("Stage latencies\n" + format_snapshot(metrics.snapshot()))
+    
+    def _report_error(self, e):
+        metrics.count('errors')
+        # Repeated failures (e.g. a lost display) are reported at most every 10s
+        log.throttled(f"loop_error:{type(e).__name__}", 10.0, f"Error occurred: {e}",
+                      level=logging.ERROR, exc_info=True)
+        if self.ui:
+            self.ui.update_status(f"Error: {str(e)}")
     
     def _start_keyboard_listener(self):
         """Start listening for ESC key press"""
         def on_press(key):
             try:
                 if key == keyboard.Key.esc:
-                    print("\nESC key pressed - stopping automation...")
+                    log.info("ESC key pressed - stopping automation...")
                     self.stop_automation()
                     if self.ui:
                         self.ui.update_status("Stopped (ESC key)")
@@ -181,7 +502,11 @@ class TelegramAutoDownloader:
     
     def update_settings(self, setting_name, value):
         self.settings[setting_name] = value
-        print(f"Updated {setting_name} to {value}")
+        if setting_name == 'max_downloads':
+            self.downloads.configure(max_in_flight=value)
+        elif setting_name == 'clicks_per_second':
+            self.downloads.configure(clicks_per_second=value)
+        log.debug(f"Updated {setting_name} to {value}")
     
     def run(self):
         self.ui = ControlPanel(
@@ -192,15 +517,74 @@ class TelegramAutoDownloader:
         )
         self.ui.run()
 
+# Recording bookkeeping, not actions the loop takes
+REPLAY_MARKERS = ('profile', 'drop', 'acted', 'verified', 'stop')
+
+def _comparable(actions):
+    return [{k: v for k, v in action.items() if k not in ('timestamp', 'frame', 'source_frame')}
+            for action in actions if action['action'] not in REPLAY_MARKERS]
+
+def replay(path, realtime=True):
+    """Run the automation loop headless over a recorded session without touching the mouse."""
+    source = ReplayFrameSource(path, realtime=realtime)
+    recorded = source.reader.actions
+    # Frames the live pipeline dropped were never acted on; the ones dropped after
+    # detection still went through the tracker (older recordings do not say)
+    drops = [action for action in recorded if action['action'] == 'drop']
+    source.skip = {action['index'] for action in drops if action.get('stage', 'detect') == 'detect'}
+    source.unacted = {action['index'] for action in drops if action.get('stage') == 'act'}
+    log.info(f"Replaying {len(source.reader) - len(source.skip)} frames ({source.reader.duration:.0f}s) from {path}"
+             f"{'' if realtime else ' at maximum speed'}")
+    app = TelegramAutoDownloader(frame_source=source, dry_run=True)
+    stopped = any(action['action'] == 'stop' for action in recorded)
+    # A stopped session may have been cut off mid-action; the replay stops after the same actions
+    app.automation.recorder = actions = ActionLog(
+        stop_after=len(_comparable(recorded)) if stopped else None, stop_event=app.stop_event)
+    app.selected_region = source.region
+    action_ends = [action['at'] for action in recorded if action['action'] == 'acted']
+    if action_ends:
+        app._replayed_action_ends = deque(action_ends)
+    verifications = [action['unconfirmed'] for action in recorded if action['action'] == 'verified']
+    if verifications:
+        app._replayed_verifications = deque(verifications)
+    # Skip the frames calibration used and apply the profile the session ran with
+    for action in recorded:
+        if action['action'] == 'profile':
+            source.index = action['frame'] + 1
+            if action['profile']:
+                app.detector.apply_profile(CalibrationProfile.from_dict(action['profile']))
+            break
+    start = time.perf_counter()
+    app._automation_loop()
+    replayed, expected = _comparable(actions.actions), _comparable(recorded)
+    log.info(f"Replay took {time.perf_counter() - start:.1f}s, {len(replayed)} actions "
+             f"({len(expected)} recorded)")
+    if metrics.enabled:
+        log.info("Stage latencies\n" + format_snapshot(metrics.snapshot()))
+    if replayed != expected:
+        log.warning("Replayed actions differ from the recorded ones")
+    return replayed == expected
+
 def main():
+    parser = argparse.ArgumentParser(description="Telegram Auto Downloader")
+    parser.add_argument('--record', metavar='DIR', help="Record every automation session to a file in DIR")
+    parser.add_argument('--replay', metavar='FILE', help="Replay a recorded session headless instead of starting the UI")
+    parser.add_argument('--speed', choices=('realtime', 'max'), default='realtime', help="Replay speed")
+    parser.add_argument('--metrics', action='store_true', help="Time every stage and log latency percentiles")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+    
     try:
-        app = TelegramAutoDownloader()
+        if args.replay:
+            sys.exit(0 if replay(args.replay, realtime=args.speed == 'realtime') else 1)
+        app = TelegramAutoDownloader(record_dir=args.record)
         app.run()
     except KeyboardInterrupt:
         print("\nExiting program.")
         sys.exit(0)
     except Exception as e:
-        print(f"Fatal error: {e}")
+        log.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,13 +1,31 @@
 # -*- coding: utf-8 -*-
 import pyautogui
 import time
-from typing import List, Tuple
+from threading import Event
+from typing import List, Optional, Tuple
 import platform
+from src.downloads import DownloadScheduler
+from src.log import get_logger
+from src.metrics import metrics
+
+log = get_logger('automation')
 
 class AutomationController:
-    def __init__(self):
+    def __init__(self, dry_run: bool = False, stop_event: Optional[Event] = None):
+        # dry_run logs actions instead of moving the mouse, e.g. while replaying a recording
+        self.dry_run = dry_run
+        # Optional SessionRecorder that gets every click and scroll
+        self.recorder = None
+        # Set to stop: ends a batch of clicks, cutting the wait between them short
+        self.stop_event = stop_event
+        # 'click' or 'scroll', whichever perform_automation did last
+        self.last_action = None
+        # Positions the last 'click' action actually clicked (fewer than targeted after a stop)
+        self.last_clicked = []
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.1
+        # No blanket pause after every pyautogui call; waits are explicit and
+        # the loop's scheduler waits for the screen to settle after an action
+        pyautogui.PAUSE = 0
         
         # Platform-specific configurations
         system = platform.system()
@@ -21,36 +39,82 @@ class AutomationController:
             # Linux may require X11
             pass
         
-    def click_positions(self, positions: List[Tuple[int, int]], delay: float = 0.2):
+    def click_positions(self, positions: List[Tuple[int, int]], delay: float = 0.2,
+                        source_frame: Optional[int] = None) -> List[Tuple[int, int]]:
+        # source_frame: the frame the positions were detected on. Returns the positions
+        # clicked, fewer than given when a stop cuts the batch short
+        clicked = []
         for x, y in positions:
-            pyautogui.click(x, y)
-            time.sleep(delay)
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+            if self.recorder:
+                self.recorder.record_action('click', x=int(x), y=int(y), source_frame=source_frame)
+            if self.dry_run:
+                log.debug(f"Dry run: click at ({x}, {y})")
+                clicked.append((x, y))
+                continue
+            with metrics.stage('click'):
+                pyautogui.click(x, y)
+            clicked.append((x, y))
+            metrics.count('clicks')
+            with metrics.stage('click_wait'):
+                if self.stop_event is not None:
+                    if self.stop_event.wait(delay):
+                        break
+                else:
+                    time.sleep(delay)
+        return clicked
     
-    def scroll_down(self, amount: int = 3):
+    def scroll_down(self, amount: int = 3, source_frame: Optional[int] = None):
+        if self.recorder:
+            self.recorder.record_action('scroll', amount=amount, source_frame=source_frame)
+        if self.dry_run:
+            log.debug(f"Dry run: scroll down by {amount}")
+            return
         # Platform-specific scroll amounts
         system = platform.system()
-        if system == 'Darwin':  # macOS has different scroll behavior
-            pyautogui.scroll(-amount * 10)
-        else:
-            pyautogui.scroll(-amount)
-        time.sleep(0.2)  # Shorter delay for continuous scrolling
+        with metrics.stage('scroll'):
+            if system == 'Darwin':  # macOS has different scroll behavior
+                pyautogui.scroll(-amount * 10)
+            else:
+                pyautogui.scroll(-amount)
+        metrics.count('scrolls')
     
     def perform_automation(self, detection_results: dict, stats: dict, 
                           scroll_amount: int = 3, click_delay: float = 0.2, 
-                          scroll_threshold: int = 20) -> bool:
+                          scroll_threshold: int = 20, source_frame: Optional[int] = None,
+                          downloads: Optional[DownloadScheduler] = None, now: Optional[float] = None) -> bool:
+        # downloads: caps downloads in flight and paces clicks; now is the frame's capture time
         not_downloaded = detection_results.get('not_downloaded', [])
         
         # First priority: click not downloaded items
         if not_downloaded:
-            print(f"Found {len(not_downloaded)} not downloaded images, starting clicks...")
-            self.click_positions(not_downloaded, delay=click_delay)
+            targets = not_downloaded
+            if downloads is not None:
+                # Buttons, not template matches: a button matching several templates counts once
+                in_flight = stats['downloading']
+                targets = downloads.admit(not_downloaded, in_flight, now)
+                if not targets:
+                    # Stay here until downloads finish or clicks are allowed again
+                    log.throttled('download_cap', 10.0, f"{len(not_downloaded)} items queued, "
+                                  f"{in_flight} of {downloads.max_in_flight} downloads in flight")
+                    return False
+            log.info(f"Found {len(not_downloaded)} not downloaded images, clicking {len(targets)}...")
+            self.last_clicked = self.click_positions(targets, delay=click_delay, source_frame=source_frame)
+            self.last_action = 'click'
             return True
         
+        # Clicks that did not take are retried before the chat scrolls past them
+        if stats.get('requeued'):
+            log.throttled('requeued', 10.0, f"Waiting to retry {stats['requeued']} unconfirmed clicks before scrolling")
+            return False
+        
         # Keep scrolling if downloaded percentage is above threshold
         # This will continuously scroll until finding new content
         if stats['downloaded_percentage'] >= scroll_threshold:
-            print(f"Download completion {stats['downloaded_percentage']:.1f}%, scrolling...")
-            self.scroll_down(amount=scroll_amount)  # Use configurable scroll amount
+            log.throttled('scrolling', 5.0, f"Download completion {stats['downloaded_percentage']:.1f}%, scrolling...")
+            self.scroll_down(amount=scroll_amount, source_frame=source_frame)  # Use configurable scroll amount
+            self.last_action = 'scroll'
             return True
                 
         return False
\ No newline at end of file
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import platform
+import time
+from threading import Event
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.peaks import find_peaks, greedy_suppress
+from src.log import get_logger
+from src.templates import TemplateBank
+
+log = get_logger('calibration')
+
+PROFILE_PATH = os.path.join(os.path.expanduser('~'), '.telegram_downloader', 'calibration.json')
+
+# Scores below this are not considered at all during calibration
+CALIBRATION_FLOOR = 0.3
+# A location is a real icon when its best template scores at least this
+ICON_SCORE = 0.7
+
+
+class CalibrationProfile:
+    """Measured detection settings for one display/DPI/theme combination."""
+
+    def __init__(self, key: str, scale: float, thresholds: Dict[str, float],
+                 margins: Dict[str, Optional[float]], frames: int = 0, created: Optional[float] = None):
+        self.key = key
+        self.scale = scale
+        self.thresholds = thresholds
+        # Gap between the weakest true match and the strongest impostor per template
+        self.margins = margins
+        self.frames = frames
+        self.created = created if created is not None else time.time()
+
+    def is_usable(self) -> bool:
+        return any(margin is not None for margin in self.margins.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self.key,
+            'scale': self.scale,
+            'thresholds': self.thresholds,
+            'margins': self.margins,
+            'frames': self.frames,
+            'created': self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CalibrationProfile':
+        return cls(
+            key=data['key'],
+            scale=float(data['scale']),
+            thresholds={name: float(value) for name, value in data['thresholds'].items()},
+            margins=data.get('margins', {}),
+            frames=data.get('frames', 0),
+            created=data.get('created'),
+        )
+
+
+class ProfileStore:
+    """JSON file of calibration profiles keyed by ``profile_key``."""
+
+    def __init__(self, path: str = PROFILE_PATH):
+        self.path = path
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read calibration profiles from {self.path}: {e}")
+            return {}
+
+    def load(self, key: str) -> Optional[CalibrationProfile]:
+        data = self._read().get(key)
+        return CalibrationProfile.from_dict(data) if data else None
+
+    def save(self, profile: CalibrationProfile):
+        profiles = self._read()
+        profiles[profile.key] = profile.to_dict()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def detect_theme(gray: np.ndarray) -> str:
+    return 'dark' if np.median(gray) < 128 else 'light'
+
+
+def display_dpi() -> int:
+    """System DPI where the OS exposes it, 96 (100%) otherwise."""
+    if platform.system() == 'Windows':
+        try:
+            import ctypes
+            return int(ctypes.windll.user32.GetDpiForSystem())
+        except Exception:
+            pass
+    return 96
+
+
+def monitor_geometry(region: dict) -> dict:
+    """The monitor containing the region's top-left corner, or the region itself."""
+    try:
+        import mss
+        with mss.mss() as sct:
+            for monitor in sct.monitors[1:]:
+                if (monitor['left'] <= region['left'] < monitor['left'] + monitor['width']
+                        and monitor['top'] <= region['top'] < monitor['top'] + monitor['height']):
+                    return monitor
+    except Exception:
+        pass
+    return region
+
+
+def profile_key(region: dict, gray: np.ndarray, dpi: Optional[int] = None) -> str:
+    monitor = monitor_geometry(region)
+    dpi = dpi if dpi is not None else display_dpi()
+    return (f"{monitor['width']}x{monitor['height']}+{monitor['left']}+{monitor['top']}"
+            f"/dpi{dpi}/{detect_theme(gray)}")
+
+
+def _frame_peaks(gray: np.ndarray, templates: Dict[str, np.ndarray], floor: float) -> list:
+    """All template peaks of one frame as (score, name, center_x, center_y), best first."""
+    peaks = []
+    for name, template in templates.items():
+        h, w = template.shape
+        if h > gray.shape[0] or w > gray.shape[1]:
+            continue
+        scores = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+        for x, y, score in find_peaks(scores, floor, template.shape, max_peaks=200):
+            peaks.append((score, name, x + w // 2, y + h // 2))
+    peaks.sort(key=lambda p: (-p[0], p[1], p[3], p[2]))
+    return peaks
+
+
+def calibrate(bank: TemplateBank, frames: List[np.ndarray], key: str,
+              default_threshold: float = 0.5, floor: float = CALIBRATION_FLOOR,
+              stop_event: Optional[Event] = None) -> Optional[CalibrationProfile]:
+    """Measure the display scale and per-template thresholds on gray frames.
+
+    Peaks of all templates are grouped by location. In a group whose best
+    score reaches ``ICON_SCORE`` the winning template scores a true match and
+    the others an impostor score; weaker groups are background and count as
+    impostors for everyone. Each threshold sits halfway between the weakest
+    true match and the strongest impostor of its template. Returns None when
+    ``stop_event`` is set before the frames have been measured.
+    """
+    best_per_scale = {scale: [] for scale in bank.scales}
+    observations = {scale: {} for scale in bank.scales}
+
+    for gray in frames:
+        for scale in bank.scales:
+            # Each scale is a full-frame match per template
+            if stop_event is not None and stop_event.is_set():
+                return None
+            templates = bank.templates_for(scale)
+            peaks = _frame_peaks(gray, templates, floor)
+            best_per_scale[scale].append(peaks[0][0] if peaks else 0.0)
+            if not peaks:
+                continue
+
+            size = max(max(t.shape) for t in templates.values())
+            xs = np.array([p[2] for p in peaks])
+            ys = np.array([p[3] for p in peaks])
+            heads = greedy_suppress(xs, ys, size, size)
+            stats = observations[scale]
+            for head in heads:
+                head_score, head_name, hx, hy = peaks[head]
+                group = {}
+                for score, name, x, y in peaks:
+                    if abs(x - hx) < size and abs(y - hy) < size:
+                        group.setdefault(name, score)
+                for name, score in group.items():
+                    entry = stats.setdefault(name, {'true': [], 'impostor': []})
+                    if name == head_name and head_score >= ICON_SCORE:
+                        entry['true'].append(score)
+                    else:
+                        entry['impostor'].append(score)
+
+    means = {scale: float(np.mean(scores)) for scale, scores in best_per_scale.items() if scores}
+    scale = max(means, key=means.get) if means else 1.0
+
+    thresholds = {}
+    margins = {}
+    for name in bank.templates_for(scale):
+        entry = observations[scale].get(name, {'true': [], 'impostor': []})
+        if not entry['true']:
+            thresholds[name] = default_threshold
+            margins[name] = None
+            continue
+        weakest_true = min(entry['true'])
+        strongest_impostor = max(entry['impostor'], default=floor)
+        margins[name] = weakest_true - strongest_impostor
+        if weakest_true > strongest_impostor:
+            thresholds[name] = min(0.99, (weakest_true + strongest_impostor) / 2)
+        else:
+            # Not separable on these frames; keep every true match
+            thresholds[name] = max(floor, weakest_true - 0.01)
+    return CalibrationProfile(key, scale, thresholds, margins, frames=len(frames))
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import glob
+import os
+import threading
+from typing import List, Optional, Union
+
+import cv2
+import mss
+import numpy as np
+
+from src.log import get_logger
+
+log = get_logger('capture')
+
+
+class FrameSource:
+    """Base class for anything that can produce frames for a screen region.
+
+    ``grab`` returns an ``(height, width, channels)`` uint8 array in BGRA or
+    BGR channel order for the requested region. Sources that know when a
+    frame was captured better than the caller (recordings) set
+    ``frame_time`` in seconds on a monotonic clock. ``live`` sources show
+    the screen as it is now, so a grab right after a click shows its
+    effect; sources that replay stored frames clear it.
+    """
+
+    frame_time = None
+    live = True
+
+    def grab(self, region: dict) -> np.ndarray:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MssFrameSource(FrameSource):
+    """Persistent mss grabber, one instance per thread.
+
+    Creating ``mss.mss()`` opens a display connection (X11) or device
+    contexts (GDI) and costs several milliseconds, so each thread keeps its
+    own instance alive for the lifetime of the source. mss handles are not
+    safe to share between threads, hence the thread-local storage.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def _get_sct(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def grab(self, region: dict) -> np.ndarray:
+        screenshot = self._get_sct().grab(region)
+        # Zero-copy BGRA view over the mss buffer (valid until the next grab)
+        return np.asarray(screenshot)
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            try:
+                sct.close()
+            except Exception as e:
+                log.warning(f"Error closing capture instance: {e}")
+        self._local = threading.local()
+
+
+class FileFrameSource(FrameSource):
+    """Replays frames from image files for headless runs.
+
+    ``paths`` may be a directory, a glob pattern or a list of files. Each
+    ``grab`` returns the next frame. Frames that already have the region's
+    size are returned as-is; larger frames are treated as full-screen
+    captures and cropped to the region.
+    """
+
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+    live = False
+
+    def __init__(self, paths: Union[str, List[str]], loop: bool = True, cache: bool = True):
+        self.paths = self._resolve_paths(paths)
+        if not self.paths:
+            raise ValueError(f"No frames found for: {paths}")
+        self.loop = loop
+        self.cache = cache
+        self.index = 0
+        self._frames = {}
+
+    @classmethod
+    def _resolve_paths(cls, paths) -> List[str]:
+        if isinstance(paths, (list, tuple)):
+            return list(paths)
+        if os.path.isdir(paths):
+            return sorted(
+                os.path.join(paths, f) for f in os.listdir(paths)
+                if f.lower().endswith(cls.IMAGE_EXTENSIONS)
+            )
+        return sorted(glob.glob(paths))
+
+    def _load(self, path: str) -> np.ndarray:
+        frame = self._frames.get(path)
+        if frame is None:
+            frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if frame is None:
+                raise IOError(f"Could not read frame: {path}")
+            if self.cache:
+                self._frames[path] = frame
+        return frame
+
+    def next_frame(self) -> Optional[np.ndarray]:
+        if self.index >= len(self.paths):
+            if not self.loop:
+                return None
+            self.index = 0
+        frame = self._load(self.paths[self.index])
+        self.index += 1
+        return frame
+
+    def grab(self, region: dict) -> np.ndarray:
+        frame = self.next_frame()
+        if frame is None:
+            raise EOFError("No more frames to replay")
+        height, width = region['height'], region['width']
+        if frame.shape[:2] == (height, width):
+            return frame
+        top, left = region.get('top', 0), region.get('left', 0)
+        crop = frame[top:top + height, left:left + width]
+        if crop.shape[:2] != (height, width):
+            raise ValueError(
+                f"Region {region} is outside the {frame.shape[1]}x{frame.shape[0]} replay frame"
+            )
+        return crop
+
+    def close(self):
+        self._frames.clear()
+
+
+class ArrayFrameSource(FrameSource):
+    """Replays in-memory frames, e.g. synthetic frames in benchmarks."""
+
+    live = False
+
+    def __init__(self, frames: List[np.ndarray], loop: bool = True):
+        if not frames:
+            raise ValueError("ArrayFrameSource needs at least one frame")
+        self.frames = list(frames)
+        self.loop = loop
+        self.index = 0
+
+    def grab(self, region: dict) -> np.ndarray:
+        if self.index >= len(self.frames):
+            if not self.loop:
+                raise EOFError("No more frames to replay")
+            self.index = 0
+        frame = self.frames[self.index]
+        self.index += 1
+        return frame
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def locator_template(templates: Dict[str, np.ndarray]) -> np.ndarray:
+    """Mean of same-sized state templates: the button frame they all share."""
+    stack = np.stack([t.astype(np.float32) for t in templates.values()])
+    return np.round(stack.mean(axis=0)).astype(np.uint8)
+
+
+def block_mean(patches: np.ndarray, size: int) -> np.ndarray:
+    """Area-downsample ``(n, h, w)`` patches to ``(n, size, size)`` in one vectorized pass."""
+    n, h, w = patches.shape
+    rows = np.linspace(0, h, size + 1).astype(int)[:-1]
+    cols = np.linspace(0, w, size + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(patches.astype(np.float32), rows, axis=1), cols, axis=2)
+    counts = np.outer(np.diff(np.append(rows, h)), np.diff(np.append(cols, w)))
+    return sums / counts
+
+
+def normalize(patches: np.ndarray, size: int) -> np.ndarray:
+    """Zero-mean, unit-norm downsampled patches as rows of an ``(n, size * size)`` matrix."""
+    vectors = block_mean(patches, size).reshape(len(patches), -1)
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def crop_patches(gray: np.ndarray, points: List[Tuple[int, int]], shape: Tuple[int, int]) -> np.ndarray:
+    """``(n, h, w)`` crops at top-left ``points``, gathered without a Python loop."""
+    windows = sliding_window_view(gray, shape)
+    xs = np.array([x for x, _ in points])
+    ys = np.array([y for _, y in points])
+    return windows[ys, xs]
+
+
+class PatchClassifier:
+    """Nearest-neighbor state classifier on normalized, downsampled patches.
+
+    Every state template becomes one ``size`` x ``size`` zero-mean unit
+    vector; a crop is assigned the state with the highest cosine
+    similarity. Patches are normalized for size, so one classifier serves
+    every display scale, and adding a state adds one row to a matrix.
+    """
+
+    def __init__(self, size: int = 16):
+        self.size = size
+        self.labels: List[str] = []
+        self.vectors = np.zeros((0, size * size), dtype=np.float32)
+
+    def fit(self, templates: Dict[str, np.ndarray]):
+        self.labels = list(templates)
+        self.vectors = np.concatenate([normalize(t[None], self.size) for t in templates.values()]) \
+            if templates else np.zeros((0, self.size * self.size), dtype=np.float32)
+
+    def classify(self, patches: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Label index and similarity of the nearest state for each of ``(n, h, w)`` patches."""
+        similarity = normalize(patches, self.size) @ self.vectors.T
+        best = similarity.argmax(axis=1)
+        return best, similarity[np.arange(len(patches)), best]
+
+
+def patch_ncc(patches: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """TM_CCOEFF_NORMED of each ``(n, h, w)`` patch against one same-sized template."""
+    t = template.astype(np.float32).ravel()
+    t -= t.mean()
+    p = patches.reshape(len(patches), -1).astype(np.float32)
+    p -= p.mean(axis=1, keepdims=True)
+    denominator = np.linalg.norm(p, axis=1) * np.linalg.norm(t)
+    return np.divide(p @ t, denominator, out=np.zeros(len(patches), dtype=np.float32),
+                     where=denominator > 0)
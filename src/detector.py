@@ -3,189 +3,410 @@ import cv2
 import numpy as np
 from PIL import Image
 from typing import List, Tuple, Optional
-import mss
 import platform
 import os
+import logging
+import time
+from src.capture import FrameSource, MssFrameSource
+from src.workspace import MatchWorkspace
+from src.incremental import DirtyTileTracker
+from src.engines import create_engine
+from src.peaks import find_peaks, greedy_suppress
+from src.pyramid import PyramidMatcher
+from src.templates import TemplateBank, DEFAULT_SCALES
+from src.parallel import MatchExecutor
+from src.tiling import match_strips
+from src.prefilter import ColorPrefilter
+from src.classifier import PatchClassifier, crop_patches, locator_template, patch_ncc
+from src.log import get_logger, debug_images
+from src.metrics import metrics
+
+log = get_logger('detector')
 
 class ImageDetector:
-    def __init__(self):
+    MODES = ('full', 'pyramid', 'tiled', 'prefilter', 'classify')
+    
+    def __init__(self, frame_source: Optional[FrameSource] = None, incremental: bool = True,
+                 engine: str = 'opencv', mode: str = 'full', scales: tuple = DEFAULT_SCALES,
+                 workers: Optional[int] = None):
+        # Templates of the active display scale (100% until a scale is locked)
         self.templates = {}
+        self.base_templates = {}
+        # Pre-resized templates per display scale; the scale is locked after a few frames
+        self.bank = TemplateBank(scales)
+        # Long-lived capture backend; mss setup is paid once, not per frame
+        self.frame_source = frame_source or MssFrameSource()
+        self.workspace = MatchWorkspace()
+        self.last_frame = None
+        # Monotonic capture time of last_frame
+        self.frame_time = None
+        # Full-frame matcher: 'opencv' (matchTemplate per template) or 'fft' (shared spectrum)
+        self.engine = create_engine(engine)
+        # 'full' scores every position; 'pyramid' matches coarse and verifies at full resolution;
+        # 'tiled' scores every position in overlapping strips spread over the executor;
+        # 'prefilter' verifies only around button-colored blobs, falling back to 'full';
+        # 'classify' locates buttons once with the shared frame and classifies each crop
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown detection mode '{mode}', expected one of: {', '.join(self.MODES)}")
+        self.mode = mode
+        self.pyramid = PyramidMatcher()
+        self.prefilter = ColorPrefilter()
+        self._prefiltered = False
+        # Mean state template per scale and the crop classifier for 'classify' mode
+        self.locators = {}
+        self.classifier = PatchClassifier()
+        # Template/scale pairs are matched concurrently; None keeps half the cores free
+        self.executor = MatchExecutor(workers)
+        # Strips per frame in tiled mode; None uses one strip per worker
+        self.tile_strips = None
+        # Upper bound on detections per template and frame
+        self.max_peaks = 50
+        # Per-template thresholds from a calibration profile
+        self.thresholds = {}
+        # Per template: [(center_x, center_y, score)] from the last detection, in reading order
+        self.last_detections = {}
+        # Display scale the last detections were matched at
+        self.last_scale = 1.0
+        # When set, a full scan in progress skips its remaining templates and reports nothing
+        self.stop_event = None
+        
+        # Incremental detection: only re-match tiles that changed since the last frame
+        self.incremental = incremental
+        self.tiles = DirtyTileTracker()
+        self._cached_results = None
+        self._cache_key = None
+        # One-shot debug image dumps already queued
+        self._debug_dumps = set()
         
     def load_templates(self, template_paths: dict):
-        print(f"Loading templates from: {template_paths}")
+        log.info("Loading templates", paths=template_paths)
+        self.tiles.reset()
+        self._cached_results = None
+        color_templates = {}
         for name, path in template_paths.items():
             # Convert path for Windows compatibility
             if platform.system() == 'Windows':
                 path = path.replace('/', '\\')
             
-            print(f"Attempting to load {name} from {path}")
             if os.path.exists(path):
-                print(f"  File exists: {path}")
                 img = cv2.imread(path)
                 if img is not None:
                     h, w = img.shape[:2]
-                    print(f"  Loaded successfully: {w}x{h} pixels")
-                    self.templates[name] = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                    log.info(f"Loaded template '{name}': {w}x{h} pixels", path=path)
+                    self.base_templates[name] = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                    color_templates[name] = img
                 else:
-                    print(f"  ERROR: cv2.imread failed for {path}")
+                    log.error(f"cv2.imread failed for template '{name}'", path=path)
             else:
-                print(f"  ERROR: File not found: {path}")
-                print(f"  Current directory: {os.getcwd()}")
-                print(f"  Directory contents: {os.listdir('.')}")
+                log.error(f"Template file not found for '{name}'", path=path, cwd=os.getcwd())
+                log.debug("Working directory contents", files=os.listdir('.'))
+        
+        self.bank.build(self.base_templates)
+        self.prefilter.learn(color_templates)
+        self.classifier.fit(self.base_templates)
+        # States can only share a locator when their templates have one size
+        self.locators = {}
+        if len({t.shape for t in self.base_templates.values()}) == 1:
+            self.locators = {scale: locator_template(self.bank.templates_for(scale)) for scale in self.bank.scales}
+        self.templates = self.bank.templates_for(1.0) or dict(self.base_templates)
+        log.reset_once('template:')
+        log.info(f"Template bank built for scales: {', '.join(f'{s:g}x' for s in self.bank.scales)}")
+    
+    def apply_profile(self, profile):
+        """Lock the display scale and thresholds measured by calibration."""
+        self.bank.lock(profile.scale)
+        self.templates = self.bank.templates_for(profile.scale)
+        self.thresholds = dict(profile.thresholds)
+        self.tiles.reset()
+        self._cached_results = None
+        log.info(f"Applied calibration profile {profile.key}: scale {profile.scale:g}x, "
+                 f"thresholds {', '.join(f'{n}={t:.2f}' for n, t in self.thresholds.items())}")
     
     def capture_region(self, region: dict) -> np.ndarray:
-        # Always create a new mss instance for each capture to avoid thread issues
+        img = self.grab(region)
+        if img.ndim == 2:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        return img
+    
+    def grab(self, region: dict) -> np.ndarray:
+        """Raw frame from the frame source, as the source hands it out."""
         try:
-            with mss.mss() as sct:
-                screenshot = sct.grab(region)
-                img = np.array(screenshot)
-                # Windows might need different color conversion
-                if platform.system() == 'Windows':
-                    return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                else:
-                    return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            with metrics.stage('capture'):
+                return self.frame_source.grab(region)
+        except EOFError:
+            # A replay ran out of frames
+            raise
         except Exception as e:
-            print(f"Error capturing region: {e}")
+            log.error(f"Error capturing region: {e}")
             raise
     
+    def capture_gray(self, region: dict) -> np.ndarray:
+        # Straight from the capture buffer into the workspace gray buffer
+        self.last_frame = self.grab(region)
+        frame_time = self.frame_source.frame_time
+        self.frame_time = time.monotonic() if frame_time is None else frame_time
+        with metrics.stage('to_gray'):
+            return self.workspace.to_gray(self.last_frame)
+    
+    def close(self):
+        self.executor.close()
+        self.frame_source.close()
+    
+    def set_engine(self, engine: str):
+        self.engine = create_engine(engine)
+        self.tiles.reset()
+        self._cached_results = None
+    
+    def _score_map(self, name: str, template: np.ndarray, gray_screen: np.ndarray) -> np.ndarray:
+        res = self.workspace.result_buffer(name, template.shape)
+        if not self.incremental or self.tiles.mask is None or name not in self.tiles.valid:
+            if self.mode == 'tiled':
+                match_strips(gray_screen, template, res, self.executor, self.tile_strips)
+            else:
+                self.engine.match(name, template, gray_screen, res)
+            self.tiles.valid.add(name)
+            return res
+        
+        # Patch only the part of the score map that sees a changed pixel;
+        # small ROIs are always matched directly, whatever the engine
+        h, w = template.shape
+        for y0, y1, x0, x1 in self.tiles.result_rects(template.shape):
+            roi = gray_screen[y0:y1 + h - 1, x0:x1 + w - 1]
+            res[y0:y1, x0:x1] = cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED)
+        return res
+    
     def detect_images(self, region: dict, threshold: float = 0.5) -> dict:
-        screen = self.capture_region(region)
-        gray_screen = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+        return self.detect_gray(self.capture_gray(region), region, threshold)
+    
+    def detect_gray(self, gray_screen: np.ndarray, region: dict, threshold: float = 0.5) -> dict:
+        """Full detection on an already captured gray frame of ``region``."""
         screen_h, screen_w = gray_screen.shape
         
-        # Platform-specific threshold adjustment
-        if platform.system() == 'Windows':
-            # Windows needs lower threshold due to rendering differences
-            threshold = threshold * 0.5  # Use 25% instead of 50%
-            print(f"Windows detected: Using lower threshold {threshold:.2f}")
+        if self.incremental:
+            cache_key = (tuple(sorted(region.items())), threshold)
+            if cache_key != self._cache_key:
+                self.tiles.reset()
+                self._cache_key = cache_key
+            dirty = self.tiles.update(gray_screen)
+            # Nothing changed on screen: reuse the previous detections
+            if dirty is not None and not dirty.any() and self._cached_results is not None:
+                self.last_detections, self.last_scale = self._cached_results
+                return {name: [(cx, cy) for cx, cy, _ in detections]
+                        for name, detections in self.last_detections.items()}
+        self.engine.begin_frame(gray_screen)
+        self.pyramid.begin_frame(gray_screen)
         
         # Debug output for first detection
-        if not hasattr(self, '_first_detection_done'):
-            print(f"Screen capture size: {screen_w}x{screen_h}")
-            print(f"Number of templates loaded: {len(self.templates)}")
-            print(f"Platform: {platform.system()}")
-            print(f"Base threshold: {threshold:.2f}")
-            # Save captured screen for debugging
-            cv2.imwrite("debug_screen_capture.jpg", screen)
-            cv2.imwrite("debug_screen_gray.jpg", gray_screen)
-            print("Saved debug images: debug_screen_capture.jpg and debug_screen_gray.jpg")
-            self._first_detection_done = True
-        
-        results = {}
-        for name, template in self.templates.items():
-            h, w = template.shape
-            
-            # Skip if template is larger than the screen region
-            if h > screen_h or w > screen_w:
-                if not hasattr(self, f'_warned_{name}'):
-                    print(f"Warning: Template '{name}' ({w}x{h}) is larger than selected region ({screen_w}x{screen_h}). Skipping.")
-                    setattr(self, f'_warned_{name}', True)
-                results[name] = []
+        if log.enabled(logging.INFO) and 'first_detection' not in self._debug_dumps:
+            self._debug_dumps.add('first_detection')
+            log.info(f"First detection: screen capture {screen_w}x{screen_h}, "
+                     f"{len(self.templates)} templates, platform {platform.system()}, "
+                     f"base threshold {threshold:.2f}")
+            # Save captured screen for debugging, written off the detection thread
+            screen = self.last_frame
+            if screen is not None:
+                if screen.ndim == 3 and screen.shape[2] == 4:
+                    screen = cv2.cvtColor(screen, cv2.COLOR_BGRA2BGR)
+                debug_images.submit("debug_screen_capture.jpg", screen)
+            debug_images.submit("debug_screen_gray.jpg", gray_screen)
+        
+        # Sweep all display scales until one is locked, then match only that one
+        scales = self.bank.candidate_scales()
+        jobs = [(scale, name, template)
+                for scale in scales
+                for name, template in self.bank.templates_for(scale).items()]
+        
+        # Color candidates need the color frame; without one (or with too many
+        # blobs) this frame takes the full-frame path
+        self._prefiltered = False
+        if self.mode == 'prefilter' and self.last_frame is not None and self.last_frame.ndim == 3 \
+                and self.last_frame.shape[:2] == gray_screen.shape:
+            self._prefiltered = self.prefilter.begin_frame(self.last_frame, [t.shape for _, _, t in jobs])
+        if self._prefiltered:
+            # Score maps are not kept up to date on prefiltered frames
+            self.tiles.valid.clear()
+        
+        def run(job):
+            if self._stopped():
+                return []
+            scale, name, template = job
+            # Calibrated per-template thresholds win over the generic one
+            return self._detect_template(name, scale, template, gray_screen,
+                                         region, self.thresholds.get(name, threshold))
+        
+        if self.mode == 'classify' and not self.locators and self.base_templates:
+            log.once("template:classify_fallback",
+                     "Classify mode needs state templates of one size; matching every template instead",
+                     sizes=sorted({t.shape for t in self.base_templates.values()}), level=logging.WARNING)
+        if self.mode == 'classify' and self.locators:
+            # One locate pass per scale instead of one pass per template
+            outputs = self.executor.map(
+                lambda scale: {} if self._stopped() else self._classify_scale(scale, gray_screen, region, threshold),
+                scales)
+            per_scale = dict(zip(scales, outputs))
+        else:
+            # In tiled mode the pool runs strips, so templates go one after another
+            if self.mode == 'tiled':
+                outputs = [run(job) for job in jobs]
+            else:
+                outputs = self.executor.map(run, jobs)
+            per_scale = {scale: {} for scale in scales}
+            for (scale, name, _), detections in zip(jobs, outputs):
+                per_scale[scale][name] = detections
+        if self._stopped():
+            # Skipped templates left their score maps behind the tile tracker; the
+            # partial detections must not lock a scale or be reused
+            self.tiles.reset()
+            self._cached_results = None
+            self.last_detections = {}
+            return {name: [] for name in self.templates}
+        best_scores = {
+            scale: max((score for d in detections.values() for _, _, score in d), default=0.0)
+            for scale, detections in per_scale.items()
+        }
+        
+        chosen = scales[0]
+        if len(scales) > 1:
+            chosen = max(best_scores, key=best_scores.get)
+            locked = self.bank.observe(best_scores, threshold)
+            if locked is not None:
+                log.info(f"Display scale locked at {locked:g}x")
+                self.templates = self.bank.templates_for(locked)
+        
+        self.last_detections = per_scale.get(chosen, {})
+        self.last_scale = chosen
+        results = {name: [(cx, cy) for cx, cy, _ in detections]
+                   for name, detections in self.last_detections.items()}
+        
+        if self.incremental:
+            self._cached_results = (self.last_detections, chosen)
+        return results
+    
+    def _stopped(self) -> bool:
+        return self.stop_event is not None and self.stop_event.is_set()
+    
+    def _classify_scale(self, scale: float, gray_screen: np.ndarray, region: dict,
+                        threshold: float) -> dict:
+        """Locate buttons with the scale's locator template, then classify each crop."""
+        templates = self.bank.templates_for(scale)
+        detections = {name: [] for name in templates}
+        locator = self.locators[scale]
+        h, w = locator.shape
+        if h > gray_screen.shape[0] or w > gray_screen.shape[1]:
+            return detections
+        
+        key = f"locator@{scale:g}"
+        with metrics.stage('match'):
+            res = self._score_map(key, locator, gray_screen)
+        with metrics.stage('peaks'):
+            peaks = find_peaks(res, threshold, locator.shape, max_peaks=self.max_peaks * len(templates),
+                               scratch=self.workspace.scratch_buffer(key, res.shape))
+        if not peaks:
+            return detections
+        
+        points = [(x, y) for x, y, _ in peaks]
+        with metrics.stage('classify'):
+            patches = crop_patches(gray_screen, points, locator.shape)
+            labels, _ = self.classifier.classify(patches)
+        for index, name in enumerate(self.classifier.labels):
+            chosen = np.flatnonzero(labels == index)
+            if not len(chosen) or name not in templates:
                 continue
+            # The reported score is the state template's own NCC at the located spot
+            scores = patch_ncc(patches[chosen], templates[name])
+            accept = self.thresholds.get(name, threshold)
+            detections[name] = sorted(
+                ((points[i][0] + w // 2 + region['left'], points[i][1] + h // 2 + region['top'], float(score))
+                 for i, score in zip(chosen, scores) if score >= accept),
+                key=lambda d: (d[1], d[0]),
+            )
+        return detections
+    
+    def _detect_template(self, name: str, scale: float, template: np.ndarray, gray_screen: np.ndarray,
+                         region: dict, actual_threshold: float) -> List[Tuple[int, int, float]]:
+        # Score maps and caches are per template and scale
+        key = f"{name}@{scale:g}"
+        screen_h, screen_w = gray_screen.shape
+        h, w = template.shape
+        
+        # Skip if template is larger than the screen region
+        if h > screen_h or w > screen_w:
+            log.once(f"template:too_large:{key}:{screen_w}x{screen_h}",
+                     f"Template '{name}' ({w}x{h}) is larger than selected region ({screen_w}x{screen_h}). Skipping.",
+                     level=logging.WARNING)
+            return []
+        
+        log.once(f"template:threshold:{key}:{actual_threshold:.3f}",
+                 f"Using threshold {actual_threshold:.3f} for '{name}' ({scale:g}x)", level=logging.DEBUG)
+        
+        # Use only TM_CCOEFF_NORMED for better accuracy
+        # Other methods give too many false positives
+        # Pyramid and prefilter matching find their peaks as they go
+        if self.mode == 'pyramid':
+            with metrics.stage('match'):
+                peaks = self.pyramid.match(key, template, gray_screen, actual_threshold, self.max_peaks)
+        elif self._prefiltered:
+            with metrics.stage('match'):
+                peaks = self.prefilter.match(template, gray_screen, actual_threshold, self.max_peaks)
+        else:
+            with metrics.stage('match'):
+                res = self._score_map(key, template, gray_screen)
+            with metrics.stage('peaks'):
+                peaks = find_peaks(res, actual_threshold, template.shape, max_peaks=self.max_peaks,
+                                   scratch=self.workspace.scratch_buffer(key, res.shape))
+        
+        if peaks:
+            log.sampled(f"scores:{key}", 20, f"{name} ({scale:g}x) matches",
+                        best_score=f"{peaks[0][2]:.3f}", found=len(peaks))
             
-            # Use only TM_CCOEFF_NORMED for better accuracy
-            # Other methods give too many false positives
-            best_method = 'TM_CCOEFF_NORMED'
-            best_method_type = cv2.TM_CCOEFF_NORMED
-            
-            res = cv2.matchTemplate(gray_screen, template, best_method_type)
-            best_score = np.max(res)
-            best_res = res
-            
-            # Use the best method result
-            res = best_res
-            
-            if res is None:
-                print(f"  WARNING: No result for {name}")
-                results[name] = []
+            # Save template comparison for first detection
+            if log.enabled(logging.INFO) and f"template:{name}" not in self._debug_dumps:
+                self._debug_dumps.add(f"template:{name}")
+                debug_images.submit(f"debug_template_{name}.jpg", template)
+        
+        # Reading order (top to bottom, left to right), like the original scan-order
+        # output; unlike score order it does not depend on float noise between
+        # equally good icons, so every mode and engine returns the same list
+        return [
+            (x + w // 2 + region['left'], y + h // 2 + region['top'], score)
+            for x, y, score in sorted(peaks, key=lambda p: (p[1], p[0]))
+        ]
+    
+    def detect_rows(self, gray_screen: np.ndarray, region: dict, row_start: int, row_end: int,
+                    threshold: float = 0.5, scale: Optional[float] = None) -> dict:
+        """Detections of icons overlapping pixel rows ``[row_start, row_end)`` only.
+        
+        Returns ``{name: [(center_x, center_y, score)]}`` in reading order, at the
+        scale of the last detection unless ``scale`` is given. Used to scan just
+        the strip a scroll revealed; does not touch ``last_detections``.
+        """
+        scale = self.last_scale if scale is None else scale
+        screen_h, screen_w = gray_screen.shape
+        detections = {}
+        for name, template in self.bank.templates_for(scale).items():
+            h, w = template.shape
+            # Top-left rows whose icon reaches into the strip
+            y0, y1 = max(0, row_start - h + 1), min(screen_h - h + 1, row_end)
+            if y1 <= y0 or w > screen_w:
+                detections[name] = []
                 continue
-            
-            # Debug output - show all scores above 0.1 for debugging
-            if best_score > 0.1:
-                print(f"  {name}: best_score = {best_score:.3f} using {best_method}")
-                
-                # Save template comparison for first detection
-                if not hasattr(self, f'_saved_{name}'):
-                    cv2.imwrite(f"debug_template_{name}.jpg", template)
-                    setattr(self, f'_saved_{name}', True)
-            
-            # Use appropriate threshold for TM_CCOEFF_NORMED
-            # This method works best for icon detection
-            actual_threshold = 0.5  # Moderate threshold for CCOEFF
-            
-            if not hasattr(self, f'_thresh_debug_{name}'):
-                print(f"    Using threshold: {actual_threshold:.3f} for method {best_method}")
-                setattr(self, f'_thresh_debug_{name}', True)
-            
-            # For SQDIFF_NORMED, we need to find minimums
-            if best_method_type == cv2.TM_SQDIFF_NORMED:
-                # For SQDIFF, find values below threshold (lower is better in original res)
-                loc = np.where(res <= actual_threshold)
-                if not hasattr(self, f'_debug_{name}'):
-                    print(f"    SQDIFF: Looking for values <= {actual_threshold:.3f}")
-                    print(f"    Min value in res: {np.min(res):.3f}, Max: {np.max(res):.3f}")
-                    setattr(self, f'_debug_{name}', True)
-            else:
-                # For other methods, find values above threshold (higher is better)
-                loc = np.where(res >= actual_threshold)
-                if not hasattr(self, f'_debug_{name}'):
-                    print(f"    Looking for values >= {actual_threshold:.3f}")
-                    print(f"    Max value in res: {np.max(res):.3f}, Min: {np.min(res):.3f}")
-                    print(f"    Number of pixels above threshold: {np.sum(res >= actual_threshold)}")
-                    setattr(self, f'_debug_{name}', True)
-            
-            matches = []
-            raw_points = list(zip(*loc[::-1]))
-            
-            # Debug: show raw match count
-            if raw_points and not hasattr(self, f'_raw_debug_{name}'):
-                print(f"    Raw matches found: {len(raw_points)}")
-                if len(raw_points) > 30:
-                    print(f"    Reducing to top matches...")
-                    # Get scores for each point and sort by score
-                    point_scores = []
-                    for pt in raw_points[:500]:  # Limit to first 500 to avoid memory issues
-                        if pt[1] < res.shape[0] and pt[0] < res.shape[1]:
-                            point_scores.append((pt, res[pt[1], pt[0]]))
-                    
-                    # Sort by score (higher is better for CCOEFF)
-                    point_scores.sort(key=lambda x: x[1], reverse=True)
-                    
-                    # Take only top 10 matches for more accuracy
-                    raw_points = [ps[0] for ps in point_scores[:10]]
-                    print(f"    Reduced to top 10 matches by score")
-                setattr(self, f'_raw_debug_{name}', True)
-            
-            for pt in raw_points:
-                center_x = pt[0] + w // 2 + region['left']
-                center_y = pt[1] + h // 2 + region['top']
-                matches.append((center_x, center_y))
-            
-            if matches:
-                before_dedup = len(matches)
-                matches = self._remove_duplicates(matches)
-                if matches:  # After removing duplicates
-                    print(f"    Found {len(matches)} {name} image(s) (was {before_dedup} before deduplication)")
-            
-            results[name] = matches
-            
-        return results
+            res = cv2.matchTemplate(gray_screen[y0:y1 + h - 1], template, cv2.TM_CCOEFF_NORMED)
+            peaks = find_peaks(res, self.thresholds.get(name, threshold), template.shape, max_peaks=self.max_peaks)
+            detections[name] = [
+                (x + w // 2 + region['left'], y0 + y + h // 2 + region['top'], score)
+                for x, y, score in sorted(peaks, key=lambda p: (p[1], p[0]))
+            ]
+        return detections
     
     def _remove_duplicates(self, matches: List[Tuple[int, int]], threshold: int = 30) -> List[Tuple[int, int]]:
+        # Keeps the first of any points closer than threshold on both axes
         if not matches:
             return []
-        
-        unique_matches = []
-        for match in matches:
-            is_duplicate = False
-            for unique in unique_matches:
-                if abs(match[0] - unique[0]) < threshold and abs(match[1] - unique[1]) < threshold:
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                unique_matches.append(match)
-        
-        return unique_matches
+        points = np.asarray(matches)
+        keep = greedy_suppress(points[:, 0], points[:, 1], threshold, threshold)
+        return [matches[i] for i in keep]
     
     def get_detection_stats(self, results: dict) -> dict:
         # Count each type of image
@@ -206,9 +427,9 @@ class ImageDetector:
         # Calculate percentage based on downloaded (completed) images only
         if total > 0:
             stats['downloaded_percentage'] = (downloaded_count / total) * 100
-            # Debug output
-            print(f"Stats - Total: {total}, Downloaded: {downloaded_count}, Downloading: {downloading_count}, Not Downloaded: {not_downloaded_count}")
-            print(f"Downloaded percentage: {stats['downloaded_percentage']:.1f}%")
+            log.sampled('stats', 10, "Stats", total=total, downloaded=downloaded_count,
+                        downloading=downloading_count, not_downloaded=not_downloaded_count,
+                        percentage=f"{stats['downloaded_percentage']:.1f}%")
         else:
             stats['downloaded_percentage'] = 0
             
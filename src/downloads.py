@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Defaults for the download cap and click rate, also the control panel's initial slider values
+MAX_IN_FLIGHT = 5
+CLICKS_PER_SECOND = 2.0
+
+
+class TokenBucket:
+    """Allows ``rate`` events per second on average and bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.tokens = self.capacity
+        self._updated = None
+
+    def _refill(self, now: float):
+        if self._updated is not None and now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        if self._updated is None or now > self._updated:
+            self._updated = now
+
+    def available(self, now: float) -> int:
+        self._refill(now)
+        return int(self.tokens)
+
+    def take(self, count: int, now: float) -> int:
+        """Take up to ``count`` whole tokens; returns how many were taken."""
+        taken = min(count, self.available(now))
+        self.tokens -= taken
+        return taken
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until the next whole token is available."""
+        self._refill(now)
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class DownloadScheduler:
+    """Decides which of the visible ``not_downloaded`` items to click now.
+
+    Items wait in a queue, top of the region first. The live ``downloading``
+    count is the number of downloads in flight: no more are started while
+    it is at ``max_in_flight``, so Telegram is not left with dozens of
+    parallel downloads starving each other. Clicks are paced by a token
+    bucket at ``clicks_per_second`` with bursts of up to ``burst``.
+
+    Time comes from the caller (frame capture times), so a replay makes the
+    same decisions. Settings may be changed from the UI thread at any time.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, clicks_per_second: float = CLICKS_PER_SECOND,
+                 burst: int = 3):
+        self._lock = threading.Lock()
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(clicks_per_second, burst)
+        self.pending: List[Tuple[int, int]] = []
+
+    def configure(self, max_in_flight: Optional[int] = None, clicks_per_second: Optional[float] = None):
+        with self._lock:
+            if max_in_flight is not None:
+                self.max_in_flight = max(1, int(max_in_flight))
+            if clicks_per_second is not None:
+                self.bucket.rate = clicks_per_second
+
+    def reset(self):
+        with self._lock:
+            self.pending = []
+            self.bucket.reset()
+
+    def admit(self, targets: List[Tuple[int, int]], in_flight: int, now: Optional[float] = None) -> List[Tuple[int, int]]:
+        """Queue this frame's ``not_downloaded`` items and return the ones to click now."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            # Positions from earlier frames may be stale (scrolled); the frame's own list replaces them
+            self.pending = sorted(targets, key=lambda p: (p[1], p[0]))
+            slots = self.max_in_flight - in_flight
+            if slots <= 0 or not self.pending:
+                return []
+            count = self.bucket.take(min(slots, len(self.pending)), now)
+            admitted, self.pending = self.pending[:count], self.pending[count:]
+            return admitted
+
+    def ready_in(self, in_flight: int, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until a queued item may be clicked; None while the cap holds them back."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self.pending or in_flight >= self.max_in_flight:
+                return None
+            return self.bucket.ready_in(now)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Dict
+
+import cv2
+import numpy as np
+
+
+class MatchEngine:
+    """Computes full-frame TM_CCOEFF_NORMED score maps.
+
+    ``begin_frame`` is called once per captured frame before any ``match``
+    call, so engines can share per-frame work between templates.
+    """
+
+    name = ''
+
+    def begin_frame(self, gray: np.ndarray):
+        pass
+
+    def match(self, name: str, template: np.ndarray, gray: np.ndarray, result: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class OpenCVEngine(MatchEngine):
+    """One ``cv2.matchTemplate`` pass per template."""
+
+    name = 'opencv'
+
+    def match(self, name, template, gray, result):
+        return cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED, result=result)
+
+
+class FFTEngine(MatchEngine):
+    """Frequency-domain correlation shared across all templates.
+
+    The frame spectrum and its integral images are computed once per frame.
+    Template spectra depend only on the padded DFT size, so they are cached
+    across frames and rebuilt only when the region size changes. Each
+    template then costs one spectrum product and one inverse DFT.
+    Normalization follows OpenCV's TM_CCOEFF_NORMED, including its handling
+    of flat windows, so scores agree with ``cv2.matchTemplate`` to float
+    precision.
+    """
+
+    name = 'fft'
+
+    def __init__(self):
+        self._gray = None
+        self._spectrum = None
+        self._dft_size = None
+        self._integrals = None
+        self._window_norms = {}
+        self._template_cache = {}
+        # Templates may be matched on several threads; lazy per-frame state is shared
+        self._lock = threading.Lock()
+
+    def begin_frame(self, gray: np.ndarray):
+        # Spectrum and integrals are computed lazily, on the first full match
+        self._gray = gray
+        self._spectrum = None
+        self._integrals = None
+        self._window_norms = {}
+
+    def _frame_spectrum(self) -> np.ndarray:
+        with self._lock:
+            return self._compute_frame_spectrum()
+
+    def _compute_frame_spectrum(self) -> np.ndarray:
+        if self._spectrum is None:
+            height, width = self._gray.shape
+            dft_size = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+            if dft_size != self._dft_size:
+                self._dft_size = dft_size
+                self._template_cache = {}
+            padded = np.zeros(dft_size, dtype=np.float32)
+            # The template is zero-mean, so removing the frame mean leaves the
+            # correlation unchanged and keeps float32 round-off small
+            padded[:height, :width] = self._gray
+            padded[:height, :width] -= padded[:height, :width].mean()
+            self._spectrum = cv2.dft(padded)
+        return self._spectrum
+
+    def _template_spectrum(self, name: str, template: np.ndarray):
+        with self._lock:
+            return self._compute_template_spectrum(name, template)
+
+    def _compute_template_spectrum(self, name: str, template: np.ndarray):
+        cached = self._template_cache.get(name)
+        if cached is not None and cached[0] is template:
+            return cached[1], cached[2]
+
+        h, w = template.shape
+        centered = template.astype(np.float64) - template.mean()
+        norm = float(np.sqrt(np.sum(centered * centered)))
+        padded = np.zeros(self._dft_size, dtype=np.float32)
+        padded[:h, :w] = centered
+        spectrum = cv2.dft(padded)
+        self._template_cache[name] = (template, spectrum, norm)
+        return spectrum, norm
+
+    def _window_norm(self, h: int, w: int) -> np.ndarray:
+        """sqrt of the per-window sum of squared deviations, shared by same-size templates."""
+        with self._lock:
+            return self._compute_window_norm(h, w)
+
+    def _compute_window_norm(self, h: int, w: int) -> np.ndarray:
+        norm = self._window_norms.get((h, w))
+        if norm is None:
+            if self._integrals is None:
+                self._integrals = cv2.integral2(self._gray, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+            total, squares = self._integrals
+            height, width = self._gray.shape
+            res_h, res_w = height - h + 1, width - w + 1
+
+            def window_sum(integral):
+                return (integral[h:h + res_h, w:w + res_w] - integral[:res_h, w:w + res_w]
+                        - integral[h:h + res_h, :res_w] + integral[:res_h, :res_w])
+
+            sums = window_sum(total)
+            sums2 = window_sum(squares)
+            variance = cv2.subtract(sums2, cv2.multiply(sums, sums, scale=1.0 / (h * w)))
+            # Same cut-off as OpenCV: near-flat windows get a zero denominator
+            cutoff = np.minimum(sums2 * (10 * np.finfo(np.float32).eps), 0.5)
+            variance[variance <= cutoff] = 0
+            norm = cv2.sqrt(variance).astype(np.float32)
+            self._window_norms[(h, w)] = norm
+        return norm
+
+    def match(self, name, template, gray, result):
+        if gray is not self._gray:
+            self.begin_frame(gray)
+        h, w = template.shape
+        height, width = gray.shape
+        res_h, res_w = height - h + 1, width - w + 1
+
+        frame_spectrum = self._frame_spectrum()
+        template_spectrum, template_norm = self._template_spectrum(name, template)
+        if template_norm < np.finfo(np.float64).eps:
+            # A flat template correlates perfectly with everything (OpenCV behavior)
+            result.fill(1)
+            return result
+
+        product = cv2.mulSpectrums(frame_spectrum, template_spectrum, 0, conjB=True)
+        correlation = cv2.idft(product, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+        numerator = correlation[:res_h, :res_w]
+        denominator = self._window_norm(h, w) * np.float32(template_norm)
+
+        cv2.divide(numerator, denominator, dst=result)
+        # Flat windows score 0, as in OpenCV
+        result[denominator == 0] = 0
+        low, high, _, _ = cv2.minMaxLoc(result)
+        if low <= -1.125 or high >= 1.125:
+            # OpenCV zeroes scores that overshoot by more than 12.5%...
+            result[np.abs(result) >= 1.125] = 0
+        # ...and clamps the remaining overshoot to +-1
+        np.clip(result, -1, 1, out=result)
+        return result
+
+
+ENGINES: Dict[str, type] = {
+    OpenCVEngine.name: OpenCVEngine,
+    FFTEngine.name: FFTEngine,
+}
+
+
+def create_engine(name: str) -> MatchEngine:
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown match engine '{name}', expected one of: {', '.join(ENGINES)}")
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class DirtyTileTracker:
+    """Finds the tiles of a gray frame that changed since the previous frame.
+
+    The previous frame is kept in a private buffer. ``update`` diffs the new
+    frame against it and returns a boolean ``(tile_rows, tile_cols)`` mask,
+    or ``None`` when there is nothing to compare against (first frame,
+    region change) and everything must be treated as dirty.
+
+    ``valid`` holds the keys of score maps that are up to date with the
+    previous frame, so callers can patch only the dirty part of them.
+    """
+
+    def __init__(self, tile_size: int = 64, diff_threshold: int = 0, max_dirty_ratio: float = 0.5):
+        self.tile_size = tile_size
+        # Screen captures are lossless, so by default any changed pixel counts
+        self.diff_threshold = diff_threshold
+        # Above this share of dirty tiles a full pass is cheaper than patching
+        self.max_dirty_ratio = max_dirty_ratio
+        self.prev = None
+        self.mask = None
+        self.valid = set()
+        self._diff = None
+
+    def reset(self):
+        self.prev = None
+        self.mask = None
+        self.valid.clear()
+
+    def update(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        if self.prev is None or self.prev.shape != gray.shape:
+            self.prev = gray.copy()
+            self._diff = np.empty_like(gray)
+            self.valid.clear()
+            self.mask = None
+            return None
+
+        cv2.absdiff(gray, self.prev, dst=self._diff)
+        height, width = gray.shape
+        row_starts = np.arange(0, height, self.tile_size)
+        col_starts = np.arange(0, width, self.tile_size)
+        # Per-tile max of the diff, ragged edge tiles included
+        tile_max = np.maximum.reduceat(
+            np.maximum.reduceat(self._diff, row_starts, axis=0), col_starts, axis=1
+        )
+        np.copyto(self.prev, gray)
+
+        mask = tile_max > self.diff_threshold
+        if mask.mean() > self.max_dirty_ratio:
+            self.mask = None
+        else:
+            self.mask = mask
+        return self.mask
+
+    def result_rects(self, template_shape: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+        """Score-map rectangles ``(y0, y1, x0, x1)`` affected by the dirty tiles.
+
+        A score at ``(y, x)`` depends on frame pixels ``[y, y + h) x [x, x + w)``,
+        so each dirty block is grown up and left by the template size.
+        """
+        if self.mask is None or not self.mask.any():
+            return []
+
+        h, w = template_shape[:2]
+        height, width = self.prev.shape
+        res_h, res_w = height - h + 1, width - w + 1
+        size = self.tile_size
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(self.mask.astype(np.uint8), connectivity=8)
+        rects = []
+        for tx, ty, tw, th, _ in stats[1:count]:
+            y0 = max(0, ty * size - h + 1)
+            x0 = max(0, tx * size - w + 1)
+            y1 = min(res_h, (ty + th) * size)
+            x1 = min(res_w, (tx + tw) * size)
+            if y1 > y0 and x1 > x0:
+                rects.append((int(y0), int(y1), int(x0), int(x1)))
+        return rects
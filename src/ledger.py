@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.log import get_logger
+
+log = get_logger('ledger')
+
+STATES = ('not_downloaded', 'downloading', 'downloaded')
+
+
+class ContentLedger:
+    """Every download button seen in a session, in content coordinates.
+
+    A button at screen ``(x, y)`` sits at content ``(x, y - top + offset)``,
+    ``offset`` being the scroll accumulated by the tracker, so it keeps its
+    ledger entry while the chat scrolls past. Entries live in fixed-size
+    arrays: position, current state, when the button was first seen in each
+    state (its state history), when it was last seen and last clicked.
+
+    Memory is bounded by ``capacity``. When it is full, the entry seen
+    longest ago (scrolled far away) is retired into per-state totals.
+    Entries inside the region that have not been detected for
+    ``forget_after`` seconds are dropped (deleted messages, false matches).
+    Times are frame capture times, so a replay fills the same ledger.
+    """
+
+    def __init__(self, capacity: int = 4096, tolerance: int = 20, forget_after: float = 5.0,
+                 reclick_after: float = 30.0, retry_after: float = 2.0, max_retries: int = 1):
+        self.capacity = capacity
+        # Detections closer than this on both axes are the same button
+        self.tolerance = tolerance
+        self.forget_after = forget_after
+        # A clicked button that still shows as not downloaded is clicked again after this long
+        self.reclick_after = reclick_after
+        # or after this long when the click was not confirmed (see requeue), up to max_retries times
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        # Index into STATES, -1 for a free slot
+        self.state = np.full(capacity, -1, dtype=np.int8)
+        self.entered = np.full((capacity, len(STATES)), np.nan)
+        self.last_seen = np.zeros(capacity)
+        self.clicked_at = np.full(capacity, np.nan)
+        # The last click was not confirmed and is to be retried; unconfirmed clicks so far
+        self.retry = np.zeros(capacity, dtype=bool)
+        self.unconfirmed = np.zeros(capacity, dtype=np.int8)
+        self.reset()
+
+    def reset(self):
+        self.state.fill(-1)
+        self.entered.fill(np.nan)
+        self.clicked_at.fill(np.nan)
+        self.retry.fill(False)
+        self.unconfirmed.fill(0)
+        self._free = list(range(self.capacity - 1, -1, -1))
+        # Final states of retired entries
+        self.retired = np.zeros(len(STATES), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.capacity - len(self._free)
+
+    def _band(self, offset: int, height: int) -> np.ndarray:
+        """Indices of the entries in (or within ``tolerance`` of) the visible content rows."""
+        return np.flatnonzero((self.state >= 0) & (self.y >= offset - self.tolerance) &
+                              (self.y < offset + height + self.tolerance))
+
+    def _find(self, band: np.ndarray, x: int, y: int) -> Optional[int]:
+        if not len(band):
+            return None
+        dx = np.abs(self.x[band] - x)
+        dy = np.abs(self.y[band] - y)
+        near = (dx < self.tolerance) & (dy < self.tolerance) & (self.state[band] >= 0)
+        if not near.any():
+            return None
+        candidates = band[near]
+        return int(candidates[np.argmin((dx + dy)[near])])
+
+    def _allocate(self) -> int:
+        if not self._free:
+            used = np.flatnonzero(self.state >= 0)
+            oldest = int(used[np.argmin(self.last_seen[used])])
+            self.retired[self.state[oldest]] += 1
+            self._release(oldest)
+        return self._free.pop()
+
+    def _release(self, index: int):
+        self.state[index] = -1
+        self.entered[index] = np.nan
+        self.clicked_at[index] = np.nan
+        self.retry[index] = False
+        self.unconfirmed[index] = 0
+        self._free.append(index)
+
+    def _content(self, positions, offset: int, region: dict):
+        for x, y in positions:
+            yield int(x), int(y) - region['top'] + offset
+
+    def observe(self, detections: Dict[str, list], offset: int, region: dict, now: float) -> List[float]:
+        """Record one frame's detections (screen coordinates) taken at ``offset``.
+
+        Detections are ``(x, y, score)`` (or ``(x, y)``). With loose thresholds
+        a button matches several state templates; it gets the state whose
+        template scored best there, or the most advanced one without scores.
+
+        Returns how long each button that finished downloading on this frame
+        was seen downloading (NaN if it never was); buttons that were already
+        downloaded when they came into view do not count.
+        """
+        band = self._band(offset, region['height'])
+        seen = set()
+        finished = []
+        downloading, downloaded = STATES.index('downloading'), STATES.index('downloaded')
+        matches = [(match[2] if len(match) > 2 else 0.0, code, int(match[0]), int(match[1]) - region['top'] + offset)
+                   for code, state in enumerate(STATES) for match in detections.get(state, [])]
+        # Best match first: a button's weaker matches from other templates are skipped
+        matches.sort(key=lambda match: (-match[0], -match[1]))
+        for _, code, x, y in matches:
+            index = self._find(band, x, y)
+            if index is None:
+                index = self._allocate()
+                band = np.append(band, index)
+            elif index in seen:
+                continue
+            elif code == downloaded and np.isnan(self.entered[index, downloaded]):
+                finished.append(float(now - self.entered[index, downloading]))
+            seen.add(index)
+            self.x[index], self.y[index] = x, y
+            self.state[index] = code
+            if np.isnan(self.entered[index, code]):
+                self.entered[index, code] = now
+            self.last_seen[index] = now
+        # Entries well inside the region that stopped showing up are gone
+        inside = band[(self.state[band] >= 0) & (self.y[band] >= offset + self.tolerance) &
+                      (self.y[band] < offset + region['height'] - self.tolerance)]
+        for index in inside[self.last_seen[inside] < now - self.forget_after]:
+            self._release(int(index))
+        return finished
+
+    def stats(self, offset: int, region: dict) -> dict:
+        """Counts of the buttons in view, same keys as ``ImageDetector.get_detection_stats``.
+
+        Buttons keep their last known state while a frame misses them, so the
+        completion percentage does not jump with detection noise. ``seen``
+        and ``completed`` count unique buttons over the whole session,
+        ``requeued`` the buttons in view whose unconfirmed click is to be retried.
+        """
+        band = self._band(offset, region['height'])
+        counts = np.bincount(self.state[band], minlength=len(STATES))
+        total = int(counts.sum())
+        used = self.state[self.state >= 0]
+        stats = {name: int(count) for name, count in zip(STATES, counts)}
+        stats['total'] = total
+        stats['downloaded_percentage'] = stats['downloaded'] / total * 100 if total else 0
+        stats['seen'] = int(len(used) + self.retired.sum())
+        downloaded = STATES.index('downloaded')
+        stats['completed'] = int(np.count_nonzero(used == downloaded) + self.retired[downloaded])
+        stats['requeued'] = int(np.count_nonzero(self.retry[band] & (self.state[band] == 0)))
+        return stats
+
+    def clickable(self, positions: List[Tuple[int, int]], offset: int, region: dict,
+                  now: float) -> List[Tuple[int, int]]:
+        """The positions whose buttons are not downloaded and were not clicked recently."""
+        band = self._band(offset, region['height'])
+        keep = []
+        for position, (x, y) in zip(positions, self._content(positions, offset, region)):
+            index = self._find(band, x, y)
+            if index is not None:
+                if self.state[index] != 0:
+                    continue
+                clicked = self.clicked_at[index]
+                if not np.isnan(clicked):
+                    wait = self.retry_after if self.retry[index] else self.reclick_after
+                    # Clicked again only if it was last detected (not downloaded) that long after the click
+                    if now < clicked + wait or self.last_seen[index] < clicked + wait:
+                        continue
+            keep.append(position)
+        if len(keep) < len(positions):
+            log.debug(f"Skipping {len(positions) - len(keep)} buttons already clicked or past not downloaded")
+        return keep
+
+    def mark_clicked(self, positions: List[Tuple[int, int]], offset: int, region: dict, now: float):
+        band = self._band(offset, region['height'])
+        for x, y in self._content(positions, offset, region):
+            index = self._find(band, x, y)
+            if index is not None:
+                self.clicked_at[index] = now
+                self.retry[index] = False
+
+    def requeue(self, positions: List[Tuple[int, int]], offset: int, region: dict):
+        """Clicks that were not confirmed: the buttons become clickable ``retry_after`` seconds after the click.
+
+        ``clickable`` only lets them through on a frame that still shows them
+        not downloaded, so a click Telegram took late is not repeated (a
+        second click would cancel the download). After ``max_retries``
+        unconfirmed clicks a button waits ``reclick_after`` like any other.
+        """
+        band = self._band(offset, region['height'])
+        for x, y in self._content(positions, offset, region):
+            index = self._find(band, x, y)
+            if index is not None:
+                self.unconfirmed[index] += 1
+                self.retry[index] = self.unconfirmed[index] <= self.max_retries
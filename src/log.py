@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+ROOT_LOGGER = 'telegram_downloader'
+# e.g. TELEGRAM_DOWNLOADER_LOG=DEBUG for per-frame scores and counts
+LEVEL_ENV = 'TELEGRAM_DOWNLOADER_LOG'
+
+
+def setup_logging(level: Optional[str] = None, stream=None):
+    """Attach a console handler to the application's root logger (once)."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    level = level or os.environ.get(LEVEL_ENV, 'INFO')
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    if not logger.handlers:
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+class Log:
+    """Leveled logger with structured fields, rate limits, sampling and log-once.
+
+    Messages below the logger's level cost one ``isEnabledFor`` check; the
+    message and its ``key=value`` fields are only formatted when emitted.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+        self._lock = threading.Lock()
+        self._once = set()
+        self._last = {}
+        self._suppressed = {}
+        self._counts = {}
+
+    def _emit(self, level: int, msg: str, fields: dict, exc_info=False):
+        if fields:
+            msg = f"{msg} " + ' '.join(f"{k}={v}" for k, v in fields.items())
+        self.logger.log(level, msg, exc_info=exc_info)
+
+    def enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, msg: str, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, msg, fields)
+
+    def warning(self, msg: str, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, msg, fields)
+
+    def error(self, msg: str, exc_info: bool = False, **fields):
+        self._emit(logging.ERROR, msg, fields, exc_info=exc_info)
+
+    def once(self, key: str, msg: str, level: int = logging.INFO, **fields):
+        """Log ``msg`` the first time ``key`` is seen, never again."""
+        if not self.logger.isEnabledFor(level):
+            return
+        with self._lock:
+            if key in self._once:
+                return
+            self._once.add(key)
+        self._emit(level, msg, fields)
+
+    def reset_once(self, prefix: str = ''):
+        """Let matching log-once keys fire again (e.g. after templates change)."""
+        with self._lock:
+            self._once = {key for key in self._once if not key.startswith(prefix)}
+
+    def throttled(self, key: str, interval: float, msg: str, level: int = logging.INFO,
+                  exc_info: bool = False, **fields):
+        """Log at most once per ``interval`` seconds for ``key``, counting the rest."""
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, -interval) < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            fields['suppressed'] = suppressed
+        self._emit(level, msg, fields, exc_info=exc_info)
+
+    def sampled(self, key: str, every: int, msg: str, level: int = logging.DEBUG, **fields):
+        """Log one in every ``every`` calls for ``key``, starting with the first."""
+        if not self.logger.isEnabledFor(level):
+            return
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % every == 0:
+            self._emit(level, msg, fields)
+
+
+def get_logger(name: str) -> Log:
+    return Log(name)
+
+
+class DebugImageWriter:
+    """Writes debug images on a background thread, off the detection hot path.
+
+    ``submit`` copies the image (capture and workspace buffers are reused
+    every frame) and returns immediately. When the queue is full the image
+    is dropped rather than blocking the caller.
+    """
+
+    def __init__(self, max_pending: int = 8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._log = get_logger('debug_images')
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='debug-image-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, path: str, image: np.ndarray) -> bool:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((path, image.copy()))
+            return True
+        except queue.Full:
+            self._log.throttled('dropped', 10.0, "Debug image queue full, dropping image", path=path)
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, image = item
+                if not cv2.imwrite(path, image):
+                    self._log.warning("Could not write debug image", path=path)
+                else:
+                    self._log.debug("Saved debug image", path=path)
+            except Exception as e:
+                self._log.error(f"Error writing debug image: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted image is written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+
+# Shared writer for all debug dumps
+debug_images = DebugImageWriter()
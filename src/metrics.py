@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+# e.g. TELEGRAM_DOWNLOADER_METRICS=1 to time every stage from the start
+METRICS_ENV = 'TELEGRAM_DOWNLOADER_METRICS'
+PERCENTILES = (50, 90, 99)
+
+
+class RollingHistogram:
+    """The last ``window`` durations of one stage in a ring buffer, plus lifetime totals."""
+
+    def __init__(self, window: int = 1024):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.samples[self.count % len(self.samples)] = ms
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def summary(self) -> dict:
+        recent = self.samples[:min(self.count, len(self.samples))]
+        summary = {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'max_ms': self.max,
+        }
+        values = np.percentile(recent, PERCENTILES) if len(recent) else [0.0] * len(PERCENTILES)
+        for percentile, value in zip(PERCENTILES, values):
+            summary[f'p{percentile}_ms'] = float(value)
+        return summary
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Per-stage latency histograms and event counters.
+
+    ``with metrics.stage('capture'):`` times a block on the monotonic
+    ``perf_counter`` clock; ``metrics.count('clicks')`` bumps a counter.
+    While disabled both return after one attribute check, so call sites
+    stay in the hot path unconditionally. Safe to use from worker threads.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1024):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._since = time.monotonic()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def observe(self, name: str, ms: float):
+        """Record a duration measured elsewhere, e.g. a sleep."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = RollingHistogram(self.window)
+            histogram.add(ms)
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self) -> dict:
+        """Percentiles of the recent window per stage, lifetime counts and counters."""
+        with self._lock:
+            stages = {name: histogram.summary() for name, histogram in self._stages.items()}
+            counters = dict(self._counters)
+        return {
+            'enabled': self.enabled,
+            'seconds': time.monotonic() - self._since,
+            'stages': stages,
+            'counters': counters,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+            self._since = time.monotonic()
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """One line per stage, for logs and the console."""
+    lines = [f"{'stage':<12} {'count':>7} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)"]
+    for name, stage in sorted(snapshot['stages'].items()):
+        lines.append(f"{name:<12} {stage['count']:>7} {stage['mean_ms']:>8.2f} {stage['p50_ms']:>8.2f} "
+                     f"{stage['p90_ms']:>8.2f} {stage['p99_ms']:>8.2f} {stage['max_ms']:>8.2f}")
+    if snapshot['counters']:
+        lines.append(' '.join(f"{name}={value}" for name, value in sorted(snapshot['counters'].items())))
+    return '\n'.join(lines)
+
+
+def _enabled_from_env(value: Optional[str]) -> bool:
+    return (value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Process-wide metrics shared by the detector, tracker, automation and main loop
+metrics = Metrics(enabled=_enabled_from_env(os.environ.get(METRICS_ENV)))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+
+def default_workers() -> int:
+    # Leave half of the cores to Telegram itself
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class MatchExecutor:
+    """Thread pool for matching jobs.
+
+    OpenCV releases the GIL inside ``matchTemplate``, so template/scale
+    pairs can run concurrently on plain threads. With one worker jobs run
+    inline on the calling thread, without any pool overhead.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers if workers is not None else default_workers()
+        self._pool = None
+
+    def set_workers(self, workers: int):
+        if workers != self.workers:
+            self.close()
+            self.workers = workers
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='match')
+        return list(self._pool.map(func, items))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+_PEAK_KERNEL = np.ones((5, 5), dtype=np.uint8)
+
+
+def greedy_suppress(xs: np.ndarray, ys: np.ndarray, min_dx: int, min_dy: int,
+                    limit: Optional[int] = None) -> List[int]:
+    """Greedy NMS over points already sorted by priority.
+
+    A point is dropped when an earlier kept point lies closer than
+    ``min_dx`` horizontally and ``min_dy`` vertically. Returns the indices
+    of kept points, at most ``limit`` of them.
+    """
+    xs = np.asarray(xs)
+    ys = np.asarray(ys)
+    suppressed = np.zeros(len(xs), dtype=bool)
+    keep = []
+    for i in range(len(xs)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if limit is not None and len(keep) >= limit:
+            break
+        # Neighbours of each kept point only, so memory stays linear in the points
+        rest = slice(i + 1, None)
+        suppressed[rest] |= (np.abs(xs[rest] - xs[i]) < min_dx) & (np.abs(ys[rest] - ys[i]) < min_dy)
+    return keep
+
+
+def find_peaks(scores: np.ndarray, threshold: float, template_shape: Tuple[int, int],
+               max_peaks: int = 50, max_candidates: int = 1000,
+               scratch: Optional[np.ndarray] = None) -> List[Tuple[int, int, float]]:
+    """Best-first local maxima of a score map with template-sized NMS.
+
+    Candidates are pixels at or above ``threshold`` that are the maximum of
+    their neighborhood (a max-filter via dilation). At most
+    ``max_candidates`` of the best ones are kept, sorted by score (ties by
+    scan order, so the output is deterministic), and suppressed so no two
+    peaks are closer than the template size. Returns up to ``max_peaks``
+    ``(x, y, score)`` tuples with top-left coordinates.
+    """
+    if scores.size == 0 or cv2.minMaxLoc(scores)[1] < threshold:
+        return []
+
+    h, w = template_shape[:2]
+    # A small max-filter is enough to thin plateaus; NMS does the rest
+    dilated = cv2.dilate(scores, _PEAK_KERNEL, dst=scratch)
+
+    flat_scores = scores.ravel()
+    candidates = np.flatnonzero(flat_scores >= threshold)
+    candidates = candidates[flat_scores[candidates] >= dilated.ravel()[candidates]]
+    if len(candidates) > max_candidates:
+        best = np.argpartition(-flat_scores[candidates], max_candidates - 1)[:max_candidates]
+        candidates = np.sort(candidates[best])
+
+    values = flat_scores[candidates]
+    order = np.lexsort((candidates, -values))
+    candidates = candidates[order]
+    values = values[order]
+
+    ys, xs = np.divmod(candidates, scores.shape[1])
+    keep = greedy_suppress(xs, ys, w, h, limit=max_peaks)
+    return [(int(xs[i]), int(ys[i]), float(values[i])) for i in keep]
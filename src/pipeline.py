@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from src.log import get_logger
+
+log = get_logger('pipeline')
+
+
+class Frame:
+    """One captured frame on its way through the pipeline.
+
+    ``seq`` numbers frames in capture order, ``epoch`` is the scroll epoch
+    at capture time, ``time`` the monotonic capture time and ``recorded``
+    the frame's index in a session recording, if one is running. Detection
+    sets ``offset``, the tracker's scroll offset for the frame, and
+    ``detections``, its matches with their scores.
+    """
+
+    __slots__ = ('seq', 'epoch', 'time', 'gray', 'color', 'recorded', 'offset', 'detections')
+
+    def __init__(self, seq: int, epoch: int, time: float, gray: np.ndarray,
+                 color: Optional[np.ndarray] = None, recorded: Optional[int] = None):
+        self.seq = seq
+        self.epoch = epoch
+        self.time = time
+        self.gray = gray
+        self.color = color
+        self.recorded = recorded
+        self.offset = 0
+        self.detections = None
+
+
+class LatestQueue:
+    """Bounded queue whose ``put`` drops the oldest items instead of blocking.
+
+    A slow consumer always gets the freshest items; whatever is pushed out
+    goes to ``on_drop``.
+    """
+
+    def __init__(self, maxsize: int = 1, on_drop: Optional[Callable[[Any], None]] = None):
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        dropped = []
+        with self._cond:
+            while len(self._items) >= self.maxsize:
+                dropped.append(self._items.popleft())
+            self._items.append(item)
+            self.dropped += len(dropped)
+            self._cond.notify()
+        if self.on_drop:
+            for old in dropped:
+                self.on_drop(old)
+
+    def get(self, timeout: float):
+        """Oldest queued item, or None if nothing arrives within ``timeout``."""
+        with self._cond:
+            if not self._items and not self._cond.wait(timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def clear(self) -> list:
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+        return items
+
+
+class Pipeline:
+    """Capture, detect and act stages on their own threads, joined by ``LatestQueue`` s.
+
+    ``capture(seq, epoch)`` returns a ``Frame``, ``detect(frame)`` its
+    detections and ``act(frame, detections)`` acts on them and returns
+    ``'scroll'`` if it scrolled. Capturing keeps going while detection runs
+    and while the input is busy clicking, so each stage works on the freshest
+    data it can get; frames and detections that fall behind are dropped.
+
+    Every scroll starts a new epoch once the scroll call returns. Frames
+    stamped with an earlier epoch may show content at old coordinates and
+    are dropped before detection and again before acting, so a click never
+    lands where a button was before the scroll.
+
+    ``interval()`` paces capturing, measured from the start of the previous
+    capture and re-read while waiting; ``on_drop(frame, stage)`` sees every
+    dropped frame, with ``stage`` 'detect' if it never reached detection and
+    'act' if it was detected but not acted on, and ``on_error(exc)`` every
+    stage error. An ``EOFError`` from capture (end of a replay) finishes the
+    pipeline once queued frames are through.
+    """
+
+    POLL = 0.02
+    # Frames (and detections) waiting between two stages
+    QUEUE_DEPTH = 1
+
+    def __init__(self, capture: Callable, detect: Callable, act: Callable, stop_event: threading.Event,
+                 interval: Callable[[], float] = lambda: 0.05, on_drop: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None):
+        self.capture = capture
+        self.detect = detect
+        self.act = act
+        self.stop_event = stop_event
+        self.interval = interval
+        self.on_drop = on_drop
+        self.on_error = on_error
+        self.epoch = 0
+        self.captured = 0
+        self.detected = 0
+        self.acted = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._frames = LatestQueue(self.QUEUE_DEPTH, on_drop=lambda frame: self._drop(frame, 'detect'))
+        self._detections = LatestQueue(self.QUEUE_DEPTH, on_drop=lambda item: self._drop(item[0], 'act'))
+        self._capture_done = threading.Event()
+        self._detect_done = threading.Event()
+
+    def _drop(self, frame: Frame, stage: str):
+        with self._lock:
+            self.dropped += 1
+        if self.on_drop:
+            self.on_drop(frame, stage)
+
+    def _error(self, exc: Exception) -> bool:
+        if self.on_error:
+            self.on_error(exc)
+        else:
+            log.error(f"Pipeline stage failed: {exc}", exc_info=True)
+        # Back off before the stage tries again; True if stopped meanwhile
+        return self.stop_event.wait(1)
+
+    def _stale(self, frame: Frame) -> bool:
+        return frame.epoch != self.epoch
+
+    def _wait_for_capture(self, started: Optional[float]) -> bool:
+        """Wait until the next capture is due; True if stopped meanwhile.
+
+        The interval is re-read every ``POLL`` seconds, so an action that
+        shortens it takes effect at once instead of after the old wait.
+        """
+        while started is not None:
+            remaining = started + self.interval() - time.monotonic()
+            if remaining <= 0:
+                break
+            if self.stop_event.wait(min(remaining, self.POLL)):
+                return True
+        return self.stop_event.is_set()
+
+    def _capture_loop(self):
+        seq = 0
+        started = None
+        try:
+            while not self.stop_event.is_set():
+                if self._wait_for_capture(started):
+                    break
+                started = time.monotonic()
+                try:
+                    frame = self.capture(seq, self.epoch)
+                except EOFError:
+                    break
+                except Exception as e:
+                    if self._error(e):
+                        break
+                    continue
+                seq += 1
+                self.captured += 1
+                self._frames.put(frame)
+        finally:
+            self._capture_done.set()
+
+    def _detect_loop(self):
+        try:
+            while not self.stop_event.is_set():
+                # Checked before waiting, so a frame queued just before the end is not lost
+                done = self._capture_done.is_set()
+                frame = self._frames.get(self.POLL)
+                if frame is None:
+                    if done:
+                        break
+                    continue
+                if self._stale(frame):
+                    self._drop(frame, 'detect')
+                    continue
+                try:
+                    detections = self.detect(frame)
+                except Exception as e:
+                    if self._error(e):
+                        break
+                    continue
+                self.detected += 1
+                # Detections finished after a stop are not acted on
+                if self.stop_event.is_set():
+                    self._drop(frame, 'act')
+                    break
+                self._detections.put((frame, detections))
+        finally:
+            self._detect_done.set()
+
+    def _act_loop(self):
+        while not self.stop_event.is_set():
+            done = self._detect_done.is_set()
+            item = self._detections.get(self.POLL)
+            if item is None:
+                if done:
+                    break
+                continue
+            frame, detections = item
+            if self.stop_event.is_set():
+                self._drop(frame, 'act')
+                break
+            if self._stale(frame):
+                self._drop(frame, 'act')
+                continue
+            try:
+                action = self.act(frame, detections)
+            except Exception as e:
+                action = None
+                if self._error(e):
+                    break
+            self.acted += 1
+            if action == 'scroll':
+                # Everything captured so far shows the chat before the scroll
+                with self._lock:
+                    self.epoch += 1
+
+    def run(self):
+        """Run all stages until the stop event is set or capture runs out of frames."""
+        threads = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._detect_loop, name='detect', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._act_loop()
+        finally:
+            for thread in threads:
+                thread.join()
+        for frame in self._frames.clear():
+            self._drop(frame, 'detect')
+        for frame, _ in self._detections.clear():
+            self._drop(frame, 'act')
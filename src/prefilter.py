@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from src.log import get_logger
+from src.peaks import greedy_suppress
+
+log = get_logger('prefilter')
+
+# Pixels at least this saturated make up the button's color signature
+SIGNATURE_SATURATION = 64
+_ERODE_KERNEL = np.ones((3, 3), dtype=np.uint8)
+
+
+class ColorPrefilter:
+    """Finds candidate button boxes by color before any template matching.
+
+    ``learn`` measures the hue, saturation and brightness of the saturated
+    button pixels in the color templates, and how much of the template the
+    solid blob covers. ``begin_frame`` thresholds a downsampled HSV frame
+    against that signature and keeps connected blobs of a plausible size;
+    ``match`` then verifies a template with NCC only around those blobs.
+
+    A frame with more than ``max_candidates`` blobs (e.g. a photo full of
+    the same blue) is left to the full-frame path: ``begin_frame`` returns
+    False.
+    """
+
+    def __init__(self, max_candidates: int = 200, downsample: int = 2, hue_margin: int = 6,
+                 size_tolerance: float = 0.3, pad: int = 4):
+        self.max_candidates = max_candidates
+        self.downsample = downsample
+        self.hue_margin = hue_margin
+        self.size_tolerance = size_tolerance
+        self.pad = pad
+        # inRange bounds, learned from the templates
+        self.lower = None
+        self.upper = None
+        # Blob bounding box size relative to the template size
+        self.extent = 1.0
+        # (x, y, w, h) boxes of the current frame in full-resolution pixels
+        self.candidates: List[Tuple[int, int, int, int]] = []
+
+    @property
+    def ready(self) -> bool:
+        return self.lower is not None
+
+    def learn(self, color_templates: Dict[str, np.ndarray]):
+        pixels = []
+        extents = []
+        for template in color_templates.values():
+            hsv = cv2.cvtColor(template, cv2.COLOR_BGR2HSV)
+            mask = hsv[..., 1] >= SIGNATURE_SATURATION
+            if not mask.any():
+                continue
+            pixels.append(hsv[mask])
+            ys, xs = np.nonzero(mask)
+            h, w = mask.shape
+            extents.append(min((xs.max() - xs.min() + 1) / w, (ys.max() - ys.min() + 1) / h))
+        if not pixels:
+            log.warning("Templates have no saturated pixels, color prefilter disabled")
+            self.lower = self.upper = None
+            return
+        pixels = np.concatenate(pixels)
+        low = np.percentile(pixels, 1, axis=0)
+        high = np.percentile(pixels, 99, axis=0)
+        if high[0] - low[0] > 90:
+            # Hue wraps around red; do not constrain it
+            low[0], high[0] = 0, 179
+        self.lower = np.array([max(0, low[0] - self.hue_margin), max(1, low[1] * 0.7), max(1, low[2] * 0.7)],
+                              dtype=np.uint8)
+        self.upper = np.array([min(179, high[0] + self.hue_margin), 255, 255], dtype=np.uint8)
+        self.extent = float(np.median(extents))
+
+    def begin_frame(self, frame: np.ndarray, template_sizes: List[Tuple[int, int]]) -> bool:
+        """Collect candidate boxes for a BGR(A) frame; False when the frame needs a full pass."""
+        self.candidates = []
+        if not self.ready or frame is None or frame.ndim != 3:
+            return False
+        step = self.downsample
+        small = np.ascontiguousarray(frame[::step, ::step, :3])
+        mask = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2HSV), self.lower, self.upper)
+        # Split buttons from same-colored shapes that merely touch them
+        mask = cv2.erode(mask, _ERODE_KERNEL)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        boxes = stats[1:, :4].astype(np.int64)
+        # Undo the erosion on the boxes, back in full-resolution pixels
+        boxes[:, :2] -= 1
+        boxes[:, 2:] += 2
+        boxes *= step
+
+        sizes = np.array(template_sizes, dtype=np.float64)
+        lo = sizes.min() * self.extent * (1 - self.size_tolerance)
+        hi = sizes.max() * self.extent * (1 + self.size_tolerance)
+        w, h = boxes[:, 2], boxes[:, 3]
+        keep = (w >= lo) & (w <= hi) & (h >= lo) & (h <= hi)
+        boxes = boxes[keep]
+        if len(boxes) > self.max_candidates:
+            log.throttled('over_budget', 10.0, "Too many color candidates, using the full-frame path",
+                          candidates=len(boxes), limit=self.max_candidates)
+            return False
+        self.candidates = [tuple(int(v) for v in box) for box in boxes]
+        return True
+
+    def match(self, template: np.ndarray, gray: np.ndarray, threshold: float,
+              max_peaks: int = 50) -> List[Tuple[int, int, float]]:
+        """Peaks ``(x, y, score)`` of ``template`` around the candidate boxes, best first."""
+        h, w = template.shape
+        screen_h, screen_w = gray.shape
+        lo = (1 - self.size_tolerance) * self.extent
+        hi = (1 + self.size_tolerance) * self.extent
+        pad = self.pad + self.downsample
+        peaks = []
+        for bx, by, bw, bh in self.candidates:
+            if not (lo * w <= bw <= hi * w and lo * h <= bh <= hi * h):
+                continue
+            # Every top-left position whose icon contains the blob, plus slack
+            x0 = max(0, min(bx, bx + bw - w) - pad)
+            y0 = max(0, min(by, by + bh - h) - pad)
+            x1 = min(screen_w - w, max(bx, bx + bw - w) + pad)
+            y1 = min(screen_h - h, max(by, by + bh - h) + pad)
+            if x1 < x0 or y1 < y0:
+                continue
+            roi = gray[y0:y1 + h, x0:x1 + w]
+            _, score, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED))
+            if score >= threshold:
+                peaks.append((x0 + mx, y0 + my, float(score)))
+
+        if not peaks:
+            return []
+        peaks.sort(key=lambda p: (-p[2], p[1], p[0]))
+        points = np.array([(x, y) for x, y, _ in peaks])
+        keep = greedy_suppress(points[:, 0], points[:, 1], w, h, limit=max_peaks)
+        return [peaks[i] for i in keep]
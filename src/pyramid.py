@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from src.peaks import find_peaks, greedy_suppress
+
+
+def pyramid_depth(template_shape: Tuple[int, int], min_template_size: int = 12, max_depth: int = 3) -> int:
+    """Number of 2x downsamplings that keep the template at least ``min_template_size``."""
+    size = min(template_shape[:2])
+    depth = 0
+    while depth < max_depth and size // 2 >= min_template_size:
+        size //= 2
+        depth += 1
+    return depth
+
+
+class PyramidMatcher:
+    """Coarse-to-fine TM_CCOEFF_NORMED matching.
+
+    Templates and frame are downsampled with ``cv2.pyrDown``; the coarse
+    match runs at a threshold lowered by ``coarse_margin`` (blurring lowers
+    scores), and every coarse candidate is re-verified at full resolution in
+    a small window around its upscaled position. The frame pyramid is built
+    once per frame and shared by all templates.
+    """
+
+    def __init__(self, min_template_size: int = 12, max_depth: int = 3, coarse_margin: float = 0.2):
+        self.min_template_size = min_template_size
+        self.max_depth = max_depth
+        self.coarse_margin = coarse_margin
+        self._gray = None
+        self._levels = []
+        self._template_levels = {}
+        # Levels are built lazily and may be requested from several threads
+        self._lock = threading.Lock()
+
+    def begin_frame(self, gray: np.ndarray):
+        self._gray = gray
+        self._levels = [gray]
+
+    def _frame_level(self, depth: int) -> np.ndarray:
+        with self._lock:
+            while len(self._levels) <= depth:
+                self._levels.append(cv2.pyrDown(self._levels[-1]))
+            return self._levels[depth]
+
+    def _template_level(self, name: str, template: np.ndarray, depth: int) -> np.ndarray:
+        with self._lock:
+            cached = self._template_levels.get(name)
+            if cached is None or cached[0] is not template:
+                cached = (template, [template])
+                self._template_levels[name] = cached
+            levels = cached[1]
+            while len(levels) <= depth:
+                levels.append(cv2.pyrDown(levels[-1]))
+            return levels[depth]
+
+    def match(self, name: str, template: np.ndarray, gray: np.ndarray, threshold: float,
+              max_peaks: int = 50) -> List[Tuple[int, int, float]]:
+        """Peaks ``(x, y, score)`` at full resolution, best first."""
+        if gray is not self._gray:
+            self.begin_frame(gray)
+        h, w = template.shape
+        depth = pyramid_depth(template.shape, self.min_template_size, self.max_depth)
+        screen = self._frame_level(depth)
+        coarse_template = self._template_level(name, template, depth)
+        ch, cw = coarse_template.shape
+        if ch > screen.shape[0] or cw > screen.shape[1]:
+            depth = 0
+            screen, coarse_template = gray, template
+
+        coarse = cv2.matchTemplate(screen, coarse_template, cv2.TM_CCOEFF_NORMED)
+        if depth == 0:
+            return find_peaks(coarse, threshold, template.shape, max_peaks=max_peaks)
+
+        candidates = find_peaks(coarse, threshold - self.coarse_margin, coarse_template.shape,
+                                max_peaks=max_peaks * 4)
+        scale = 1 << depth
+        # A coarse pixel covers `scale` full-resolution positions, plus rounding slack
+        pad = scale + 1
+        res_h, res_w = gray.shape[0] - h + 1, gray.shape[1] - w + 1
+        refined = []
+        for cx, cy, _ in candidates:
+            x0 = max(0, cx * scale - pad)
+            y0 = max(0, cy * scale - pad)
+            x1 = min(res_w, cx * scale + pad + 1)
+            y1 = min(res_h, cy * scale + pad + 1)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            roi = gray[y0:y1 + h - 1, x0:x1 + w - 1]
+            _, score, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED))
+            if score >= threshold:
+                refined.append((x0 + mx, y0 + my, float(score)))
+
+        if not refined:
+            return []
+        # Neighboring coarse candidates can refine to the same spot
+        refined.sort(key=lambda p: (-p[2], p[1], p[0]))
+        points = np.array([(x, y) for x, y, _ in refined])
+        keep = greedy_suppress(points[:, 0], points[:, 1], w, h, limit=max_peaks)
+        return [refined[i] for i in keep]
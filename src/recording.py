@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import json
+import mmap
+import struct
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from src.capture import FrameSource
+from src.log import get_logger
+
+log = get_logger('recording')
+
+MAGIC = b'TGDREC01'
+# kind, timestamp (seconds since the recording started), height, width, payload length
+RECORD = struct.Struct('<BdIII')
+HEADER_LENGTH = struct.Struct('<I')
+
+KEYFRAME = 1
+DELTA = 2
+ACTION = 3
+
+
+class SessionRecorder:
+    """Appends gray frames and actions to a session file.
+
+    Layout: ``MAGIC``, a length-prefixed JSON header (region, start time,
+    keyframe interval), then records of ``RECORD`` followed by the payload.
+    Keyframes hold the zlib-compressed frame, deltas the zlib-compressed XOR
+    with the previous frame (mostly zeros between captures, so they shrink to
+    a few KB), actions a JSON object. A keyframe every ``keyframe_interval``
+    frames bounds how far a seek has to decode and how much a damaged record
+    can take with it. A session cut short by a crash stays readable up to its
+    last complete record.
+    """
+
+    def __init__(self, path: str, region: dict, keyframe_interval: int = 60, level: int = 1):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.frames = 0
+        self.actions = 0
+        self.bytes_written = 0
+        self._prev = None
+        self._since_keyframe = 0
+        self._lock = threading.Lock()
+        self.start = time.monotonic()
+        header = json.dumps({
+            'region': dict(region),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'keyframe_interval': keyframe_interval,
+        }).encode('utf-8')
+        self._file = open(path, 'wb')
+        self._write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def _record(self, kind: int, height: int, width: int, payload: bytes, timestamp: Optional[float] = None):
+        if timestamp is None:
+            timestamp = time.monotonic() - self.start
+        self._write(RECORD.pack(kind, timestamp, height, width, len(payload)))
+        self._write(payload)
+
+    def record_frame(self, gray: np.ndarray, timestamp: Optional[float] = None) -> Optional[int]:
+        """Append one gray frame, as a keyframe or as a delta to the previous one; returns its index."""
+        height, width = gray.shape
+        with self._lock:
+            if self._file is None:
+                return None
+            keyframe = (self._prev is None or self._prev.shape != gray.shape
+                        or self._since_keyframe >= self.keyframe_interval)
+            if keyframe:
+                self._prev = np.ascontiguousarray(gray).copy()
+                payload = zlib.compress(self._prev, self.level)
+                self._since_keyframe = 0
+            else:
+                delta = np.bitwise_xor(self._prev, gray)
+                payload = zlib.compress(delta, self.level)
+                np.copyto(self._prev, gray)
+            self._since_keyframe += 1
+            self._record(KEYFRAME if keyframe else DELTA, height, width, payload, timestamp)
+            self.frames += 1
+            if keyframe:
+                # Keep what is on disk up to date in case the process dies
+                self._file.flush()
+            return self.frames - 1
+
+    def record_action(self, action: str, **fields):
+        """Append an action (click, scroll, ...) taken after the last frame."""
+        payload = json.dumps({'action': action, **fields}).encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                return
+            self._record(ACTION, 0, 0, payload)
+            self.actions += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        log.info(f"Recorded {self.frames} frames and {self.actions} actions to {self.path} "
+                 f"({self.bytes_written / 1e6:.1f} MB)")
+
+
+class RecordingFrameSource(FrameSource):
+    """Passes frames through from another source and records them in gray."""
+
+    def __init__(self, source: FrameSource, recorder: SessionRecorder):
+        self.source = source
+        self.recorder = recorder
+        # Index of the last grabbed frame in the recording
+        self.recorded = None
+        self.live = source.live
+        self._gray = None
+
+    def grab(self, region: dict) -> np.ndarray:
+        frame = self.source.grab(region)
+        self.frame_time = time.monotonic()
+        if frame.ndim == 2:
+            gray = frame
+        else:
+            if self._gray is None or self._gray.shape != frame.shape[:2]:
+                self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(frame, code, dst=self._gray)
+        self.recorded = self.recorder.record_frame(gray, timestamp=self.frame_time - self.recorder.start)
+        return frame
+
+    def close(self):
+        self.source.close()
+        self.recorder.close()
+
+
+class SessionReader:
+    """Random access to a recorded session through a read-only memory map.
+
+    Opening only walks the record headers to build the index; payloads are
+    decompressed straight out of the map when a frame is asked for, so an
+    hour-long session costs its index plus one decoded frame in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty session file: {path}")
+        self._view = memoryview(self._map)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a session recording: {path}")
+        offset = len(MAGIC)
+        (length,) = HEADER_LENGTH.unpack_from(self._map, offset)
+        offset += HEADER_LENGTH.size
+        self.header = json.loads(bytes(self._view[offset:offset + length]).decode('utf-8'))
+        self.region = self.header['region']
+        self._index(offset + length)
+        self._frame = None
+        self._position = -1
+
+    def _index(self, offset: int):
+        frames, actions = [], []
+        size = len(self._map)
+        while offset + RECORD.size <= size:
+            kind, timestamp, height, width, length = RECORD.unpack_from(self._map, offset)
+            start = offset + RECORD.size
+            if start + length > size or kind not in (KEYFRAME, DELTA, ACTION):
+                log.warning(f"{self.path} ends in an incomplete record, replaying what precedes it")
+                break
+            if kind == ACTION:
+                action = json.loads(bytes(self._view[start:start + length]).decode('utf-8'))
+                action['timestamp'] = timestamp
+                # Taken after the frame just before it
+                action['frame'] = len(frames) - 1
+                actions.append(action)
+            else:
+                frames.append((kind, timestamp, height, width, start, length))
+            offset = start + length
+        self._records = frames
+        self.actions = actions
+        self.timestamps = np.array([record[1] for record in frames], dtype=np.float64)
+        self._keyframes = np.array([i for i, record in enumerate(frames) if record[0] == KEYFRAME], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1]) if len(self.timestamps) else 0.0
+
+    def _decode(self, index: int):
+        kind, _, height, width, start, length = self._records[index]
+        data = np.frombuffer(zlib.decompress(self._view[start:start + length]), dtype=np.uint8)
+        data = data.reshape(height, width)
+        if kind == KEYFRAME or self._frame is None or self._frame.shape != (height, width):
+            self._frame = data.copy()
+        else:
+            np.bitwise_xor(self._frame, data, out=self._frame)
+        self._position = index
+
+    def frame(self, index: int) -> np.ndarray:
+        """Gray frame ``index``; a view that stays valid until the next call."""
+        if not 0 <= index < len(self._records):
+            raise IndexError(f"Frame {index} out of range ({len(self._records)} frames)")
+        if index != self._position + 1 or self._frame is None:
+            # Seek: decode forward from the nearest keyframe at or before the frame
+            keyframe = int(self._keyframes[np.searchsorted(self._keyframes, index, side='right') - 1])
+            # Moving forward past the keyframe continues from the current frame instead
+            start = self._position + 1 if keyframe <= self._position < index else keyframe
+            for i in range(start, index):
+                self._decode(i)
+        self._decode(index)
+        return self._frame
+
+    def actions_between(self, first: int, last: int) -> List[dict]:
+        """Actions recorded after frame ``first`` and up to frame ``last``."""
+        return [action for action in self.actions if first <= action['frame'] < last]
+
+    def close(self):
+        self._records = []
+        self._frame = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+        self._file.close()
+
+
+class ReplayFrameSource(FrameSource):
+    """Feeds a recorded session back in, at recorded speed or as fast as frames are asked for.
+
+    With ``realtime`` each grab waits until the frame's recorded time since
+    replay started; a consumer slower than the recording just gets the next
+    frame straight away, so every frame is replayed exactly once and in
+    order. The requested region is ignored: frames have the recorded
+    region's size (see ``region``).
+    """
+
+    live = False
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False):
+        self.reader = SessionReader(path)
+        if not len(self.reader):
+            self.reader.close()
+            raise ValueError(f"No frames recorded in {path}")
+        self.realtime = realtime
+        self.loop = loop
+        # Recorded frames to leave out, e.g. ones a live pipeline dropped before detection
+        self.skip = set()
+        # Recorded frames to detect but not act on, e.g. ones a live pipeline dropped after detection
+        self.unacted = set()
+        self.index = 0
+        # Index of the frame the last grab returned
+        self.recorded = None
+        self._start = None
+
+    @property
+    def region(self) -> dict:
+        return dict(self.reader.region)
+
+    def grab(self, region: dict) -> np.ndarray:
+        for _ in range(2 * len(self.reader) + 1):
+            if self.index >= len(self.reader):
+                if not self.loop:
+                    raise EOFError("No more frames to replay")
+                self.index = 0
+                self._start = None
+            if self.index not in self.skip:
+                break
+            self.index += 1
+        else:
+            raise EOFError("Every recorded frame is skipped")
+        if self.realtime:
+            timestamp = float(self.reader.timestamps[self.index])
+            if self._start is None:
+                self._start = time.monotonic() - timestamp
+            wait = self._start + timestamp - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        frame = self.reader.frame(self.index)
+        self.frame_time = float(self.reader.timestamps[self.index])
+        self.recorded = self.index
+        self.index += 1
+        return frame
+
+    def close(self):
+        self.reader.close()
+
+
+
+class ActionLog:
+    """Collects actions in memory, e.g. the ones a replay would have taken.
+
+    With ``stop_after`` set, ``stop_event`` is set once that many actions
+    were collected, as if the run had been stopped right after them.
+    """
+
+    def __init__(self, stop_after: Optional[int] = None, stop_event: Optional[threading.Event] = None):
+        self.actions = []
+        self.stop_after = stop_after
+        self.stop_event = stop_event
+        self._check_stop()
+
+    def _check_stop(self):
+        if self.stop_event is not None and self.stop_after is not None and len(self.actions) >= self.stop_after:
+            self.stop_event.set()
+
+    def record_action(self, action: str, **fields):
+        self.actions.append({'action': action, **fields})
+        self._check_stop()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import time
+from threading import Event
+from typing import Optional
+
+
+class AdaptiveScheduler:
+    """Decides when the automation loop looks at the screen next.
+
+    Right after a click or scroll the screen is polled every
+    ``min_interval`` seconds, and no new action is taken until the first
+    frame captured after the action is ``min_settle`` seconds old and two
+    consecutive detections agree (or ``settle_timeout`` passes), so nothing
+    is clicked mid-scroll or before Telegram has reacted. While the detections stay the same the
+    interval grows by ``backoff`` per cycle, up to ``idle_interval``, or
+    ``busy_interval`` while downloads are merely in progress. Any change on
+    screen drops it back to ``min_interval``.
+
+    Intervals are measured from the start of a cycle, so time spent
+    detecting and acting counts towards them. Settling is judged on frame
+    capture times (``now``), which a replay reproduces exactly.
+    """
+
+    def __init__(self, min_interval: float = 0.05, idle_interval: float = 1.0, busy_interval: float = 2.0,
+                 backoff: float = 1.5, min_settle: float = 0.5, settle_timeout: float = 1.5):
+        self.min_interval = min_interval
+        self.idle_interval = idle_interval
+        self.busy_interval = busy_interval
+        self.backoff = backoff
+        self.min_settle = min_settle
+        self.settle_timeout = settle_timeout
+        self.reset()
+
+    def reset(self):
+        self.interval = self.min_interval
+        self._previous = None
+        self.settling = False
+        self._settle_from = None
+        self._acted_at = None
+        self._confirmed = False
+
+    def observe(self, results: dict, now: Optional[float] = None) -> bool:
+        """Feed a cycle's detections; returns whether acting on them is allowed."""
+        now = time.monotonic() if now is None else now
+        changed = results != self._previous
+        self._previous = results
+        if changed:
+            self.interval = self.min_interval
+        if self.settling:
+            if self._acted_at is not None and now < self._acted_at:
+                # Captured before the action finished
+                return False
+            if self._confirmed:
+                # The action was verified on screen: the next frame is safe to act on
+                self.settling = False
+                return True
+            if self._settle_from is None:
+                # First frame since the action: settling is timed from here
+                self._settle_from = now
+                return False
+            elapsed = now - self._settle_from
+            if elapsed < self.settle_timeout and (changed or elapsed < self.min_settle):
+                return False
+            self.settling = False
+            self._settle_from = None
+        return True
+
+    def acted(self, at: Optional[float] = None, confirmed: bool = False):
+        """An action finished (at ``at`` on the frame clock, if known): poll fast until the screen settles.
+
+        Without ``at`` the next observed frame counts as the first one after the
+        action; with it, frames captured earlier are ignored. ``confirmed``
+        means the action's effect was already seen on screen, so that first
+        frame may be acted on without settling.
+        """
+        self.settling = True
+        self._settle_from = None
+        self._acted_at = at
+        self._confirmed = confirmed
+        self.interval = self.min_interval
+
+    def next_interval(self, busy: bool = False) -> float:
+        """Interval before the next cycle; backs off while nothing changes."""
+        interval = self.interval
+        if not self.settling:
+            cap = self.busy_interval if busy else self.idle_interval
+            self.interval = min(self.interval * self.backoff, cap)
+        return interval
+
+    @staticmethod
+    def wait(stop_event: Event, deadline: float) -> bool:
+        """Wait until ``deadline`` (monotonic) or a stop; returns True if stopped."""
+        return stop_event.wait(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+def row_profile(gray: np.ndarray, bins: int = 16) -> np.ndarray:
+    """Mean intensity per row in ``bins`` vertical bands, shape ``(height, bins)``."""
+    height, width = gray.shape
+    bins = max(1, min(bins, width))
+    # INTER_AREA averages each band of columns
+    return cv2.resize(gray, (bins, height), interpolation=cv2.INTER_AREA).astype(np.float64)
+
+
+def estimate_scroll(prev: np.ndarray, gray: np.ndarray, min_overlap: float = 0.25,
+                    tolerance: int = 16, max_mismatch: float = 0.01) -> Optional[int]:
+    """Vertical content shift between two gray frames of the same region.
+
+    Returns ``s`` such that ``gray[y] == prev[y + s]`` on the overlapping
+    rows: positive when the content moved up (scrolling down), negative
+    when it moved down. Returns None when no shift leaves at least
+    ``min_overlap`` of the rows overlapping with at most ``max_mismatch`` of
+    their pixels off by more than ``tolerance`` gray levels (animated
+    icons), e.g. when the chat was switched or the window resized.
+
+    The shift is found by aligning per-row profiles (sum of squared
+    differences over every candidate shift) and then checked on the pixels.
+    """
+    if prev.shape != gray.shape:
+        return None
+    height = gray.shape[0]
+    min_rows = max(1, int(height * min_overlap))
+    p = row_profile(prev)
+    c = row_profile(gray)
+
+    # SSD(s) = sum c[0:n]^2 + sum p[s:s+n]^2 - 2 sum c[0:n] p[s:s+n], n = rows overlapping;
+    # negative shifts are the same with the roles of the frames swapped
+    shifts = np.arange(-(height - min_rows), height - min_rows + 1)
+    cross = np.zeros(2 * height - 1)
+    for band in range(p.shape[1]):
+        cross += np.correlate(p[:, band], c[:, band], mode='full')
+    # np.correlate(p, c)[k] pairs p[i + s] with c[i] for s = k - (height - 1)
+    cross = cross[shifts + height - 1]
+    p_sq = np.concatenate(([0.0], np.cumsum((p * p).sum(axis=1))))
+    c_sq = np.concatenate(([0.0], np.cumsum((c * c).sum(axis=1))))
+    n = height - np.abs(shifts)
+    down = shifts >= 0
+    energy = np.where(
+        down,
+        c_sq[n] + (p_sq[height] - p_sq[np.clip(shifts, 0, None)]),
+        (c_sq[height] - c_sq[np.clip(-shifts, 0, None)]) + p_sq[n],
+    )
+    ssd = (energy - 2 * cross) / (n * p.shape[1])
+    order = np.argsort(ssd, kind='stable')
+
+    # The best profile alignment can be a repeating layout; confirm on pixels
+    for index in order[:3]:
+        shift = int(shifts[index])
+        if shift >= 0:
+            a, b = gray[:height - shift], prev[shift:]
+        else:
+            a, b = gray[-shift:], prev[:height + shift]
+        diff = cv2.absdiff(a[::2], b[::2])
+        if np.count_nonzero(diff > tolerance) <= max_mismatch * diff.size:
+            return shift
+    return None
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Telegram-like frames for benchmarks and test image generation."""
+
+import os
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATE_PATHS = {
+    'not_downloaded': os.path.join(REPO_ROOT, 'images', 'not_download.jpg'),
+    'downloading': os.path.join(REPO_ROOT, 'images', 'downloading.jpg'),
+    'downloaded': os.path.join(REPO_ROOT, 'images', 'downloaded.jpg'),
+}
+
+
+def load_gray_templates() -> dict:
+    return {name: cv2.imread(path, cv2.IMREAD_GRAYSCALE) for name, path in TEMPLATE_PATHS.items()}
+
+
+def make_frame(width: int, height: int, icons: int = 10, seed: int = 0):
+    """Build a BGR chat-like frame with ``icons`` template icons pasted at random.
+
+    Returns ``(frame, placements)`` where placements are ``(name, x, y)``
+    top-left positions of every pasted icon.
+    """
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    # Message bubbles with lines of "text"
+    for top in range(10, height - 60, 90):
+        cv2.rectangle(frame, (20, top), (width - 20, top + 70), (245, 240, 235), -1)
+        for line in range(2):
+            y = top + 25 + line * 25
+            cv2.putText(frame, 'file_%04d.zip  %d MB' % (rng.integers(10000), rng.integers(1, 900)),
+                        (90, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (60, 60, 60), 1)
+
+    icons_bgr = {name: cv2.imread(path) for name, path in TEMPLATE_PATHS.items()}
+    names = list(icons_bgr)
+    placements = []
+    occupied = np.zeros((height, width), dtype=bool)
+    for _ in range(icons * 20):
+        if len(placements) >= icons:
+            break
+        name = names[len(placements) % len(names)]
+        icon = icons_bgr[name]
+        h, w = icon.shape[:2]
+        if height <= h or width <= w:
+            break
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        if occupied[max(0, y - 10):y + h + 10, max(0, x - 10):x + w + 10].any():
+            continue
+        frame[y:y + h, x:x + w] = icon
+        occupied[y:y + h, x:x + w] = True
+        placements.append((name, x, y))
+    return frame, placements
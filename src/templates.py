@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+# Display scaling factors seen across the fleet (100%, 125%, 150%, 200% DPI)
+DEFAULT_SCALES = (1.0, 1.25, 1.5, 2.0)
+
+
+class TemplateBank:
+    """Gray templates pre-resized once per display scale.
+
+    Until a scale is locked, detection sweeps every scale and reports the
+    best score it saw per scale through ``observe``. After ``probe_frames``
+    frames with a detection, the bank locks to the scale with the highest
+    mean best score and only that scale is matched from then on. With
+    ``probe_frames`` None it never locks and keeps no probe history, e.g.
+    for unrelated frames that may each come from a different display.
+    """
+
+    def __init__(self, scales: Iterable[float] = DEFAULT_SCALES, probe_frames: Optional[int] = 3):
+        self.scales = tuple(scales)
+        self.probe_frames = probe_frames
+        self.bank: Dict[float, Dict[str, np.ndarray]] = {}
+        self.active_scale: Optional[float] = None
+        self._probe_scores: Dict[float, List[float]] = {}
+
+    def build(self, base_templates: Dict[str, np.ndarray]):
+        self.bank = {}
+        for scale in self.scales:
+            if scale == 1.0:
+                self.bank[scale] = dict(base_templates)
+                continue
+            scaled = {}
+            for name, template in base_templates.items():
+                h, w = template.shape[:2]
+                size = (max(1, round(w * scale)), max(1, round(h * scale)))
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+                scaled[name] = cv2.resize(template, size, interpolation=interpolation)
+            self.bank[scale] = scaled
+        self.unlock()
+
+    @property
+    def locked(self) -> bool:
+        return self.active_scale is not None
+
+    def lock(self, scale: float):
+        if scale not in self.bank:
+            raise ValueError(f"Scale {scale} is not in the template bank ({self.scales})")
+        self.active_scale = scale
+
+    def unlock(self):
+        self.active_scale = None
+        self._probe_scores = {scale: [] for scale in self.scales}
+
+    def candidate_scales(self) -> List[float]:
+        if self.locked:
+            return [self.active_scale]
+        return list(self.bank)
+
+    def templates_for(self, scale: float) -> Dict[str, np.ndarray]:
+        return self.bank.get(scale, {})
+
+    def observe(self, best_scores: Dict[float, float], threshold: float) -> Optional[float]:
+        """Record one probing frame; returns the scale once it gets locked."""
+        if self.locked or self.probe_frames is None:
+            return None
+        if not best_scores or max(best_scores.values()) < threshold:
+            # Nothing recognisable on screen yet, keep probing
+            return None
+        for scale, score in best_scores.items():
+            self._probe_scores[scale].append(score)
+        frames = max(len(scores) for scores in self._probe_scores.values())
+        if frames >= self.probe_frames:
+            means = {scale: float(np.mean(scores)) for scale, scores in self._probe_scores.items() if scores}
+            self.lock(max(means, key=means.get))
+            return self.active_scale
+        return None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import math
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional
+
+
+class SessionRates:
+    """Session throughput over a rolling time window.
+
+    Counts buttons clicked and downloads completed over the last ``window``
+    seconds (or the whole session while it is shorter) and averages how
+    long the completed downloads spent in ``downloading``. From the
+    completion rate it estimates when the visible backlog will be done.
+    Times are frame capture times, as everywhere in the loop. The loop
+    records events while the UI thread may take a snapshot.
+    """
+
+    def __init__(self, window: float = 300.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._start = None
+            self._last = None
+            self._clicks = deque()
+            # (time, seconds spent downloading or NaN when not seen downloading)
+            self._completions = deque()
+
+    def _record(self, now: float):
+        if self._start is None:
+            self._start = now
+        self._last = now
+        self._prune(now)
+
+    def _prune(self, now: float):
+        cutoff = now - self.window
+        for events in (self._clicks, self._completions):
+            while events and events[0][0] < cutoff:
+                events.popleft()
+
+    def clicked(self, count: int, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._record(now)
+            if count:
+                self._clicks.append((now, count))
+
+    def completed(self, durations: Iterable[float], now: Optional[float] = None):
+        """Downloads that finished at ``now``, with how long each one was seen downloading."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._record(now)
+            self._completions.extend((now, duration) for duration in durations)
+
+    def snapshot(self, backlog: int = 0, now: Optional[float] = None) -> dict:
+        """Rates per minute, mean download time and the ETA in seconds for ``backlog`` items.
+
+        Values that cannot be known yet (nothing completed) are None. Without
+        ``now`` the rates are taken at the last recorded event, so a session
+        timed by frame capture (or a replay) reads the same after it stops.
+        """
+        with self._lock:
+            if now is None:
+                now = time.monotonic() if self._last is None else self._last
+            self._prune(now)
+            start = now if self._start is None else self._start
+            completed = len(self._completions)
+            durations = [d for _, d in self._completions if not math.isnan(d)]
+            clicks = sum(count for _, count in self._clicks)
+        minutes = max(min(self.window, now - start), 1.0) / 60
+        per_minute = completed / minutes
+        return {
+            'clicks_per_minute': clicks / minutes,
+            'completed_per_minute': per_minute,
+            'avg_download_seconds': sum(durations) / len(durations) if durations else None,
+            'backlog': backlog,
+            'eta_seconds': backlog / per_minute * 60 if per_minute else (0.0 if not backlog else None),
+        }
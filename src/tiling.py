@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.parallel import MatchExecutor
+
+
+def strip_bounds(res_height: int, strips: int, min_rows: int = 64) -> List[Tuple[int, int]]:
+    """Split score-map rows ``[0, res_height)`` into up to ``strips`` even strips."""
+    strips = max(1, min(strips, res_height // min_rows or 1))
+    edges = np.linspace(0, res_height, strips + 1).round().astype(int)
+    return [(int(y0), int(y1)) for y0, y1 in zip(edges[:-1], edges[1:]) if y1 > y0]
+
+
+def match_strips(gray: np.ndarray, template: np.ndarray, result: np.ndarray,
+                 executor: MatchExecutor, strips: Optional[int] = None) -> np.ndarray:
+    """Full TM_CCOEFF_NORMED score map computed as horizontal strips in parallel.
+
+    Score rows ``[y0, y1)`` need frame rows ``[y0, y1 + h - 1)``, so
+    neighboring frame strips overlap by the template height minus one and
+    every strip writes a disjoint block of ``result``. The stitched map is
+    the single-pass map, so peaks found on it have no seam duplicates.
+    """
+    h = template.shape[0]
+    bounds = strip_bounds(result.shape[0], strips or executor.workers)
+
+    def run(bound):
+        y0, y1 = bound
+        cv2.matchTemplate(gray[y0:y1 + h - 1], template, cv2.TM_CCOEFF_NORMED, result=result[y0:y1])
+
+    executor.map(run, bounds)
+    return result
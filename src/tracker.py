@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.log import get_logger
+from src.metrics import metrics
+from src.peaks import greedy_suppress
+from src.scroll import estimate_scroll
+
+log = get_logger('tracker')
+
+
+class Track:
+    """One download button on screen.
+
+    ``matches`` holds every state template that currently matches the button
+    as ``{state: (center_x, center_y, score)}`` in screen coordinates (with
+    loose thresholds similar icons match each other's templates too); the
+    best of them is the button's ``state``. ``patch`` keeps the gray pixels
+    the matches were verified on.
+    """
+
+    __slots__ = ('matches', 'scale', 'state', 'x', 'y', 'score', 'patch')
+
+    def __init__(self, matches: Dict[str, Tuple[int, int, float]], scale: float,
+                 patch: Optional[np.ndarray] = None):
+        self.matches = matches
+        self.scale = scale
+        self.patch = patch
+        self.state = max(matches, key=lambda state: matches[state][2])
+        self.x, self.y, self.score = matches[self.state]
+
+
+class DetectionTracker:
+    """Keeps detections alive between full scans of the region.
+
+    A full ``detect_gray`` pass seeds one track per detected button. On the
+    following frames every track is re-verified against all state templates
+    inside a ``search_margin`` window around its last position, so a button
+    that changes state (not downloaded -> downloading -> downloaded) keeps
+    its track. A full scan runs again every ``full_scan_interval`` frames,
+    when there is nothing to track, or as soon as a track is lost and the
+    frame is not a scroll of the previous one. Buttons that appear between
+    scans are picked up by the next periodic scan.
+
+    After a scroll the tracks are moved by the estimated shift and only the
+    strip the scroll revealed is matched in full. ``offset`` accumulates the
+    shifts, so ``y + offset`` stays put for a button as the chat scrolls
+    (content coordinates).
+    """
+
+    def __init__(self, detector, full_scan_interval: int = 10, search_margin: int = 12):
+        self.detector = detector
+        self.full_scan_interval = full_scan_interval
+        self.search_margin = search_margin
+        self.tracks: List[Track] = []
+        self.frames_since_scan = 0
+        self._key = None
+        # Previous gray frame, for scroll estimation
+        self._prev = None
+        # Content scrolled past the region's top since the last reset, in pixels
+        self.offset = 0
+        self.last_shift = 0
+        # Counters for benchmarks and diagnostics
+        self.full_scans = 0
+        self.tracked_frames = 0
+        self.scroll_frames = 0
+
+    def reset(self):
+        """Drop all tracks; the next frame is a full scan."""
+        self.tracks = []
+        self.frames_since_scan = 0
+        self._key = None
+        self._prev = None
+        self.offset = 0
+        self.last_shift = 0
+
+    def detect(self, region: dict, threshold: float = 0.5) -> dict:
+        return self.update(self.detector.capture_gray(region), region, threshold)
+
+    def update(self, gray: np.ndarray, region: dict, threshold: float = 0.5) -> dict:
+        """Detections for an already captured gray frame, same format as ``detect_images``."""
+        key = (tuple(sorted(region.items())), threshold)
+        shift = 0
+        if key != self._key or not self.tracks or self.frames_since_scan >= self.full_scan_interval:
+            if key == self._key:
+                shift = self._estimate_shift(gray)
+            self._key = key
+            results = self._full_scan(gray, region, threshold)
+        else:
+            with metrics.stage('verify'):
+                tracks = self._verify(gray, region, threshold, self.tracks)
+            if tracks is not None:
+                shift = self._tracked_shift(self.tracks, tracks)
+            else:
+                with metrics.stage('follow_scroll'):
+                    shift = self._estimate_shift(gray)
+                    if shift:
+                        tracks = self._follow_scroll(gray, region, threshold, shift)
+            if tracks is None:
+                results = self._full_scan(gray, region, threshold)
+            else:
+                self.tracks = tracks
+                self.frames_since_scan += 1
+                self.tracked_frames += 1
+                results = self._publish()
+        self.last_shift = shift
+        self.offset += shift
+        self._remember(gray)
+        return results
+
+    def _estimate_shift(self, gray: np.ndarray) -> int:
+        """Scroll since the previous frame, 0 when there was none or it cannot be told."""
+        if self._prev is None:
+            return 0
+        return estimate_scroll(self._prev, gray) or 0
+
+    @staticmethod
+    def _tracked_shift(old: List[Track], new: List[Track]) -> int:
+        """Scroll small enough for the verification windows: every track moved by the same amount."""
+        if not new:
+            return 0
+        moves = np.array([before.y - after.y for before, after in zip(old, new)])
+        shift = int(np.median(moves))
+        # Centers wobble a pixel or two when a button changes state
+        if abs(shift) < 3 or np.ptp(moves) > 2:
+            return 0
+        return shift
+
+    def _remember(self, gray: np.ndarray):
+        # Capture buffers are reused, keep a copy of the frame
+        if self._prev is None or self._prev.shape != gray.shape:
+            self._prev = np.empty_like(gray)
+        np.copyto(self._prev, gray)
+
+    def _full_scan(self, gray: np.ndarray, region: dict, threshold: float) -> dict:
+        results = self.detector.detect_gray(gray, region, threshold)
+        self.tracks = self._group(self.detector.last_detections, self.detector.last_scale)
+        for track in self.tracks:
+            track.patch = self._patch(gray, region, track).copy()
+        self.frames_since_scan = 0
+        self.full_scans += 1
+        return results
+
+    def _group(self, detections: Dict[str, list], scale: float) -> List[Track]:
+        """One track per button from per-state detections of a full scan."""
+        flat = [(score, state, cx, cy) for state, matches in detections.items() for cx, cy, score in matches]
+        if not flat:
+            return []
+        flat.sort(key=lambda d: (-d[0], d[3], d[2]))
+        size = self._template_size(scale)
+        xs = np.array([d[2] for d in flat])
+        ys = np.array([d[3] for d in flat])
+        heads = greedy_suppress(xs, ys, size, size)
+        groups = [{} for _ in heads]
+        for score, state, cx, cy in flat:
+            # Attach to the strongest button within one template size
+            for group, head in zip(groups, heads):
+                if abs(cx - xs[head]) < size and abs(cy - ys[head]) < size:
+                    group.setdefault(state, (cx, cy, score))
+                    break
+        return [Track(group, scale) for group in groups]
+
+    def _patch(self, gray: np.ndarray, region: dict, track: Track) -> np.ndarray:
+        """Gray pixels that the track's verification window can see."""
+        half = self._template_size(track.scale) // 2 + self.search_margin + 1
+        x, y = track.x - region['left'], track.y - region['top']
+        return gray[max(0, y - half):y + half, max(0, x - half):x + half]
+
+    def _template_size(self, scale: float) -> int:
+        return max(max(t.shape) for t in self.detector.bank.templates_for(scale).values())
+
+    def _locate(self, gray: np.ndarray, template: np.ndarray, tx: int, ty: int) -> Optional[Tuple[int, int, float]]:
+        """Best top-left ``(x, y, score)`` near ``(tx, ty)``.
+
+        A button that has not moved peaks inside a tiny window; only when the
+        peak sits on that window's edge is the full ``search_margin`` searched.
+        """
+        for margin in (2, self.search_margin):
+            h, w = template.shape
+            x0, x1 = max(0, tx - margin), min(gray.shape[1] - w, tx + margin)
+            y0, y1 = max(0, ty - margin), min(gray.shape[0] - h, ty + margin)
+            if x1 < x0 or y1 < y0:
+                return None
+            roi = gray[y0:y1 + h, x0:x1 + w]
+            _, score, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED))
+            x, y = x0 + mx, y0 + my
+            inner = (x > x0 or x0 == 0) and (x < x1 or x1 == gray.shape[1] - w) and \
+                    (y > y0 or y0 == 0) and (y < y1 or y1 == gray.shape[0] - h)
+            if inner:
+                break
+        return x, y, float(score)
+
+    def _follow_scroll(self, gray: np.ndarray, region: dict, threshold: float,
+                       shift: int) -> Optional[List[Track]]:
+        """Tracks moved by a scroll of ``shift`` rows plus the buttons in the revealed strip, or None."""
+        screen_h = gray.shape[0]
+        moved = []
+        edge = []
+        for track in self.tracks:
+            size = self._template_size(track.scale)
+            matches = {state: (x, y - shift, score) for state, (x, y, score) in track.matches.items()}
+            top = track.y - shift - region['top'] - size // 2
+            if top <= -size or top >= screen_h:
+                continue
+            moved_track = Track(matches, track.scale, track.patch)
+            if 0 <= top <= screen_h - size:
+                moved.append(moved_track)
+            else:
+                edge.append(moved_track)
+        moved = self._verify(gray, region, threshold, moved)
+        if moved is None:
+            return None
+        # Icons pushed partly out of the region may still match (a full scan
+        # would report them too); losing one of those is expected
+        for track in edge:
+            verified = self._verify(gray, region, threshold, [track])
+            if verified:
+                moved.extend(verified)
+
+        rows = (screen_h - shift, screen_h) if shift > 0 else (0, -shift)
+        scale = self.detector.last_scale
+        revealed = []
+        size = self._template_size(scale)
+        for track in self._group(self.detector.detect_rows(gray, region, rows[0], rows[1], threshold, scale), scale):
+            # The strip's edge cuts through the score peaks of moved buttons
+            if any(abs(track.x - t.x) < size and abs(track.y - t.y) < size for t in moved):
+                continue
+            track.patch = self._patch(gray, region, track).copy()
+            revealed.append(track)
+        tracks = moved + revealed
+        if self._converged(tracks):
+            return None
+        log.debug("Followed scroll", shift=shift, moved=len(moved), revealed=len(revealed))
+        self.scroll_frames += 1
+        return tracks
+
+    def _verify(self, gray: np.ndarray, region: dict, threshold: float,
+                tracks: List[Track]) -> Optional[List[Track]]:
+        """Re-matched tracks, or None when any track could not be found again."""
+        thresholds = self.detector.thresholds
+        verified = []
+        for track in tracks:
+            # Untouched pixels around the button give the same matches as last frame
+            patch = self._patch(gray, region, track)
+            if track.patch is not None and track.patch.shape == patch.shape and np.array_equal(track.patch, patch):
+                verified.append(track)
+                continue
+
+            matches = {}
+            for state, template in self.detector.bank.templates_for(track.scale).items():
+                h, w = template.shape
+                found = self._locate(gray, template, track.x - region['left'] - w // 2,
+                                     track.y - region['top'] - h // 2)
+                if found is not None and found[2] >= thresholds.get(state, threshold):
+                    x, y, score = found
+                    matches[state] = (x + w // 2 + region['left'], y + h // 2 + region['top'], score)
+            if not matches:
+                log.debug("Track lost", state=track.state, x=track.x, y=track.y)
+                return None
+            verified.append(Track(matches, track.scale, patch.copy()))
+
+        if self._converged(verified):
+            return None
+        return verified
+
+    def _converged(self, tracks: List[Track]) -> bool:
+        """Two tracks on one button mean the layout moved under them."""
+        if len(tracks) < 2:
+            return False
+        size = self._template_size(tracks[0].scale)
+        xs = np.array([t.x for t in tracks])
+        ys = np.array([t.y for t in tracks])
+        if len(greedy_suppress(xs, ys, size, size)) < len(tracks):
+            log.debug("Tracks converged, falling back to a full scan")
+            return True
+        return False
+
+    def _publish(self) -> dict:
+        """Store tracks as the detector's last detections and return them in reading order."""
+        scale = self.tracks[0].scale if self.tracks else self.detector.last_scale
+        detections: Dict[str, list] = {state: [] for state in self.detector.bank.templates_for(scale)}
+        for track in self.tracks:
+            for state, match in track.matches.items():
+                detections.setdefault(state, []).append(match)
+        for matches in detections.values():
+            matches.sort(key=lambda m: (m[1], m[0]))
+        self.detector.last_detections = detections
+        return {state: [(x, y) for x, y, _ in matches] for state, matches in detections.items()}
@@ -3,6 +3,17 @@ import customtkinter as ctk
 from threading import Thread, Event
 import time
 from typing import Optional
+from src.downloads import CLICKS_PER_SECOND, MAX_IN_FLIGHT
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{minutes // 60}h {minutes % 60:02d}m"
 
 class ControlPanel:
     def __init__(self, on_select_region, on_start, on_stop, on_settings_changed=None):
@@ -15,6 +26,7 @@ class ControlPanel:
         self.is_running = False
         self.status_label = None
         self.stats_label = None
+        self.session_label = None
         self.region_label = None
         self.selected_region = None
         
@@ -22,9 +34,13 @@ class ControlPanel:
         self.scroll_amount_slider = None
         self.click_delay_slider = None
         self.scroll_threshold_slider = None
+        self.max_downloads_slider = None
+        self.click_rate_slider = None
         self.scroll_amount_label = None
         self.click_delay_label = None
         self.scroll_threshold_label = None
+        self.max_downloads_label = None
+        self.click_rate_label = None
         
     def create_ui(self):
         ctk.set_appearance_mode("dark")
@@ -32,7 +48,7 @@ class ControlPanel:
         
         self.root = ctk.CTk()
         self.root.title("Telegram Auto Downloader")
-        self.root.geometry("450x700")
+        self.root.geometry("450x960")
         self.root.resizable(False, False)
         
         main_frame = ctk.CTkFrame(self.root)
@@ -115,6 +131,14 @@ class ControlPanel:
         )
         self.stats_label.pack(pady=10)
         
+        self.session_label = ctk.CTkLabel(
+            status_frame,
+            text="Session:\nClicked: 0.0/min\nCompleted: 0.0/min\nAvg Download: -\nETA: -",
+            font=ctk.CTkFont(size=11),
+            justify="left"
+        )
+        self.session_label.pack(pady=5)
+        
         # Settings Frame
         settings_frame = ctk.CTkFrame(main_frame)
         settings_frame.pack(fill="x", padx=10, pady=10)
@@ -189,6 +213,48 @@ class ControlPanel:
         self.scroll_threshold_slider.set(20)
         self.scroll_threshold_slider.pack(fill="x", pady=2)
         
+        # Max Downloads
+        max_downloads_frame = ctk.CTkFrame(settings_frame)
+        max_downloads_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.max_downloads_label = ctk.CTkLabel(
+            max_downloads_frame,
+            text=f"Max Downloads: {MAX_IN_FLIGHT}",
+            font=ctk.CTkFont(size=11)
+        )
+        self.max_downloads_label.pack(anchor="w")
+        
+        self.max_downloads_slider = ctk.CTkSlider(
+            max_downloads_frame,
+            from_=1,
+            to=20,
+            number_of_steps=19,
+            command=self._on_max_downloads_changed
+        )
+        self.max_downloads_slider.set(MAX_IN_FLIGHT)
+        self.max_downloads_slider.pack(fill="x", pady=2)
+        
+        # Click Rate
+        click_rate_frame = ctk.CTkFrame(settings_frame)
+        click_rate_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.click_rate_label = ctk.CTkLabel(
+            click_rate_frame,
+            text=f"Click Rate: {CLICKS_PER_SECOND:.1f}/s",
+            font=ctk.CTkFont(size=11)
+        )
+        self.click_rate_label.pack(anchor="w")
+        
+        self.click_rate_slider = ctk.CTkSlider(
+            click_rate_frame,
+            from_=0.5,
+            to=10.0,
+            number_of_steps=19,
+            command=self._on_click_rate_changed
+        )
+        self.click_rate_slider.set(CLICKS_PER_SECOND)
+        self.click_rate_slider.pack(fill="x", pady=2)
+        
         instruction_frame = ctk.CTkFrame(main_frame)
         instruction_frame.pack(fill="x", padx=10, pady=10)
         
@@ -226,7 +292,11 @@ class ControlPanel:
         self.start_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.update_status("Starting automation...")
-        self.on_start(self.selected_region)
+        if self.on_start(self.selected_region) is False:
+            # Refused, e.g. the previous run is still stopping
+            self.is_running = False
+            self.start_btn.configure(state="normal")
+            self.stop_btn.configure(state="disabled")
     
     def _on_stop(self):
         self.is_running = False
@@ -249,6 +319,17 @@ class ControlPanel:
             text += f"Completion: {stats.get('downloaded_percentage', 0):.1f}%"
             self.stats_label.configure(text=text)
     
+    def update_session(self, rates: dict):
+        if self.session_label:
+            average = rates.get('avg_download_seconds')
+            eta = rates.get('eta_seconds')
+            text = "Session:\n"
+            text += f"Clicked: {rates.get('clicks_per_minute', 0):.1f}/min\n"
+            text += f"Completed: {rates.get('completed_per_minute', 0):.1f}/min\n"
+            text += f"Avg Download: {_format_seconds(average)}\n"
+            text += f"ETA: {_format_seconds(eta)} ({rates.get('backlog', 0)} left)"
+            self.session_label.configure(text=text)
+    
     def _on_scroll_amount_changed(self, value):
         self.scroll_amount_label.configure(text=f"Scroll Amount: {int(value)}")
         if self.on_settings_changed:
@@ -264,11 +345,23 @@ class ControlPanel:
         if self.on_settings_changed:
             self.on_settings_changed('scroll_threshold', int(value))
     
+    def _on_max_downloads_changed(self, value):
+        self.max_downloads_label.configure(text=f"Max Downloads: {int(value)}")
+        if self.on_settings_changed:
+            self.on_settings_changed('max_downloads', int(value))
+    
+    def _on_click_rate_changed(self, value):
+        self.click_rate_label.configure(text=f"Click Rate: {value:.1f}/s")
+        if self.on_settings_changed:
+            self.on_settings_changed('clicks_per_second', value)
+    
     def get_settings(self):
         return {
             'scroll_amount': int(self.scroll_amount_slider.get()) if self.scroll_amount_slider else 3,
             'click_delay': self.click_delay_slider.get() if self.click_delay_slider else 0.2,
-            'scroll_threshold': int(self.scroll_threshold_slider.get()) if self.scroll_threshold_slider else 20
+            'scroll_threshold': int(self.scroll_threshold_slider.get()) if self.scroll_threshold_slider else 20,
+            'max_downloads': int(self.max_downloads_slider.get()) if self.max_downloads_slider else MAX_IN_FLIGHT,
+            'clicks_per_second': self.click_rate_slider.get() if self.click_rate_slider else CLICKS_PER_SECOND
         }
     
     def run(self):
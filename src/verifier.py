@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import time
+from threading import Event
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.log import get_logger
+from src.metrics import metrics
+
+log = get_logger('verifier')
+
+
+class ClickVerifier:
+    """Confirms clicks by matching the state templates in a small box around each clicked point.
+
+    ``grab(box)`` captures a screen box (``left``/``top``/``width``/``height``).
+    After a click, ``verify`` polls the box of every clicked position every
+    ``poll`` seconds. A position is confirmed as soon as the ``downloading``
+    template scores at least its threshold there and better than the other
+    state templates (with loose thresholds an icon matches all of them), so
+    confirmation takes about as long as Telegram needs to react. Positions
+    still unconfirmed after ``timeout`` are returned.
+    """
+
+    def __init__(self, grab: Callable[[dict], np.ndarray], margin: int = 6, timeout: float = 0.5,
+                 poll: float = 0.015):
+        self.grab = grab
+        self.margin = margin
+        self.timeout = timeout
+        self.poll = poll
+
+    def box(self, position: Tuple[int, int], template_shape: Tuple[int, int], region: dict) -> dict:
+        """Screen box around a clicked icon center, clipped to the region."""
+        h, w = template_shape[:2]
+        x, y = position
+        left = max(region['left'], x - w // 2 - self.margin)
+        top = max(region['top'], y - h // 2 - self.margin)
+        right = min(region['left'] + region['width'], x - w // 2 + w + self.margin)
+        bottom = min(region['top'] + region['height'], y - h // 2 + h + self.margin)
+        return {'left': int(left), 'top': int(top), 'width': int(right - left), 'height': int(bottom - top)}
+
+    def _patch(self, box: dict, region: dict) -> np.ndarray:
+        frame = self.grab(box)
+        if frame.shape[:2] != (box['height'], box['width']):
+            # Sources that replay whole frames ignore the box: cut it out of the region frame
+            top, left = box['top'] - region['top'], box['left'] - region['left']
+            frame = frame[top:top + box['height'], left:left + box['width']]
+        if frame.ndim == 2:
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+    @staticmethod
+    def score(patch: np.ndarray, template: np.ndarray) -> float:
+        if patch.shape[0] < template.shape[0] or patch.shape[1] < template.shape[1]:
+            return 0.0
+        return float(cv2.matchTemplate(patch, template, cv2.TM_CCOEFF_NORMED).max())
+
+    def confirmed(self, box: dict, region: dict, templates: Dict[str, np.ndarray], threshold: float) -> bool:
+        """Whether the icon in ``box`` is best matched by the ``downloading`` template."""
+        patch = self._patch(box, region)
+        scores = {state: self.score(patch, template) for state, template in templates.items()}
+        best = scores.pop('downloading')
+        return best >= threshold and all(best > score for score in scores.values())
+
+    def verify(self, positions: List[Tuple[int, int]], region: dict, templates: Dict[str, np.ndarray],
+               threshold: float, stop_event: Optional[Event] = None) -> List[Tuple[int, int]]:
+        """Clicked positions that did not turn into ``downloading`` within the timeout.
+
+        ``templates`` are the state templates of the display scale in use and
+        ``threshold`` the calibrated one of ``downloading``.
+        """
+        shape = templates['downloading'].shape
+        pending = {position: self.box(position, shape, region) for position in positions}
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with metrics.stage('verify_clicks'):
+            while pending:
+                for position, box in list(pending.items()):
+                    if self.confirmed(box, region, templates, threshold):
+                        del pending[position]
+                        metrics.observe('click_confirm', (time.monotonic() - start) * 1000)
+                if not pending or time.monotonic() >= deadline:
+                    break
+                if stop_event is not None:
+                    if stop_event.wait(self.poll):
+                        break
+                else:
+                    time.sleep(self.poll)
+        metrics.count('clicks_confirmed', len(positions) - len(pending))
+        if pending:
+            log.debug(f"{len(pending)} of {len(positions)} clicks not confirmed after {self.timeout:.2f}s")
+        return [position for position in positions if position in pending]
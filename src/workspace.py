@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+
+def convert_gray(frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Convert a BGRA, BGR or gray frame into ``dst`` without allocating."""
+    if frame.ndim == 2:
+        np.copyto(dst, frame)
+    elif frame.shape[2] == 4:
+        cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY, dst=dst)
+    else:
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+    return dst
+
+
+class MatchWorkspace:
+    """Preallocated buffers for one capture region.
+
+    Holds the grayscale frame and one ``matchTemplate`` result buffer per
+    template. Buffers are handed to OpenCV as ``dst``/``result`` so a frame
+    of the same size never allocates; everything is reallocated only when
+    the region size changes.
+    """
+
+    def __init__(self):
+        self.shape = None
+        self.gray = None
+        self._results = {}
+        self._scratch = {}
+
+    def ensure(self, height: int, width: int):
+        if self.shape != (height, width):
+            self.shape = (height, width)
+            self.gray = np.empty((height, width), dtype=np.uint8)
+            self._results = {}
+            self._scratch = {}
+
+    def to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Convert a BGRA, BGR or gray frame into the workspace gray buffer."""
+        height, width = frame.shape[:2]
+        self.ensure(height, width)
+        return convert_gray(frame, self.gray)
+
+    def result_buffer(self, name: str, template_shape: Tuple[int, int]) -> np.ndarray:
+        """Result buffer for matching a ``template_shape`` template over the frame."""
+        h, w = template_shape[:2]
+        screen_h, screen_w = self.shape
+        key = (name, h, w)
+        buf = self._results.get(key)
+        if buf is None:
+            buf = np.empty((screen_h - h + 1, screen_w - w + 1), dtype=np.float32)
+            self._results[key] = buf
+        return buf
+
+    def scratch_buffer(self, name: str, shape: Tuple[int, int]) -> np.ndarray:
+        """float32 scratch buffer for one template, e.g. for peak dilation.
+
+        Kept per template so templates matched on different threads never
+        share a buffer.
+        """
+        key = (name, shape)
+        buf = self._scratch.get(key)
+        if buf is None:
+            buf = np.empty(shape, dtype=np.float32)
+            self._scratch[key] = buf
+        return buf
+
+
+class GrayRing:
+    """A few preallocated gray frames, handed out in turn.
+
+    For the pipeline, which converts a frame while earlier ones are still
+    queued or being detected: a buffer is reused only after ``size - 1``
+    later frames, and everything is reallocated only when the region size
+    changes.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.shape = None
+        self._buffers = []
+        self._next = 0
+
+    def to_gray(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        if self.shape != (height, width):
+            self.shape = (height, width)
+            self._buffers = [np.empty((height, width), dtype=np.uint8) for _ in range(self.size)]
+            self._next = 0
+        gray = self._buffers[self._next]
+        self._next = (self._next + 1) % self.size
+        return convert_gray(frame, gray)